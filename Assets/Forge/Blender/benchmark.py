@@ -0,0 +1,379 @@
+import bpy
+import sys
+import os
+import json
+import math
+import time
+import hashlib
+import argparse
+import statistics
+import xml.etree.ElementTree as ET
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
+
+# headless benchmark for the blender pipeline
+#   blender --background --python benchmark.py -- <work folder> [--scale 1] [--repeat 3] [--golden golden.json] [--update-golden]
+# builds deterministic synthetic level scale inputs, runs each script end to end,
+# reports total and per stage times and compares a digest of every output against the golden file
+# goldens depend on the blender version, so keep one per version you benchmark with
+
+SEED = 1234
+
+# outputs are compared after rounding to this precision
+DIGEST_PRECISION = 1e-4
+
+def get_material(name):
+    mat = bpy.data.materials.get(name)
+    if mat is None:
+        mat = bpy.data.materials.new(name)
+    return mat
+
+def build_mesh(name, verts, faces, material_indices, material_names, uvs=None):
+    # builds a mesh from arrays, every face has the same number of corners
+    faces = np.asarray(faces, dtype=np.int32)
+    corners = faces.shape[1]
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(verts))
+    me.vertices.foreach_set("co", np.ascontiguousarray(verts, dtype=np.float32).ravel())
+    me.loops.add(faces.size)
+    me.loops.foreach_set("vertex_index", faces.ravel())
+    me.polygons.add(len(faces))
+    me.polygons.foreach_set("loop_start", np.arange(0, faces.size, corners, dtype=np.int32))
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        me.polygons.foreach_set("loop_total", np.full(len(faces), corners, dtype=np.int32))
+    me.polygons.foreach_set("material_index", np.ascontiguousarray(material_indices, dtype=np.int32))
+    for material_name in material_names:
+        me.materials.append(get_material(material_name))
+    if uvs is not None:
+        uv_layer = me.uv_layers.new()
+        uv_layer.data.foreach_set("uv", np.ascontiguousarray(uvs, dtype=np.float32).ravel())
+    me.update(calc_edges=True)
+    return me
+
+def link_object(name, me, parent=None):
+    ob = bpy.data.objects.new(name, me)
+    bpy.context.scene.collection.objects.link(ob)
+    ob.parent = parent
+    return ob
+
+def make_terrain(filepath, scale):
+    # dense grid with every quad's corners unwelded, like meshes coming out of wrench
+    # uvs run far outside [0,1] so the uv wrap has work to do
+    rng = np.random.default_rng(SEED)
+    n = max(8, int(256 * math.sqrt(scale)))
+    x, y = np.meshgrid(np.arange(n, dtype=np.float64), np.arange(n, dtype=np.float64), indexing="ij")
+    corners = np.stack([np.stack([x, y], -1), np.stack([x + 1, y], -1), np.stack([x + 1, y + 1], -1), np.stack([x, y + 1], -1)], axis=2).reshape(-1, 4, 2)
+
+    xy = corners.reshape(-1, 2) * 2
+    z = np.sin(xy[:, 0] * 0.05) * 8 + np.cos(xy[:, 1] * 0.07) * 5
+    verts = np.column_stack([xy, z + 20])
+    faces = np.arange(len(verts)).reshape(-1, 4)
+    uvs = xy * 0.25 + rng.integers(-50, 50, size=(len(faces), 1, 2)).repeat(4, axis=1).reshape(-1, 2)
+
+    # material blocks
+    face_xy = corners[:, 0, :]
+    material_indices = ((face_xy[:, 0] // 32) + (face_xy[:, 1] // 32) * 2).astype(np.int32) % 4
+
+    me = build_mesh("terrain", verts, faces, material_indices, [f'tfrag_{i}' for i in range(4)], uvs)
+    link_object("terrain", me)
+    bpy.ops.export_scene.gltf(filepath = filepath)
+
+def make_box(rng, max_size):
+    size = rng.uniform(1, max_size, size=3)
+    verts = np.array([[x, y, z] for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype=np.float64) * size - size * 0.5
+    faces = np.array([[0, 2, 3, 1], [4, 5, 7, 6], [0, 1, 5, 4], [2, 6, 7, 3], [0, 4, 6, 2], [1, 3, 7, 5]])
+    return verts, faces
+
+def make_collision(filepath, scale):
+    # thousands of instanced props sharing a handful of meshes
+    # some mirrored, some parented, some big enough to need their edges subdivided
+    rng = np.random.default_rng(SEED)
+    unique_count = max(4, int(64 * scale))
+    instance_count = max(16, int(4000 * scale))
+    area = math.sqrt(instance_count) * 30
+
+    meshes = []
+    for i in range(unique_count):
+        verts, faces = make_box(rng, 48 if i % 8 == 0 else 8)
+        material_count = int(rng.integers(1, 4))
+        material_names = [f'col_{int(x):x}' for x in rng.choice(16, size=material_count, replace=False)]
+        material_indices = rng.integers(0, material_count, size=len(faces))
+        meshes.append(build_mesh(f'prop_{i}', verts, faces, material_indices, material_names))
+
+    groups = []
+    for i in range(instance_count // 10):
+        group = link_object(f'group_{i}', None)
+        group.location = (rng.uniform(100, area + 100), rng.uniform(100, area + 100), 50)
+        group.rotation_euler = (0, 0, rng.uniform(0, math.tau))
+        groups.append(group)
+
+    for i in range(instance_count):
+        parent = groups[i % len(groups)] if groups and i % 3 == 0 else None
+        ob = link_object(f'instance_{i}', meshes[int(rng.integers(0, unique_count))], parent)
+        if parent is None:
+            ob.location = (rng.uniform(100, area + 100), rng.uniform(100, area + 100), rng.uniform(50, 60))
+        else:
+            ob.location = (rng.uniform(-20, 20), rng.uniform(-20, 20), rng.uniform(0, 10))
+        ob.rotation_euler = (0, 0, rng.uniform(0, math.tau))
+        ob.scale = (-1 if i % 5 == 0 else 1, 1, 1)
+        ob.scale = tuple(x * rng.uniform(0.5, 1.5) for x in ob.scale)
+
+    bpy.ops.wm.save_as_mainfile(filepath = filepath)
+
+def make_shrub(filepath, scale):
+    # several unwelded multi material spheres, some with colliders
+    rng = np.random.default_rng(SEED)
+    object_count = max(2, int(24 * scale))
+    rings, segments = 24, 32
+
+    for i in range(object_count):
+        theta = np.linspace(0, math.pi, rings + 1)
+        phi = np.linspace(0, math.tau, segments + 1)
+        r, s = np.meshgrid(np.arange(rings), np.arange(segments), indexing="ij")
+        corners = np.stack([np.stack([r, s], -1), np.stack([r + 1, s], -1), np.stack([r + 1, s + 1], -1), np.stack([r, s + 1], -1)], axis=2).reshape(-1, 2)
+
+        radius = rng.uniform(1, 4)
+        t, p = theta[corners[:, 0]], phi[corners[:, 1]]
+        verts = np.column_stack([np.sin(t) * np.cos(p), np.sin(t) * np.sin(p), np.cos(t)]) * radius + (i * 10, 0, 0)
+        faces = np.arange(len(verts)).reshape(-1, 4)
+        uvs = np.column_stack([corners[:, 1] / segments, corners[:, 0] / rings]) * 3
+
+        material_count = int(rng.integers(3, 7))
+        material_indices = (r.ravel() * material_count) // rings
+        me = build_mesh(f'shrub_{i}', verts, faces, material_indices, [f'shrub_mat_{i}_{x}' for x in range(material_count)], uvs)
+        link_object(f'shrub_{i}', me)
+
+        if i % 4 == 0:
+            collider = build_mesh(f'shrub_{i}_collider', verts, faces, np.zeros(len(faces)), [f'col_{i % 16:x}'])
+            link_object(f'shrub_{i}_collider', collider)
+
+    bpy.ops.export_scene.gltf(filepath = filepath)
+
+def make_inputs(folder, scale, regenerate):
+    inputs = {
+        "terrain": (os.path.join(folder, "terrain.glb"), make_terrain),
+        "collision": (os.path.join(folder, "collision.blend"), make_collision),
+        "shrub": (os.path.join(folder, "shrub.glb"), make_shrub),
+    }
+
+    # inputs are tagged with their scale so a different scale rebuilds them
+    scale_filepath = os.path.join(folder, "inputs.json")
+    previous_scale = None
+    if os.path.exists(scale_filepath):
+        with open(scale_filepath, "r", encoding="utf-8") as f:
+            previous_scale = json.load(f).get("scale")
+
+    for name, (filepath, make) in inputs.items():
+        if regenerate or previous_scale != scale or not os.path.exists(filepath):
+            print(f'generating {name}')
+            forge_common.reset_scene()
+            make(filepath, scale)
+
+    with open(scale_filepath, "w", encoding="utf-8") as f:
+        json.dump({ "scale": scale }, f)
+
+    return { name: filepath for name, (filepath, _) in inputs.items() }
+
+def get_cases(inputs, folder):
+    # each case opens a scene and returns the argv for the script
+    outputs = os.path.join(folder, "out")
+    os.makedirs(outputs, exist_ok=True)
+    cache = os.path.join(folder, "collision-cache")
+
+    def empty_scene():
+        forge_common.reset_scene()
+
+    return [
+        { "name": "convert-mesh", "script": "convert-mesh.py", "scene": empty_scene,
+          "args": [inputs["terrain"], os.path.join(outputs, "terrain.glb"), "1"], "out": os.path.join(outputs, "terrain.glb") },
+        { "name": "export-collision", "script": "export-collision.py", "scene": empty_scene,
+          "args": [os.path.join(outputs, "collision.dae"), "--blend", inputs["collision"]], "out": os.path.join(outputs, "collision.dae") },
+        { "name": "export-collision cached", "script": "export-collision.py", "scene": empty_scene,
+          "args": [os.path.join(outputs, "collision-cached.dae"), "--blend", inputs["collision"], "--cache", cache], "out": os.path.join(outputs, "collision-cached.dae") },
+        { "name": "prepare-model-for-shrub-convert", "script": "prepare-model-for-shrub-convert.py", "scene": empty_scene,
+          "args": [inputs["shrub"], os.path.join(outputs, "shrub.glb"), ""], "out": os.path.join(outputs, "shrub.glb") },
+    ]
+
+def run_case(case):
+    case["scene"]()
+    module = forge_common.load_script(case["script"])
+    if os.path.exists(case["out"]):
+        os.remove(case["out"])
+
+    with forge_common.record_stages() as stages:
+        start = time.perf_counter()
+        try:
+            module.run(list(case["args"]))
+        except SystemExit as e:
+            # scripts signal success with exit(1)
+            if e.code != 1:
+                raise
+        elapsed = time.perf_counter() - start
+
+    # stages that run once per item are summed
+    totals = {}
+    for stage in stages:
+        totals[stage["stage"]] = totals.get(stage["stage"], 0) + stage["elapsed"]
+    rss = max([x["rss"] for x in stages if x.get("rss")] or [0])
+    rss_delta = max([x["rss_delta"] for x in stages if x.get("rss_delta") is not None] or [0])
+    return { "elapsed": elapsed, "stages": totals, "rss": rss, "rss_delta": rss_delta }
+
+def read_collada_triangles(filepath):
+    # reads the collada written by forge_collision.write_collada
+    root = ET.parse(filepath).getroot()
+    ns = { "c": "http://www.collada.org/2005/11/COLLADASchema" }
+    mesh = root.find(".//c:mesh", ns)
+    verts = np.array(mesh.find(".//c:float_array", ns).text.split(), dtype=np.float64).reshape(-1, 3)
+
+    coords, materials = [], []
+    for triangles in mesh.findall("c:triangles", ns):
+        tris = np.array(triangles.find("c:p", ns).text.split(), dtype=np.int64).reshape(-1, 3)
+        coords.append(verts[tris])
+        materials += [triangles.get("material", "")] * len(tris)
+
+    coords = np.concatenate(coords) if coords else np.zeros((0, 3, 3))
+    return coords, None, materials
+
+def read_scene_triangles(filepath):
+    # world space triangles, uvs and material names of every mesh in the file
+    forge_common.reset_scene()
+    if os.path.splitext(filepath)[1] == ".fbx":
+        bpy.ops.import_scene.fbx(filepath = filepath)
+    else:
+        forge_common.import_file(filepath)
+
+    coords, uvs, materials = [], [], []
+    for ob in bpy.context.scene.objects:
+        if ob.type != 'MESH':
+            continue
+
+        me = ob.data
+        me.calc_loop_triangles()
+        tri_count = len(me.loop_triangles)
+        tri_verts = np.empty(tri_count * 3, dtype=np.int64)
+        tri_loops = np.empty(tri_count * 3, dtype=np.int64)
+        tri_materials = np.empty(tri_count, dtype=np.int64)
+        me.loop_triangles.foreach_get("vertices", tri_verts)
+        me.loop_triangles.foreach_get("loops", tri_loops)
+        me.loop_triangles.foreach_get("material_index", tri_materials)
+
+        co = np.empty(len(me.vertices) * 3, dtype=np.float64)
+        me.vertices.foreach_get("co", co)
+        matrix = np.array(ob.matrix_world)
+        co = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+        coords.append(co[tri_verts].reshape(-1, 3, 3))
+
+        uv = np.zeros((len(me.loops), 2), dtype=np.float64)
+        if me.uv_layers.active is not None:
+            data = np.empty(len(me.loops) * 2, dtype=np.float64)
+            me.uv_layers.active.data.foreach_get("uv", data)
+            uv = data.reshape(-1, 2)
+        uvs.append(uv[tri_loops].reshape(-1, 3, 2))
+
+        names = [x.material.name if x.material else "" for x in ob.material_slots] or [""]
+        materials += [names[min(x, len(names) - 1)] for x in tri_materials]
+
+    coords = np.concatenate(coords) if coords else np.zeros((0, 3, 3))
+    uvs = np.concatenate(uvs) if uvs else np.zeros((0, 3, 2))
+    return coords, uvs, materials
+
+def is_less(a, b):
+    # row wise lexicographic a < b
+    diff = a != b
+    first_diff = np.argmax(diff, axis=1)
+    rows = np.arange(len(a))
+    return diff.any(axis=1) & (a[rows, first_diff] < b[rows, first_diff])
+
+def get_digest(filepath):
+    # digest of the output's geometry that ignores vertex, triangle and object order
+    # so optimizations that reorder data still compare equal
+    if os.path.splitext(filepath)[1] == ".dae":
+        coords, uvs, materials = read_collada_triangles(filepath)
+    else:
+        coords, uvs, materials = read_scene_triangles(filepath)
+
+    material_names = sorted(set(materials))
+    material_ids = np.array([material_names.index(x) for x in materials], dtype=np.int64).reshape(-1, 1)
+    corners = np.round(coords / DIGEST_PRECISION).astype(np.int64)
+    if uvs is not None:
+        corners = np.concatenate([corners, np.round(uvs / DIGEST_PRECISION).astype(np.int64)], axis=2)
+
+    # start each triangle at its smallest corner, keeping the winding
+    tri_indices = np.arange(len(corners))
+    first = np.zeros(len(corners), dtype=np.int64)
+    for i in (1, 2):
+        first = np.where(is_less(corners[:, i, :], corners[tri_indices, first, :]), i, first)
+    rows = np.concatenate([corners[tri_indices[:, None], (first[:, None] + np.arange(3)) % 3, :].reshape(len(corners), -1), material_ids], axis=1)
+    rows = rows[np.lexsort(rows.T[::-1])] if len(rows) > 0 else rows
+
+    digest = hashlib.sha256(np.ascontiguousarray(rows).tobytes())
+    digest.update("\0".join(material_names).encode("utf-8"))
+    return { "digest": digest.hexdigest(), "triangles": len(rows), "materials": material_names }
+
+def print_results(results):
+    for name, result in results.items():
+        times = [x["elapsed"] for x in result["runs"]]
+        print(f'{name}: min {min(times):.3f}s median {statistics.median(times):.3f}s rss {result["runs"][-1]["rss"] / (1024 * 1024):.0f} MB (+{result["runs"][-1]["rss_delta"] / (1024 * 1024):.0f} MB)')
+        for stage in result["runs"][0]["stages"]:
+            stage_times = [x["stages"].get(stage, 0) for x in result["runs"]]
+            print(f'    {stage}: min {min(stage_times):.3f}s median {statistics.median(stage_times):.3f}s')
+
+def compare_golden(results, golden):
+    ok = True
+    for name, result in results.items():
+        expected = golden.get(name)
+        if expected is None:
+            print(f'{name}: no golden output')
+        elif expected["digest"] != result["output"]["digest"]:
+            print(f'{name}: output differs from golden ({result["output"]["triangles"]} triangles, expected {expected["triangles"]})')
+            ok = False
+        else:
+            print(f'{name}: output matches golden')
+    return ok
+
+def run(argv):
+    parser = argparse.ArgumentParser(prog="benchmark.py")
+    parser.add_argument("folder")
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", default=None)
+    parser.add_argument("--golden", default=None)
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--regenerate", action="store_true")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.folder, exist_ok=True)
+    inputs = make_inputs(args.folder, args.scale, args.regenerate)
+
+    results = {}
+    for case in get_cases(inputs, args.folder):
+        if args.only and args.only not in case["name"]:
+            continue
+
+        print(f'running {case["name"]}')
+        runs = [run_case(case) for _ in range(max(1, args.repeat))]
+        results[case["name"]] = { "runs": runs, "output": get_digest(case["out"]) }
+
+    print_results(results)
+    with open(os.path.join(args.folder, "benchmark-results.json"), "w", encoding="utf-8") as f:
+        json.dump({ "blender": bpy.app.version_string, "scale": args.scale, "results": results }, f, indent=2)
+
+    ok = True
+    if args.golden:
+        if args.update_golden or not os.path.exists(args.golden):
+            with open(args.golden, "w", encoding="utf-8") as f:
+                json.dump({ name: result["output"] for name, result in results.items() }, f, indent=2)
+            print(f'wrote golden outputs to {args.golden}')
+        else:
+            with open(args.golden, "r", encoding="utf-8") as f:
+                ok = compare_golden(results, json.load(f))
+
+    return ok
+
+if __name__ == "__main__":
+    argv = forge_common.get_argv([ os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".forgeartifacts", "benchmark") ])
+
+    # success
+    exit(1 if run(argv) else 2)
@@ -0,0 +1,58 @@
+import sys
+import os
+import json
+import time
+import traceback
+import bpy
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
+
+# long running blender process
+# reads one json job per line from stdin
+#   { "id": 1, "script": "convert-mesh.py", "args": [ ... ], "blend_file": null }
+# and runs the script's run(argv) handler against a fresh scene
+# status for each job is written back as an "@forge" json line
+
+def run_job(job):
+    script = job["script"]
+    args = job.get("args") or []
+    blend_file = job.get("blend_file")
+
+    # reset scene
+    if blend_file:
+        bpy.ops.wm.open_mainfile(filepath = blend_file)
+    else:
+        forge_common.reset_scene()
+
+    module = forge_common.load_script(script)
+    module.run(args)
+
+forge_common.emit("ready", version = bpy.app.version_string)
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+
+    job = json.loads(line)
+    if job.get("command") == "quit":
+        break
+
+    forge_common.emit("start", id = job.get("id"), script = job.get("script"))
+    start = time.perf_counter()
+    error = None
+    try:
+        run_job(job)
+    except SystemExit as e:
+        # scripts signal success with exit(1)
+        if e.code != 1:
+            error = f"exited with code {e.code}"
+    except Exception:
+        error = traceback.format_exc()
+        print(error, flush=True)
+
+    forge_common.emit("job", id = job.get("id"), script = job.get("script"), ok = error is None, error = error, elapsed = time.perf_counter() - start)
+
+# success
+exit(1)
@@ -2,136 +2,195 @@ import sys
 import bpy
 import os
 import time
+import json
+import math
+import hashlib
+import traceback
+import numpy as np
 
-def add(obj, face, u_off, v_off):
-    for vert_idx, loop_idx in zip(face.vertices, face.loop_indices):
-        uv_coords = obj.data.uv_layers.active.data[loop_idx].uv
-        uv_coords[0] += u_off
-        uv_coords[1] += v_off
-        obj.data.uv_layers.active.data[loop_idx].uv = uv_coords
-
-def avg(obj, face):
-    uAvg = 0
-    vAvg = 0
-    count = 0
-    
-    for vert_idx, loop_idx in zip(face.vertices, face.loop_indices):
-        uv_coords = obj.data.uv_layers.active.data[loop_idx].uv
-        uAvg += uv_coords[0]
-        vAvg += uv_coords[1]
-        count += 1
-    
-    if count > 0:
-        return (uAvg / count, vAvg / count)
-    
-    return 0
-
-argv = sys.argv
-try:
-    argv = argv[argv.index("--") + 1:]  # get all args after "--"
-except ValueError:
-    # test value
-    argv = [ "M:/Unity/horizon-forge/levels/New Map/assets/shrub/0002_20B8/shrub.bin.glb"
-    , "M:/Unity/horizon-forge/Assets/Maps/New Map/Shrub/8376/8376.fbx" ]
-
-print(argv)
-
-in_filepath = argv[0]
-out_filepath = argv[1]
-fix_normals = argv[2] == "1" if argv is not None and len(argv) > 2 else False
-ext = os.path.splitext(in_filepath)[1]
-
-# reset scene
-bpy.ops.wm.read_factory_settings(use_empty=True)
-
-# import file
-if ext == ".dae":
-    bpy.ops.wm.collada_import(filepath = in_filepath, 
-                          auto_connect = False, 
-                          find_chains = False, 
-                          fix_orientation = False) 
-    
-elif ext == ".blend":
-    bpy.ops.wm.open_mainfile(filepath = in_filepath)
-    
-elif ext == ".glb" or ext == ".gltf":
-    bpy.ops.import_scene.gltf(filepath = in_filepath) 
-
-C = bpy.context
-obj = C.object
-me = obj.data
-uvlayer = me.uv_layers.active
-
-# Object Mode
-bpy.ops.object.mode_set(mode='OBJECT')
-
-if fix_normals:
-    all_objects = [x for x in C.scene.objects]
-    for obj in all_objects:
-        bpy.ops.object.select_all(action='DESELECT')
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-        # go edit mode
-        bpy.ops.object.mode_set(mode='EDIT')
-        # select all faces
-        bpy.ops.mesh.select_all(action='SELECT')
-        # merge
-        bpy.ops.mesh.remove_doubles(threshold = 0.001)
-        # reset normals
-        bpy.ops.mesh.normals_tools(mode='RESET')
-        # recalculate outside normals 
-        bpy.ops.mesh.normals_make_consistent(inside=False)
-        # go object mode again
-        bpy.ops.object.editmode_toggle()
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
+
+def strip_material_prefix(prefix):
+    # wrench names collada materials mat_N, unity materials are matched by N
+    for mat in bpy.data.materials:
+        if mat.name.startswith(prefix):
+            mat.name = mat.name[len(prefix):]
+
+def convert(in_filepath, out_filepath, fix_normals, object_names=None, material_prefix=None):
+    # import file
+    with forge_common.stage("import"):
+        forge_common.import_file(in_filepath, object_names=object_names)
+
+    if material_prefix:
+        strip_material_prefix(material_prefix)
+
+    C = bpy.context
 
     # Object Mode
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-# fix uvs
-if True:
-    all_objects = [x for x in C.scene.objects]
-    for obj in all_objects:
-        me = obj.data
-
-        # cycle all loops
-        if obj.data is not None and obj.data.uv_layers.active is not None and len(obj.data.uv_layers.active.data) > 0:
-            for face in obj.data.polygons:
-                uAvg, vAvg = avg(obj, face)
-                while uAvg > 1 or uAvg < 0 or vAvg > 1 or vAvg < 0:
-                    if uAvg > 1:
-                        add(obj, face, -1, 0)
-                    elif uAvg < 0:
-                        add(obj, face, 1, 0)
-                    
-                    if vAvg > 1:
-                        add(obj, face, 0, -1)
-                    elif vAvg < 0:
-                        add(obj, face, 0, 1)
-                        
-                    uAvg, vAvg = avg(obj, face)
-
-# Convert material names to "0","1","2",etc
-# for obj in bpy.data.objects:
-#     for num, m in list(enumerate(obj.material_slots)):
-#         if m.material:
-#             mat_name = m.material.name
-
-#             # material_0, material_1, etc
-#             if mat_name.find("material_") == 0:
-#                 new_name = mat_name[9:]
-#                 print ("Renaming material ", mat_name, " to ", new_name)
-#                 m.material.name = new_name
-
-# Export
-out_ext = os.path.splitext(out_filepath)[1]
-if out_ext == ".blend":
-    bpy.ops.wm.save_as_mainfile(filepath = out_filepath)
-elif out_ext == ".glb":
-    bpy.ops.export_scene.gltf(filepath = out_filepath)
-elif out_ext == ".fbx":
-    bpy.ops.export_scene.fbx(filepath = out_filepath, axis_forward='Y', axis_up='Z', apply_scale_options='FBX_SCALE_ALL')
-else:
-    raise RuntimeError(f'Unsupported export extension {out_ext}')
-
-# success
-exit(1)
+    if C.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    meshes = forge_common.get_scene_meshes()
+
+    # merge vertices and recalculate outside normals
+    if fix_normals:
+        with forge_common.stage("merge normals"):
+            for me in meshes:
+                forge_common.merge_by_distance(me, 0.001, recalc_normals=True)
+
+    # fix uvs
+    if True:
+        with forge_common.stage("uv wrap", counts=False):
+            for me in meshes:
+                forge_common.wrap_uvs(me)
+
+    # Convert material names to "0","1","2",etc
+    # for obj in bpy.data.objects:
+    #     for num, m in list(enumerate(obj.material_slots)):
+    #         if m.material:
+    #             mat_name = m.material.name
+
+    #             # material_0, material_1, etc
+    #             if mat_name.find("material_") == 0:
+    #                 new_name = mat_name[9:]
+    #                 print ("Renaming material ", mat_name, " to ", new_name)
+    #                 m.material.name = new_name
+
+    # Export
+    out_ext = os.path.splitext(out_filepath)[1]
+    with forge_common.stage("export", counts=False):
+        if out_ext == ".blend":
+            bpy.ops.wm.save_as_mainfile(filepath = out_filepath)
+        elif out_ext == ".glb":
+            bpy.ops.export_scene.gltf(filepath = out_filepath)
+        elif out_ext == ".fbx":
+            bpy.ops.export_scene.fbx(filepath = out_filepath, axis_forward='Y', axis_up='Z', apply_scale_options='FBX_SCALE_ALL')
+        else:
+            raise RuntimeError(f'Unsupported export extension {out_ext}')
+
+def update_object_hash(ob, sha):
+    # everything about an object that ends up in the converted file
+    data = forge_common.read_mesh_data(ob.data)
+    for name in ("verts", "vertex_index", "loop_start", "loop_total", "material_index"):
+        sha.update(data[name].tobytes())
+    for name, uvs in sorted(data["uv_layers"].items()):
+        sha.update(name.encode("utf-8"))
+        sha.update(uvs.tobytes())
+    for name, (domain, data_type, _, values) in sorted(data["attributes"].items()):
+        sha.update(f'{name} {domain} {data_type}'.encode("utf-8"))
+        sha.update(values.tobytes())
+    sha.update(np.array(ob.matrix_world, dtype=np.float32).tobytes())
+    sha.update(";".join([ob.name] + [x.material.name if x.material else "" for x in ob.material_slots]).encode("utf-8"))
+
+def split_tiles(in_filepath, tiles_filepath, tile_size, material_prefix=None):
+    # imports once and groups objects into tile_size x tile_size tiles by their center
+    # objects are kept whole so their names still match what they were imported from
+    # the scene is saved next to the tile list so each tile can be converted on its own
+    # tile list is { "blend": ..., "tiles": [{ "x": ..., "y": ..., "objects": [...], "hash": ... }] }
+    with forge_common.stage("import"):
+        forge_common.import_file(in_filepath)
+
+    if material_prefix:
+        strip_material_prefix(material_prefix)
+
+    C = bpy.context
+    objects = sorted([ob for ob in C.scene.objects if ob.type == 'MESH'], key=lambda x: x.name)
+
+    # tiles only append their own objects so they can't rely on a parent's transform
+    for ob in objects:
+        if ob.parent is not None:
+            matrix = ob.matrix_world.copy()
+            ob.parent = None
+            ob.matrix_world = matrix
+    C.view_layer.update()
+
+    tiles = {}
+    with forge_common.stage("split tiles", counts=False) as stage:
+        for ob in objects:
+            center = forge_common.get_world_center(ob)
+            tile = (int(math.floor(center[0] / tile_size)), int(math.floor(center[1] / tile_size)))
+            tiles.setdefault(tile, []).append(ob)
+
+        # lets unchanged tiles be restored from the cache without converting them again
+        hashes = {}
+        for tile, tile_objects in tiles.items():
+            sha = hashlib.sha256()
+            for ob in tile_objects:
+                update_object_hash(ob, sha)
+            hashes[tile] = sha.hexdigest()
+
+        stage["tiles"] = len(tiles)
+
+    blend_filepath = os.path.splitext(tiles_filepath)[0] + ".blend"
+    with forge_common.stage("save", counts=False):
+        bpy.ops.wm.save_as_mainfile(filepath = blend_filepath)
+
+    manifest = {
+        "blend": blend_filepath,
+        "tiles": [{ "x": x, "y": y, "objects": [ob.name for ob in tiles[(x, y)]], "hash": hashes[(x, y)] } for x, y in sorted(tiles)],
+    }
+    with open(tiles_filepath, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+def convert_manifest(manifest_filepath, results_filepath):
+    # manifest is a json list of { "in": ..., "out": ..., "fix_normals": ..., "objects": ..., "material_prefix": ... }
+    # objects optionally limits a .blend input to just those objects
+    # material_prefix is optionally stripped from material names
+    with open(manifest_filepath, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    results = []
+    for i, item in enumerate(items):
+        # clear everything left over from the last item
+        if i > 0:
+            forge_common.reset_scene()
+
+        print(f'converting ({i+1}/{len(items)}) {item["in"]}')
+        forge_common.set_stage_context(file=item["in"])
+        start = time.perf_counter()
+        error = None
+        try:
+            convert(item["in"], item["out"], item.get("fix_normals", False), item.get("objects"), item.get("material_prefix"))
+        except Exception:
+            error = traceback.format_exc()
+            print(error)
+
+        results.append({ "in": item["in"], "out": item["out"], "ok": error is None, "error": error, "elapsed": time.perf_counter() - start })
+
+        # write after each item so a crash still reports what finished
+        with open(results_filepath, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+
+def run(argv):
+    print(argv)
+
+    if argv[0] == "--manifest":
+        convert_manifest(argv[1], argv[2])
+        return
+
+    # optional prefix stripped from material names after import
+    argv, material_prefix = forge_common.pop_option(argv, "--strip-material-prefix")
+
+    if argv[0] == "--tiles":
+        forge_common.set_stage_context(file=argv[1])
+        split_tiles(argv[1], argv[2], float(argv[3]), material_prefix)
+        return
+
+    in_filepath = argv[0]
+    out_filepath = argv[1]
+    fix_normals = argv[2] == "1" if argv is not None and len(argv) > 2 else False
+    forge_common.set_stage_context(file=in_filepath)
+    convert(in_filepath, out_filepath, fix_normals, material_prefix=material_prefix)
+
+if __name__ == "__main__":
+    # test value
+    argv = forge_common.get_argv([ "M:/Unity/horizon-forge/levels/New Map/assets/shrub/0002_20B8/shrub.bin.glb"
+    , "M:/Unity/horizon-forge/Assets/Maps/New Map/Shrub/8376/8376.fbx" ])
+
+    # reset scene
+    forge_common.reset_scene()
+    run(argv)
+
+    # success
+    exit(1)
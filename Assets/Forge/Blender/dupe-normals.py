@@ -1,51 +1,138 @@
-import math
 import bpy
-import json
-import mathutils
-import time
 import sys
-import bmesh
+import os
+import traceback
+import numpy as np
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
 
-argv = sys.argv
-try:
-    argv = argv[argv.index("--") + 1:]  # get all args after "--"
-except ValueError:
+def get_flipped_loops(loop_starts, loop_totals):
+    # loop order that reverses each face's winding, keeping its first corner first
+    loop_indices, face_offsets = forge_common.get_face_loop_indices(loop_starts, loop_totals)
+    corner = np.arange(len(loop_indices)) - np.repeat(face_offsets, loop_totals)
+    flipped_corner = np.where(corner == 0, 0, np.repeat(loop_totals, loop_totals) - corner)
+    flipped = np.arange(len(loop_indices))
+    flipped[loop_indices] = np.repeat(loop_starts, loop_totals) + flipped_corner
+    return flipped
+
+def double_side_mesh(mesh):
+    # new mesh with every face followed by a back facing copy on its own vertices
+    # the same result as duplicate and flip normals in edit mode, built from arrays
+    data = forge_common.read_mesh_data(mesh, normals=True)
+    flipped_loops = get_flipped_loops(data["loop_start"], data["loop_total"])
+
+    back = dict(data)
+    back["vertex_index"] = data["vertex_index"][flipped_loops]
+    back["uv_layers"] = { name: uvs[flipped_loops] for name, uvs in data["uv_layers"].items() }
+    back["attributes"] = { name: (domain, data_type, prop, values[flipped_loops] if domain == "CORNER" else values)
+                           for name, (domain, data_type, prop, values) in data["attributes"].items() }
+    back["normals"] = -data["normals"][flipped_loops] if data["normals"] is not None else None
+
+    faces = np.arange(len(data["loop_total"]))
+    slot_lookup = np.arange(max(1, len(mesh.materials)))
+    return forge_common.build_mesh_from_parts(mesh.name, [(data, faces, slot_lookup), (back, faces, slot_lookup)], mesh.materials[:])
+
+def needs_edit_mode(mesh, users):
+    # the array rebuild only keeps vertex, face and corner values
+    # skin weights, shape keys and edge data like sharp edges need edit mode to survive
+    if mesh.shape_keys is not None or any(len(obj.vertex_groups) > 0 for obj in users):
+        return True
+    if any(x.domain == "EDGE" and not x.name.startswith(".") for x in mesh.attributes):
+        return True
+
+    sharp = np.zeros(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get("use_edge_sharp", sharp)
+    return bool(sharp.any())
+
+def double_side_in_edit_mode(obj):
+    # duplicate and flip normals in place, slower but keeps everything on the mesh
+    for other in bpy.context.view_layer.objects:
+        other.select_set(other == obj)
+    bpy.context.view_layer.objects.active = obj
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    bpy.ops.mesh.select_all(action='SELECT')
+    bpy.ops.mesh.duplicate()
+    bpy.ops.mesh.flip_normals()
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return obj.data
+
+def double_side(in_filepath, out_filepath):
+    # import file
+    with forge_common.stage("import"):
+        forge_common.import_file(in_filepath)
+
+    # each mesh is doubled once no matter how many objects use it
+    with forge_common.stage("dupe normals"):
+        users = {}
+        for obj in bpy.context.scene.objects:
+            if obj.type == 'MESH':
+                users.setdefault(obj.data.as_pointer(), []).append(obj)
+
+        doubled = {}
+        for obj in [x for objs in users.values() for x in objs]:
+            print(obj.name)
+            me = obj.data
+            if me.as_pointer() not in doubled:
+                if needs_edit_mode(me, users[me.as_pointer()]):
+                    doubled[me.as_pointer()] = (me, double_side_in_edit_mode(obj))
+                else:
+                    doubled[me.as_pointer()] = (me, double_side_mesh(me))
+            obj.data = doubled[me.as_pointer()][1]
+
+        for me, new_me in doubled.values():
+            if new_me == me:
+                continue
+            name = me.name
+            bpy.data.meshes.remove(me)
+            new_me.name = name
+
+    # export
+    out_ext = os.path.splitext(out_filepath)[1]
+    with forge_common.stage("export", counts=False):
+        if out_ext == ".fbx":
+            bpy.ops.export_scene.fbx(filepath = out_filepath, apply_scale_options='FBX_SCALE_NONE', bake_space_transform=False, object_types={'MESH'})
+        elif out_ext == ".glb":
+            bpy.ops.export_scene.gltf(filepath = out_filepath)
+        elif out_ext == ".blend":
+            bpy.ops.wm.save_as_mainfile(filepath = out_filepath)
+        else:
+            raise RuntimeError(f'Unsupported export extension {out_ext}')
+
+def run(argv):
+    # argv is pairs of input and output files, all doubled in this one session
+    print(argv)
+
+    failed = []
+    for i in range(0, len(argv) - 1, 2):
+        in_filepath, out_filepath = argv[i], argv[i + 1]
+
+        # clear everything left over from the last file
+        if i > 0:
+            forge_common.reset_scene()
+
+        print(f'double siding ({i//2+1}/{len(argv)//2}) {in_filepath}')
+        forge_common.set_stage_context(file=in_filepath)
+        try:
+            double_side(in_filepath, out_filepath)
+        except Exception:
+            print(traceback.format_exc())
+            failed.append(in_filepath)
+
+    if failed:
+        raise RuntimeError(f'Failed to double side {", ".join(failed)}')
+
+if __name__ == "__main__":
     # test value
-    argv = [
+    argv = forge_common.get_argv([
         'M:/Unity/deadlocked-srp/Assets/Resources/DL/Sarathos/0AE0.fbx',
         'M:/Unity/deadlocked-srp/Assets/Resources/DL/Sarathos/0AE0-out.fbx'
-    ]
- 
-print(argv)
-
-# reset scene
-bpy.ops.wm.read_factory_settings(use_empty=True)
-
-# import file
-bpy.ops.import_scene.fbx( filepath = argv[0] )
-
-for obj in bpy.context.selected_objects:
-
-    # If object type is mesh and mode is set to object
-    if obj.type == 'MESH' and obj.mode == 'OBJECT':
-        
-        print(obj.name)
-        bpy.context.view_layer.objects.active = obj
-        
-        # Edit Mode
-        bpy.ops.object.mode_set(mode='EDIT')
-        # Seperate by material
-        bpy.ops.mesh.duplicate()
-        bpy.ops.mesh.flip_normals()
-        
-        #bpy.ops.mesh.separate(type='MATERIAL')
-        # Object Mode
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-
-# export to fbx
-bpy.ops.export_scene.fbx(filepath = argv[1], apply_scale_options='FBX_SCALE_NONE', bake_space_transform=False, object_types={'MESH'})
-
-# success
-exit(1)
+    ])
+
+    # reset scene
+    forge_common.reset_scene()
+    run(argv)
+
+    # success
+    exit(1)
@@ -3,212 +3,523 @@ import sys
 import math
 import os
 import bmesh
+import hashlib
+import numpy as np
 from mathutils import Matrix
 
-C = bpy.context
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
+import forge_collision
 
-# enter object mode
-if bpy.context.mode != 'OBJECT':
-    bpy.ops.object.mode_set(mode='OBJECT')
+def subdivide_long_edges(bm, len_threshold):
+    # only edges created by the last pass need to be checked again
+    edges = bm.edges[:]
+    while len(edges) > 0:
 
-#Deselect all
-bpy.ops.object.select_all(action='DESELECT')
+        # split each edge into as many pieces as needed in one go
+        edges_by_cuts = {}
+        for edge in edges:
+            if not edge.is_valid:
+                continue
 
-argv = sys.argv
-try:
-    argv = argv[argv.index("--") + 1:]  # get all args after "--"
-except ValueError:
-    # test value
-    argv = [ "M:/VS/wrench/bin/RelWithDebInfo/games/uya_scus_973_53/moby_classes/unsorted/6889/mesh.dae" ]
-
-export_filepath = argv[0] if argv is not None and len(argv) > 0 else None
-additional_imports = argv[1:]
-area_threshold = 32*32
-len_threshold = 32
-
-print(export_filepath)
-
-# imports
-if additional_imports is not None and len(additional_imports) > 0:
-    for additional_import in additional_imports:
-        print(additional_import)
-        ext = os.path.splitext(additional_import)[1]
-
-        # import file
-        if ext == ".dae":
-            bpy.ops.wm.collada_import(filepath = additional_import, 
-                                  auto_connect = False, 
-                                  find_chains = False, 
-                                  fix_orientation = False) 
-            
-        elif ext == ".blend":
-            bpy.ops.wm.open_mainfile(filepath = additional_import)
-            
-        elif ext == ".glb" or ext == ".gltf":
-            bpy.ops.import_scene.gltf(filepath = additional_import)
-
-idx = 0
-all_objects = [x for x in C.scene.objects]
-for obj in all_objects:
-    obj.name = str(idx)
-    idx += 1
-
-# create root
-emptyMesh = bpy.data.meshes.new('emptyMesh')
-root = bpy.data.objects.new("collision", emptyMesh)
-root.location = (0,0,0)
-C.collection.objects.link(root)
-C.view_layer.objects.active = root
-root.select_set(state=True)
-
-# recurse hierarchy and find objs with negative scale
-# mark them for a normal flip
-objs_flip = {}
-def recurse_find_flipped_objs(ob, levels=10):
-    def recurse(ob, scale, parent, depth):
-        if depth > levels: 
-            return
-        
-        if (scale.x*scale.y*scale.z) < 0:
-            objs_flip[ob] = True
-        
-        for child in ob.children:
-            recurse(child, scale * child.scale, ob,  depth + 1)
-            
-    scale = ob.scale
-    recurse(ob, scale, ob.parent, 0)
-
-for ob in all_objects:
-    if ob.parent is None:
-        recurse_find_flipped_objs(ob, levels=100)
-
-for ob in all_objects:
-    # flip normal if product of object scale is negative
-    normal_flip = False
-    if ob in objs_flip:
-        normal_flip = objs_flip[ob]
-
-    if ob.type == 'MESH':
-        copy = ob.copy()
-        copy.data = ob.data.copy()
-        C.collection.objects.link(copy)
-        
-        if normal_flip:
-            for p in copy.data.polygons:
-                p.flip()
-        
-        copy.select_set(state=True)
-        ob.select_set(state=False)
-    else:
-        ob.select_set(state=True)
+            cuts = math.ceil(edge.calc_length() / len_threshold) - 1
+            if cuts > 0:
+                edges_by_cuts.setdefault(cuts, []).append(edge)
+
+        new_edges = set()
+        for cuts in sorted(edges_by_cuts.keys(), reverse=True):
+            cut_edges = [e for e in edges_by_cuts[cuts] if e.is_valid]
+            if len(cut_edges) == 0:
+                continue
+
+            result = bmesh.ops.subdivide_edges(bm, edges=cut_edges, cuts=cuts, use_grid_fill=True)
+
+            # faces are filled with new inner edges that may still be too long
+            new_edges.update(x for x in result['geom'] if isinstance(x, bmesh.types.BMEdge))
+
+        edges = list(new_edges)
+
+# bump to invalidate cached geometry when processing changes
+CACHE_VERSION = 2
+
+def get_mesh_info(me, len_threshold):
+    # hash of a mesh's geometry, shared by every object instancing it,
+    # and its longest face edge in local space
+    verts = np.empty(len(me.vertices) * 3, dtype=np.float32)
+    me.vertices.foreach_get("co", verts)
+    loop_vertex_indices = np.empty(len(me.loops), dtype=np.int32)
+    me.loops.foreach_get("vertex_index", loop_vertex_indices)
+    loop_starts = np.empty(len(me.polygons), dtype=np.int32)
+    me.polygons.foreach_get("loop_start", loop_starts)
+    loop_totals = np.empty(len(me.polygons), dtype=np.int32)
+    me.polygons.foreach_get("loop_total", loop_totals)
+    material_indices = np.empty(len(me.polygons), dtype=np.int32)
+    me.polygons.foreach_get("material_index", material_indices)
+
+    h = hashlib.sha1()
+    h.update(f'{CACHE_VERSION};{len_threshold};'.encode())
+    for values in (verts, loop_vertex_indices, loop_totals, material_indices):
+        h.update(values.tobytes())
+
+    return h.hexdigest(), get_max_edge_length(verts.reshape(-1, 3), loop_vertex_indices, loop_starts, loop_totals)
+
+def get_object_key(ob, mesh_key):
+    # hash of everything that affects an object's processed geometry
+    h = hashlib.sha1(mesh_key.encode())
+    h.update(np.array(ob.matrix_world, dtype=np.float64).tobytes())
+    h.update(';'.join(get_material_names(ob)).encode())
+    return h.hexdigest()
+
+def get_material_names(ob):
+    names = [slot.material.name if slot.material else "" for slot in ob.material_slots]
+    return names if len(names) > 0 else [""]
+
+def get_max_edge_length(verts, loop_vertex_indices, loop_starts, loop_totals):
+    loop_starts = loop_starts[loop_totals > 0].astype(np.int64)
+    loop_totals = loop_totals[loop_totals > 0].astype(np.int64)
+    if len(loop_totals) == 0:
+        return 0
+
+    # each loop's vertex and the next vertex around its face
+    loop_indices, face_offsets = forge_common.get_face_loop_indices(loop_starts, loop_totals)
+    offsets = np.repeat(face_offsets, loop_totals)
+    totals = np.repeat(loop_totals, loop_totals)
+    next_loop_indices = loop_indices[offsets + (np.arange(len(loop_indices)) - offsets + 1) % totals]
+    verts = verts.astype(np.float64)
+    lengths = np.linalg.norm(verts[loop_vertex_indices[loop_indices]] - verts[loop_vertex_indices[next_loop_indices]], axis=1)
+    return float(lengths.max())
+
+def get_uniform_scale(matrix):
+    # scale of a rotation and uniform scale matrix, mirrored or not
+    # None when the matrix shears or scales axes differently
+    m = matrix[:3, :3]
+    gram = m.T @ m
+    scale_squared = np.trace(gram) / 3
+    if scale_squared <= 0 or not np.allclose(gram, np.eye(3) * scale_squared, rtol=0, atol=scale_squared * 1e-6):
+        return None
+    return math.sqrt(scale_squared)
+
+def triangulate_mesh(me, tmp_mesh):
+    # local space triangulated copy of a mesh
+    bm = bmesh.new()
+    bm.from_mesh(me)
+    bmesh.ops.triangulate(bm, faces=bm.faces[:])
+    bm.to_mesh(tmp_mesh)
+    bm.free()
+
+    return forge_common.read_triangles(tmp_mesh)
 
-# merge into single mesh
-C.view_layer.objects.active = root
-bpy.ops.object.join()
-bpy.ops.object.select_all(action='DESELECT')
-C.view_layer.objects.active = root
-root.select_set(state=True)
+def transform_triangles(triangles, matrix):
+    # places a mesh's local triangles in the world, flipping mirrored instances
+    verts, tris, material_indices = triangles
+    verts = (verts.astype(np.float64) @ matrix[:3, :3].T + matrix[:3, 3]).astype(np.float32)
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        tris = tris[:, ::-1]
+    return verts, np.ascontiguousarray(tris), material_indices
 
-# subdivide as necessary
-if True:
+def process_object(ob, len_threshold, tmp_mesh):
+    # world space, correctly wound, subdivided and triangulated copy of the object's mesh
     bm = bmesh.new()
-    bm.from_mesh(root.data)
-    bm.edges.ensure_lookup_table()
-    
+    bm.from_mesh(ob.data)
+    bm.transform(ob.matrix_world)
+
+    # a negative determinant means an odd number of mirrored axes
+    # through the whole hierarchy, so the faces need flipping
+    if ob.matrix_world.determinant() < 0:
+        bmesh.ops.reverse_faces(bm, faces=bm.faces[:])
+
     # subdivide large faces until none left
-    while True:
-        faces = bm.faces
-        edges = []
-        for e in range(0, len(bm.edges)):
-            edge = bm.edges[e]
-            edge_len = edge.calc_length()
-            if edge_len > len_threshold:
-                if not edge in edges:
-                    edges.append(edge)
-                    
-        # for f in range(0, len(bm.faces)):
-        #     face = faces[f]
-        #     area = face.calc_area()
-        #     if area < area_threshold:
-        #         continue
-            
-        #     for e in range(0, len(face.edges)):
-        #         edge = face.edges[e]
-        #         if not edge in edges:
-        #             edges.append(edge)
-                    
-        if len(edges) == 0:
-            break
-        
-        # subdivide
-        bmesh.ops.subdivide_edges(bm, edges=edges, cuts=1, use_grid_fill=True)
-        bm.edges.ensure_lookup_table()
-        
+    subdivide_long_edges(bm, len_threshold)
+
     bmesh.ops.triangulate(bm, faces=bm.faces[:])
-    bm.to_mesh(root.data)
-    
-
-# merge and rename materials to expected collision materials
-idx = 1
-mats = bpy.data.materials[:]
-for mat in mats:
-    if mat.name.startswith('col_'):
-        parts = mat.name.split('.')
-        lastpart = parts[len(parts)-1]
-        expected_name = mat.name[:]
-        if lastpart.isnumeric():
-            expected_name = mat.name[:-(len(lastpart)+1)]
-        mat.name = expected_name + '.' + str(idx).zfill(5)
-        idx += 1
-
-mat_list = [x.material.name for x in root.material_slots]
-remove_slots = []
-for s in root.material_slots:
-    parts = s.material.name.split('.')
+    bm.to_mesh(tmp_mesh)
+    bm.free()
+
+    return forge_common.read_triangles(tmp_mesh)
+
+def load_cached_object(cache_folder, key):
+    if cache_folder is None:
+        return None
+
+    path = os.path.join(cache_folder, key + ".npz")
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        # mark as recently used so the cache's eviction keeps it
+        os.utime(path)
+        with np.load(path, allow_pickle=False) as data:
+            return data["verts"], data["tris"], data["material_indices"], [str(x) for x in data["material_names"]]
+    except Exception as e:
+        print(f'failed to read cached geometry {path} {e}')
+        return None
+
+def store_cached_object(cache_folder, key, part):
+    if cache_folder is None:
+        return
+
+    verts, tris, material_indices, material_names = part
+    path = os.path.join(cache_folder, key + ".npz")
+    tmp_path = os.path.join(cache_folder, f'{key}.{os.getpid()}.tmp.npz')
+    np.savez(tmp_path, verts=verts, tris=tris, material_indices=material_indices, material_names=np.array(material_names, dtype=np.str_))
+    os.replace(tmp_path, path)
+
+def prune_cache(cache_folder, used_keys):
+    # drop geometry for objects that no longer exist
+    if cache_folder is None:
+        return
+
+    for filename in os.listdir(cache_folder):
+        if filename.endswith(".npz") and filename[:-4] not in used_keys:
+            os.remove(os.path.join(cache_folder, filename))
+
+# objects are sharded by which tile of sectors their center falls in
+SHARD_TILE_SIZE = forge_collision.SECTOR_SIZE * 16
+
+def get_shard_objects(objects, shard_index, shard_count):
+    # indices of the objects processed by one shard
+    # tiles go to shards largest first, each to the shard with the fewest faces so far
+    # every shard computes the same split so they don't need to talk to each other
+    tiles = {}
+    for i, ob in enumerate(objects):
+        center = forge_common.get_world_center(ob)
+        tile = (int(math.floor(center[0] / SHARD_TILE_SIZE)), int(math.floor(center[1] / SHARD_TILE_SIZE)))
+        tile_objects = tiles.setdefault(tile, [0, []])
+        tile_objects[0] += len(ob.data.polygons) + 1
+        tile_objects[1].append(i)
+
+    loads = [0] * shard_count
+    selected = []
+    for tile, (weight, indices) in sorted(tiles.items(), key=lambda x: (-x[1][0], x[0])):
+        shard = loads.index(min(loads))
+        loads[shard] += weight
+        if shard == shard_index:
+            selected += indices
+
+    return sorted(selected)
+
+def write_shard(filepath, parts, object_indices, used_keys):
+    # processed geometry of one shard's objects, merged by the final pass
+    def concat(values, shape, dtype):
+        return np.concatenate(values).astype(dtype) if len(values) > 0 else np.zeros(shape, dtype=dtype)
+
+    names = [name for part in parts for name in part[3]]
+    tmp_filepath = filepath + ".tmp.npz"
+    np.savez(tmp_filepath,
+             verts=concat([x[0] for x in parts], (0, 3), np.float32),
+             vert_counts=np.array([len(x[0]) for x in parts], dtype=np.int64),
+             tris=concat([x[1] for x in parts], (0, 3), np.int32),
+             tri_counts=np.array([len(x[1]) for x in parts], dtype=np.int64),
+             material_indices=concat([x[2] for x in parts], (0,), np.int32),
+             material_names=np.array(names, dtype=np.str_),
+             material_name_counts=np.array([len(x[3]) for x in parts], dtype=np.int64),
+             object_indices=np.array(object_indices, dtype=np.int64),
+             used_keys=np.array(sorted(used_keys), dtype=np.str_))
+    os.replace(tmp_filepath, filepath)
+
+def read_shards(filepaths):
+    # parts from every shard, back in the order they'd have been processed in one pass
+    indexed_parts = []
+    used_keys = set()
+    for filepath in filepaths:
+        with np.load(filepath, allow_pickle=False) as data:
+            vert_offsets = np.cumsum(data["vert_counts"]) - data["vert_counts"]
+            tri_offsets = np.cumsum(data["tri_counts"]) - data["tri_counts"]
+            name_offsets = np.cumsum(data["material_name_counts"]) - data["material_name_counts"]
+            verts, tris, material_indices, names = data["verts"], data["tris"], data["material_indices"], [str(x) for x in data["material_names"]]
+            for i, object_index in enumerate(data["object_indices"]):
+                indexed_parts.append((int(object_index), (
+                    verts[vert_offsets[i]:vert_offsets[i] + data["vert_counts"][i]],
+                    tris[tri_offsets[i]:tri_offsets[i] + data["tri_counts"][i]],
+                    material_indices[tri_offsets[i]:tri_offsets[i] + data["tri_counts"][i]],
+                    names[name_offsets[i]:name_offsets[i] + data["material_name_counts"][i]])))
+            used_keys.update(str(x) for x in data["used_keys"])
+
+    indexed_parts.sort(key=lambda x: x[0])
+    return [part for _, part in indexed_parts], used_keys
+
+def process_objects(objects, len_threshold, cache_folder):
+    # world space triangles of every object
+    # objects sharing a mesh are placed from a single local triangulation
+    # unless their transform stretches the mesh or makes edges long enough to need subdividing
+    # those are processed on their own, and only they are cached per object
+    parts = []
+    used_keys = set()
+    reused = 0
+    instanced = 0
+    unique_meshes = {}
+    tmp_mesh = bpy.data.meshes.new('tmpMesh')
+    with forge_common.stage("subdivide", counts=False) as stage:
+        for ob in objects:
+            me = ob.data
+            unique_mesh = unique_meshes.get(me.as_pointer())
+            if unique_mesh is None:
+                key, max_edge_length = get_mesh_info(me, len_threshold)
+                unique_mesh = { "key": key, "max_edge_length": max_edge_length, "triangles": None }
+                unique_meshes[me.as_pointer()] = unique_mesh
+
+            matrix = np.array(ob.matrix_world, dtype=np.float64)
+            scale = get_uniform_scale(matrix)
+            if scale is not None and unique_mesh["max_edge_length"] * scale <= len_threshold:
+                if unique_mesh["triangles"] is None:
+                    used_keys.add(unique_mesh["key"])
+                    cached = load_cached_object(cache_folder, unique_mesh["key"])
+                    if cached is None:
+                        unique_mesh["triangles"] = triangulate_mesh(me, tmp_mesh)
+                        store_cached_object(cache_folder, unique_mesh["key"], unique_mesh["triangles"] + ([],))
+                    else:
+                        unique_mesh["triangles"] = cached[:3]
+
+                parts.append(transform_triangles(unique_mesh["triangles"], matrix) + (get_material_names(ob),))
+                instanced += 1
+                continue
+
+            key = get_object_key(ob, unique_mesh["key"])
+            used_keys.add(key)
+            part = load_cached_object(cache_folder, key)
+            if part is None:
+                verts, tris, material_indices = process_object(ob, len_threshold, tmp_mesh)
+                part = (verts, tris, material_indices, get_material_names(ob))
+                store_cached_object(cache_folder, key, part)
+            else:
+                reused += 1
+
+            parts.append(part)
+
+        stage.update({ "objects": len(parts), "unique_meshes": len(unique_meshes), "instanced": instanced, "reused": reused })
+
+    bpy.data.meshes.remove(tmp_mesh)
+    print(f'{len(unique_meshes)} unique meshes, {instanced} of {len(parts)} objects instanced, {reused} reused')
+    return parts, used_keys
+
+def build_collision_mesh(mesh, parts):
+    # stitches every object's triangles into one mesh
+    # sharing a single material slot per material
+    slot_by_name = {}
+    verts_list = []
+    tris_list = []
+    material_indices_list = []
+    vert_offset = 0
+    for verts, tris, material_indices, material_names in parts:
+        slots = []
+        for name in material_names:
+            if name not in slot_by_name:
+                slot_by_name[name] = len(slot_by_name)
+            slots.append(slot_by_name[name])
+
+        slots = np.array(slots, dtype=np.int32)
+        verts_list.append(verts)
+        tris_list.append(tris + vert_offset)
+        material_indices_list.append(slots[np.clip(material_indices, 0, len(slots) - 1)])
+        vert_offset += len(verts)
+
+    # objects without materials don't need an empty slot
+    if list(slot_by_name.keys()) != [""]:
+        for name in slot_by_name.keys():
+            mesh.materials.append(bpy.data.materials.get(name) if name else None)
+
+    if len(parts) > 0:
+        forge_common.write_triangles(mesh, np.concatenate(verts_list), np.concatenate(tris_list), np.concatenate(material_indices_list))
+
+def get_collision_material_name(mat):
+    # col_XX.NNNNN => col_XX, anything else isn't a collision material
+    if mat is None or not mat.name.startswith('col_'):
+        return None
+
+    parts = mat.name.split('.')
     lastpart = parts[len(parts)-1]
-    if lastpart.isnumeric() and s.material.name.startswith('col_'):
-        expected_name = s.material.name[:-(len(lastpart)+1)]
+    if lastpart.isnumeric():
+        return mat.name[:-(len(lastpart)+1)]
+    return mat.name
+
+def merge_collision_materials(mesh):
+    # slots that are duplicates of the same collision material
+    # are remapped to the first slot that uses it
+    materials = mesh.materials[:]
+    if len(materials) == 0:
+        return
+
+    kept_materials = []
+    kept_names = []
+    slot_remap = {}
+    first_slot_by_name = {}
+    for i, mat in enumerate(materials):
+        expected_name = get_collision_material_name(mat)
+        if expected_name is not None and expected_name in first_slot_by_name:
+            slot_remap[i] = first_slot_by_name[expected_name]
+            continue
+
+        slot_remap[i] = len(kept_materials)
+        kept_materials.append(mat)
+        kept_names.append(expected_name)
+        if expected_name is not None:
+            first_slot_by_name[expected_name] = slot_remap[i]
+
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+
+    # clearing resets face material indices so they're written back after
+    mesh.materials.clear()
+    for mat, expected_name in zip(kept_materials, kept_names):
+        if expected_name is not None and mat.name != expected_name:
+            print(f'renaming {mat.name} => {expected_name}')
+            mat.name = expected_name
+        mesh.materials.append(mat)
+
+    lookup = np.array([slot_remap[i] for i in range(len(materials))], dtype=np.int32)
+    mesh.polygons.foreach_set("material_index", lookup[np.clip(material_indices, 0, len(materials) - 1)])
+    mesh.update()
+
+def validate_mesh(mesh):
+    verts = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", verts)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertex_indices)
+    return forge_collision.validate(verts, loop_starts, loop_totals, loop_vertex_indices)
+
+def run(argv):
+    C = bpy.context
 
-        # the last 3 characters are numbers
-        # that indicates it might be a duplicate of another material
-        # but this is pure guesswork, so expect errors to happen!
-        if expected_name in mat_list:
+    # enter object mode
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
 
-            # there is a material without the numeric extension so use it
-            # this again is just guessing that we're having identical node trees here
+    #Deselect all
+    bpy.ops.object.select_all(action='DESELECT')
 
-            # get the material index of the 'clean' material
-            index_clean = mat_list.index(expected_name)
-            index_wrong = mat_list.index(s.material.name)
+    # optional folder where processed geometry is kept between runs
+    argv, cache_folder = forge_common.pop_option(argv, "--cache")
+    if cache_folder is not None:
+        os.makedirs(cache_folder, exist_ok=True)
 
-            # get the faces which are assigned to the 'wrong' material
-            faces = [x for x in root.data.polygons if x.material_index == index_wrong]
+    # optional json file the validation results are written to
+    argv, report_filepath = forge_common.pop_option(argv, "--report")
 
-            for f in faces:
-                f.material_index = index_clean
+    # collision blend to append objects from, otherwise the open scene is used
+    # optionally only the objects in one of its collections
+    argv, blend_filepath = forge_common.pop_option(argv, "--blend")
+    argv, collection_name = forge_common.pop_option(argv, "--collection")
 
-            remove_slots.append(s.name)
-        else:
-            index = mat_list.index(s.material.name)
+    # sharded mode, each shard processes the objects in some tiles and writes them to --shard-out
+    # then a final pass given every shard file with --merge-shards builds and exports the collision
+    argv, shard = forge_common.pop_option(argv, "--shard")
+    argv, shard_filepath = forge_common.pop_option(argv, "--shard-out")
+    argv, merge_shards = forge_common.pop_option(argv, "--merge-shards")
 
-            print(f'renaming {s.material.name} => {expected_name}')
-            s.material.name = expected_name
-            mat_list[index] = expected_name
-            print(f'renamed {s.material.name}')
+    export_filepath = argv[0] if argv is not None and len(argv) > 0 else None
+    additional_imports = argv[1:]
+    area_threshold = 32*32
+    len_threshold = 32
 
-# now remove all empty material slots:
-for s in remove_slots:
-    if s in [x.name for x in root.material_slots]:
-        print('removing slot %s' % s)
-        root.active_material_index = [x.material.name for x in root.material_slots].index(s)
-        bpy.ops.object.material_slot_remove()
+    print(export_filepath)
+    forge_common.set_stage_context(file=blend_filepath or bpy.data.filepath, shard=shard)
 
-if export_filepath:
-    bpy.ops.wm.collada_export(filepath=export_filepath, check_existing=False, selected=True, triangulate=False)
+    if blend_filepath and merge_shards is None:
+        with forge_common.stage("load blend"):
+            forge_common.import_file(blend_filepath, collection_name=collection_name)
 
-#bpy.ops.wm.save_as_mainfile(filepath='C:/Users/dna11/OneDrive/Desktop/test.blend')
+    # imports
+    if additional_imports is not None and len(additional_imports) > 0 and merge_shards is None:
+        with forge_common.stage("import"):
+            for additional_import in additional_imports:
+                print(additional_import)
+
+                # import file
+                forge_common.import_file(additional_import)
+
+    if merge_shards is None:
+        idx = 0
+        all_objects = [x for x in C.scene.objects]
+        for obj in all_objects:
+            obj.name = str(idx)
+            idx += 1
+
+        # make sure world matrices include every parent's transform
+        C.view_layer.update()
+
+        objects = [ob for ob in all_objects if ob.type == 'MESH']
+        object_indices = list(range(len(objects)))
+        if shard is not None:
+            shard_index, shard_count = [int(x) for x in shard.split('/')]
+            object_indices = get_shard_objects(objects, shard_index, shard_count)
+
+        parts, used_keys = process_objects([objects[i] for i in object_indices], len_threshold, cache_folder)
+
+        # the final pass merges every shard and prunes the cache
+        if shard is not None:
+            write_shard(shard_filepath, parts, object_indices, used_keys)
+            return
+    else:
+        parts, used_keys = read_shards(merge_shards.split(';'))
+
+        # shards only carry material names
+        for name in { name for part in parts for name in part[3] }:
+            if name and bpy.data.materials.get(name) is None:
+                bpy.data.materials.new(name)
+
+    prune_cache(cache_folder, used_keys)
+
+    # create root
+    emptyMesh = bpy.data.meshes.new('emptyMesh')
+    root = bpy.data.objects.new("collision", emptyMesh)
+    root.location = (0,0,0)
+    C.collection.objects.link(root)
+    C.view_layer.objects.active = root
+    root.select_set(state=True)
+
+    # merge into single mesh
+    with forge_common.stage("join", counts=False) as stage:
+        build_collision_mesh(root.data, parts)
+        stage.update({ "vertices": len(root.data.vertices), "faces": len(root.data.polygons) })
+    bpy.ops.object.select_all(action='DESELECT')
+    C.view_layer.objects.active = root
+    root.select_set(state=True)
+
+    # merge and rename materials to expected collision materials
+    idx = 1
+    mats = bpy.data.materials[:]
+    for mat in mats:
+        expected_name = get_collision_material_name(mat)
+        if expected_name is not None:
+            mat.name = expected_name + '.' + str(idx).zfill(5)
+            idx += 1
+
+    with forge_common.stage("material merge", counts=False) as stage:
+        merge_collision_materials(root.data)
+        stage["materials"] = len(root.data.materials)
+
+    # catch anything the packer would reject before spending time on it
+    with forge_common.stage("validate", counts=False) as stage:
+        report = validate_mesh(root.data)
+        stage.update({ "vertices": report["vertices"], "faces": report["faces"], "sectors": report["sectors"] })
+    if report_filepath:
+        forge_collision.write_report(report, report_filepath)
+    for issue in report["issues"]:
+        print(f'{issue["severity"]}: {issue["reason"]} x{issue["count"]} {issue["positions"][:4]}')
+    if not report["ok"]:
+        bpy.data.objects.remove(root)
+        raise RuntimeError('Collision failed validation')
+
+    if export_filepath:
+        with forge_common.stage("export", counts=False):
+            verts, tris, material_indices = forge_common.read_triangles(root.data)
+            material_names = [x.name if x else "" for x in root.data.materials]
+            forge_collision.write_collada(export_filepath, verts, tris, material_indices, material_names)
+
+    #bpy.ops.wm.save_as_mainfile(filepath='C:/Users/dna11/OneDrive/Desktop/test.blend')
+
+    bpy.data.objects.remove(root)
+
+if __name__ == "__main__":
+    # test value
+    argv = forge_common.get_argv([ "M:/VS/wrench/bin/RelWithDebInfo/games/uya_scus_973_53/moby_classes/unsorted/6889/mesh.dae" ])
 
-bpy.data.objects.remove(root)
+    # scene is the collision blend passed to blender on the command line
+    run(argv)
 
-# success
-exit(1)
+    # success
+    exit(1)
@@ -0,0 +1,214 @@
+import json
+import numpy as np
+from xml.sax.saxutils import quoteattr
+
+# collision is packed into 4x4x4 sectors
+SECTOR_SIZE = 4
+
+# the packer indexes a sector's vertices and faces with a byte
+MAX_SECTOR_VERTICES = 255
+MAX_SECTOR_FACES = 255
+
+# faces with less area than this are treated as degenerate
+MIN_FACE_AREA = 1e-8
+
+# only the first few locations of each issue are reported
+MAX_REPORTED_LOCATIONS = 256
+
+def get_face_vertex_indices(loop_starts, loop_totals, loop_vertex_indices):
+    # vertex indices of every face, grouped by face, and the offset of each face's group
+    face_offsets = np.cumsum(loop_totals) - loop_totals
+    loop_indices = np.repeat(loop_starts - face_offsets, loop_totals) + np.arange(loop_totals.sum())
+    return loop_vertex_indices[loop_indices], face_offsets
+
+def get_face_sectors(verts, face_vertex_indices, face_offsets):
+    # every (face, sector) pair where the face's bounds overlap the sector
+    face_verts = verts[face_vertex_indices]
+    face_min = np.floor(np.minimum.reduceat(face_verts, face_offsets, axis=0) / SECTOR_SIZE).astype(np.int64)
+    face_max = np.floor(np.maximum.reduceat(face_verts, face_offsets, axis=0) / SECTOR_SIZE).astype(np.int64)
+    spans = face_max - face_min + 1
+    counts = spans.prod(axis=1)
+
+    faces = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    spans = spans[faces]
+    offsets = np.stack([local % spans[:, 0], (local // spans[:, 0]) % spans[:, 1], local // (spans[:, 0] * spans[:, 1])], axis=1)
+    return faces, face_min[faces] + offsets
+
+def sorted_unique(keys):
+    # np.unique without the extra bookkeeping, much faster on large integer arrays
+    keys = np.sort(keys)
+    return keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+
+def encode_sectors(sectors):
+    # packs sector coordinates into single integers so they sort quickly
+    origin = sectors.min(axis=0)
+    size = sectors.max(axis=0) - origin + 1
+    local = sectors - origin
+    return (local[:, 0] * size[1] + local[:, 1]) * size[2] + local[:, 2]
+
+def decode_sectors(keys, sectors):
+    origin = sectors.min(axis=0)
+    size = sectors.max(axis=0) - origin + 1
+    return np.stack([keys // (size[1] * size[2]), (keys // size[2]) % size[1], keys % size[2]], axis=1) + origin
+
+def get_locations(positions):
+    return [[round(float(x), 3) for x in p] for p in positions[:MAX_REPORTED_LOCATIONS]]
+
+def validate(verts, loop_starts, loop_totals, loop_vertex_indices):
+    # checks the final collision mesh for anything that would be dropped or rejected when packed
+    # positions are reported in collision space
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    loop_vertex_indices = np.asarray(loop_vertex_indices, dtype=np.int64)
+    issues = []
+
+    def add_issue(reason, severity, positions, **data):
+        if len(positions) == 0:
+            return
+
+        issue = { "reason": reason, "severity": severity, "count": len(positions), "positions": get_locations(positions) }
+        issue.update(data)
+        issues.append(issue)
+
+    # everything has to be in the positive quadrant
+    negative = np.any(verts < 0, axis=1)
+    add_issue("negative coordinates", "error", verts[negative])
+
+    valid_faces = loop_totals > 0
+    loop_starts = loop_starts[valid_faces]
+    loop_totals = loop_totals[valid_faces]
+    sectors = []
+    if len(loop_totals) > 0:
+        face_vertex_indices, face_offsets = get_face_vertex_indices(loop_starts, loop_totals, loop_vertex_indices)
+        face_centers = np.add.reduceat(verts[face_vertex_indices], face_offsets, axis=0) / loop_totals[:, None]
+
+        # only tris and quads can be packed
+        bad_size = (loop_totals < 3) | (loop_totals > 4)
+        add_issue("face is not a tri or quad", "error", face_centers[bad_size])
+
+        # area from the first triangle of each face, plus the second for quads
+        first = face_vertex_indices[face_offsets]
+        second = face_vertex_indices[face_offsets + np.minimum(1, loop_totals - 1)]
+        third = face_vertex_indices[face_offsets + np.minimum(2, loop_totals - 1)]
+        fourth = face_vertex_indices[face_offsets + np.minimum(3, loop_totals - 1)]
+        area = 0.5 * np.linalg.norm(np.cross(verts[second] - verts[first], verts[third] - verts[first]), axis=1)
+        area += np.where(loop_totals == 4, 0.5 * np.linalg.norm(np.cross(verts[third] - verts[first], verts[fourth] - verts[first]), axis=1), 0)
+
+        # repeated vertices within a face
+        face_ids = np.repeat(np.arange(len(loop_totals)), loop_totals)
+        pairs = sorted_unique(face_ids * len(verts) + face_vertex_indices)
+        unique_per_face = np.bincount(pairs // len(verts), minlength=len(loop_totals))
+        repeated = unique_per_face < loop_totals
+
+        add_issue("degenerate face", "warning", face_centers[repeated])
+        add_issue("zero area face", "warning", face_centers[~repeated & ~bad_size & (area < MIN_FACE_AREA)])
+
+        # faces and vertices per sector
+        faces, face_sectors = get_face_sectors(verts, face_vertex_indices, face_offsets)
+        sector_keys, sector_inverse, face_counts = np.unique(encode_sectors(face_sectors), return_inverse=True, return_counts=True)
+        sector_keys = decode_sectors(sector_keys, face_sectors)
+
+        sector_loops = np.repeat(sector_inverse, loop_totals[faces])
+        face_loop_offsets = np.repeat(face_offsets[faces], loop_totals[faces])
+        face_loop_local = np.arange(len(sector_loops)) - np.repeat(np.cumsum(loop_totals[faces]) - loop_totals[faces], loop_totals[faces])
+        sector_vertices = sorted_unique(sector_loops * len(verts) + face_vertex_indices[face_loop_offsets + face_loop_local])
+        vertex_counts = np.bincount(sector_vertices // len(verts), minlength=len(sector_keys))
+
+        # sectors are found from face bounds, not the way wrench splits faces, so this can flag sectors that pack fine
+        # wrench only drops an overflowing sector with a warning so it doesn't stop the bake either
+        overflow = (face_counts > MAX_SECTOR_FACES) | (vertex_counts > MAX_SECTOR_VERTICES)
+        add_issue("too many faces or vertices in sector", "warning", (sector_keys[overflow] + 0.5) * SECTOR_SIZE,
+                  sectors=[{ "sector": [int(x) for x in key], "faces": int(f), "vertices": int(v) }
+                           for key, f, v in list(zip(sector_keys[overflow], face_counts[overflow], vertex_counts[overflow]))[:MAX_REPORTED_LOCATIONS]])
+
+        sectors = face_counts
+
+    return {
+        "ok": not any(x["severity"] == "error" for x in issues),
+        "vertices": len(verts),
+        "faces": len(loop_totals),
+        "sectors": len(sectors),
+        "max_sector_faces": int(np.max(sectors)) if len(sectors) > 0 else 0,
+        "issues": issues,
+    }
+
+def write_report(report, filepath):
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def write_rows(f, values, fmt, chunk_rows=65536):
+    # formats a chunk of rows per write, much faster than np.savetxt's per row formatting
+    # and only one chunk of text is in memory at a time
+    row_fmt = " ".join([fmt] * values.shape[1]) + "\n"
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        f.write((row_fmt * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+def write_collada(filepath, verts, tris, material_indices, material_names, name="collision"):
+    # minimal collada with just what the collision packer reads
+    # geometry is streamed straight from the arrays, one triangles block per material
+    verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+    tris = np.asarray(tris, dtype=np.int64).reshape(-1, 3)
+    material_indices = np.clip(np.asarray(material_indices, dtype=np.int64), 0, max(0, len(material_names) - 1))
+    materials = [x for x in dict.fromkeys(material_names) if x]
+
+    with open(filepath, "w", encoding="utf-8", newline="\n") as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        f.write('<COLLADA xmlns="http://www.collada.org/2005/11/COLLADASchema" version="1.4.1">\n')
+        f.write('  <asset>\n    <unit name="meter" meter="1"/>\n    <up_axis>Z_UP</up_axis>\n  </asset>\n')
+
+        f.write('  <library_effects>\n')
+        for material in materials:
+            f.write(f'    <effect id={quoteattr(material + "-effect")}>\n')
+            f.write('      <profile_COMMON>\n        <technique sid="common">\n          <lambert>\n')
+            f.write('            <diffuse><color sid="diffuse">0.8 0.8 0.8 1</color></diffuse>\n')
+            f.write('          </lambert>\n        </technique>\n      </profile_COMMON>\n    </effect>\n')
+        f.write('  </library_effects>\n')
+
+        f.write('  <library_materials>\n')
+        for material in materials:
+            f.write(f'    <material id={quoteattr(material)} name={quoteattr(material)}>\n')
+            f.write(f'      <instance_effect url={quoteattr("#" + material + "-effect")}/>\n    </material>\n')
+        f.write('  </library_materials>\n')
+
+        mesh_id = name + "-mesh"
+        f.write('  <library_geometries>\n')
+        f.write(f'    <geometry id={quoteattr(mesh_id)} name={quoteattr(name)}>\n      <mesh>\n')
+        f.write(f'        <source id={quoteattr(mesh_id + "-positions")}>\n')
+        f.write(f'          <float_array id={quoteattr(mesh_id + "-positions-array")} count="{verts.size}">\n')
+        write_rows(f, verts, "%.9g")
+        f.write('          </float_array>\n')
+        f.write('          <technique_common>\n')
+        f.write(f'            <accessor source={quoteattr("#" + mesh_id + "-positions-array")} count="{len(verts)}" stride="3">\n')
+        f.write('              <param name="X" type="float"/>\n              <param name="Y" type="float"/>\n              <param name="Z" type="float"/>\n')
+        f.write('            </accessor>\n          </technique_common>\n        </source>\n')
+        f.write(f'        <vertices id={quoteattr(mesh_id + "-vertices")}>\n')
+        f.write(f'          <input semantic="POSITION" source={quoteattr("#" + mesh_id + "-positions")}/>\n        </vertices>\n')
+
+        # group triangles by material
+        order = np.argsort(material_indices, kind="stable")
+        groups = np.split(order, np.flatnonzero(np.diff(material_indices[order])) + 1) if len(order) > 0 else []
+        for group in groups:
+            material = material_names[material_indices[group[0]]] if len(material_names) > 0 else ""
+            material_attr = f' material={quoteattr(material)}' if material else ""
+            f.write(f'        <triangles{material_attr} count="{len(group)}">\n')
+            f.write(f'          <input semantic="VERTEX" source={quoteattr("#" + mesh_id + "-vertices")} offset="0"/>\n')
+            f.write('          <p>\n')
+            write_rows(f, tris[group], "%d")
+            f.write('          </p>\n        </triangles>\n')
+
+        f.write('      </mesh>\n    </geometry>\n  </library_geometries>\n')
+
+        f.write('  <library_visual_scenes>\n    <visual_scene id="Scene" name="Scene">\n')
+        f.write(f'      <node id={quoteattr(name)} name={quoteattr(name)} type="NODE">\n')
+        f.write('        <matrix sid="transform">1 0 0 0 0 1 0 0 0 0 1 0 0 0 0 1</matrix>\n')
+        f.write(f'        <instance_geometry url={quoteattr("#" + mesh_id)} name={quoteattr(name)}>\n')
+        if len(materials) > 0:
+            f.write('          <bind_material>\n            <technique_common>\n')
+            for material in materials:
+                f.write(f'              <instance_material symbol={quoteattr(material)} target={quoteattr("#" + material)}/>\n')
+            f.write('            </technique_common>\n          </bind_material>\n')
+        f.write('        </instance_geometry>\n      </node>\n    </visual_scene>\n  </library_visual_scenes>\n')
+        f.write('  <scene>\n    <instance_visual_scene url="#Scene"/>\n  </scene>\n</COLLADA>\n')
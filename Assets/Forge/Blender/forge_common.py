@@ -0,0 +1,402 @@
+import sys
+import os
+import json
+import time
+import contextlib
+import importlib.util
+import numpy as np
+import bpy
+import bmesh
+
+# prefix for machine readable lines written to stdout
+# everything else blender prints is treated as log output
+MESSAGE_PREFIX = "@forge "
+
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+_loaded_scripts = {}
+
+# extra fields added to every stage message, like the file being converted
+_stage_context = {}
+
+# stage messages are also kept here while record_stages is active
+_stage_records = None
+
+def get_argv(test_argv):
+    argv = sys.argv
+    try:
+        return argv[argv.index("--") + 1:]  # get all args after "--"
+    except ValueError:
+        return test_argv
+
+def pop_option(argv, name):
+    # removes "name value" from argv and returns the value
+    if argv is None or name not in argv:
+        return argv, None
+
+    i = argv.index(name)
+    return argv[:i] + argv[i+2:], argv[i + 1]
+
+def emit(event, **data):
+    data["event"] = event
+    print(MESSAGE_PREFIX + json.dumps(data), flush=True)
+
+def set_stage_context(**context):
+    _stage_context.clear()
+    _stage_context.update(context)
+
+def get_rss():
+    # current working set of this process in bytes, or None if it can't be read
+    # the peak isn't used, in the persistent worker it only ever grows across jobs
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+            if get_process_memory_info(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+
+        # resident pages are the second field
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+def get_scene_counts():
+    meshes = get_scene_meshes()
+    return { "vertices": sum(len(me.vertices) for me in meshes), "faces": sum(len(me.polygons) for me in meshes) }
+
+@contextlib.contextmanager
+def stage(name, counts=True):
+    # times a named step of a script and emits it as a stage message
+    # fields added to the yielded dict are included, scene vertex and face counts are added after the step
+    start = time.perf_counter()
+    start_rss = get_rss()
+    data = {}
+    try:
+        yield data
+    finally:
+        rss = get_rss()
+        message = dict(_stage_context)
+        message.update({ "stage": name, "elapsed": time.perf_counter() - start, "rss": rss,
+                         "rss_delta": rss - start_rss if rss is not None and start_rss is not None else None })
+        if counts:
+            message.update(get_scene_counts())
+        message.update(data)
+        emit("stage", **message)
+        if _stage_records is not None:
+            _stage_records.append(message)
+
+@contextlib.contextmanager
+def record_stages():
+    # collects every stage message emitted inside the block
+    global _stage_records
+    previous = _stage_records
+    _stage_records = []
+    try:
+        yield _stage_records
+    finally:
+        _stage_records = previous
+
+def reset_scene():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+def append_blend(filepath, object_names=None, collection_name=None):
+    # appends objects from a .blend into the current scene instead of opening the whole file
+    # only the objects and what they use (meshes, materials, parents) are read,
+    # unrelated objects, worlds, scenes and the images they reference are skipped
+    with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+        if collection_name is not None:
+            if collection_name not in data_from.collections:
+                raise RuntimeError(f'{filepath} has no collection {collection_name}')
+            data_to.collections = [collection_name]
+        elif object_names is not None:
+            data_to.objects = [x for x in data_from.objects if x in object_names]
+        else:
+            data_to.objects = list(data_from.objects)
+
+    scene_collection = bpy.context.scene.collection
+    for collection in data_to.collections:
+        if collection is not None:
+            scene_collection.children.link(collection)
+
+    for ob in data_to.objects:
+        if ob is not None and ob.name not in scene_collection.objects:
+            scene_collection.objects.link(ob)
+
+    # opening the file would have restored an active object, operators that poll for one expect it
+    view_layer = bpy.context.view_layer
+    if view_layer.objects.active is None and len(view_layer.objects) > 0:
+        view_layer.objects.active = view_layer.objects[0]
+
+def import_file(filepath, object_names=None, collection_name=None):
+    ext = os.path.splitext(filepath)[1]
+
+    if ext == ".dae":
+        bpy.ops.wm.collada_import(filepath = filepath,
+                              auto_connect = False,
+                              find_chains = False,
+                              fix_orientation = False)
+
+    elif ext == ".blend":
+        append_blend(filepath, object_names, collection_name)
+
+    elif ext == ".glb" or ext == ".gltf":
+        bpy.ops.import_scene.gltf(filepath = filepath)
+
+    elif ext == ".fbx":
+        bpy.ops.import_scene.fbx(filepath = filepath)
+
+def get_world_center(ob):
+    # center of an object's world space bounds
+    matrix = np.array(ob.matrix_world, dtype=np.float64)
+    corners = np.array(ob.bound_box, dtype=np.float64) @ matrix[:3, :3].T + matrix[:3, 3]
+    return (corners.min(axis=0) + corners.max(axis=0)) * 0.5
+
+def get_scene_meshes():
+    # each mesh once, even when shared by several objects
+    return { obj.data for obj in bpy.context.scene.objects if obj.type == 'MESH' }
+
+def merge_by_distance(mesh, distance, recalc_normals=False):
+    # same as edit mode merge by distance and recalculate outside
+    # without needing the mesh to be selected or active
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.remove_doubles(bm, verts=bm.verts[:], dist=distance)
+    if recalc_normals:
+        bmesh.ops.recalc_face_normals(bm, faces=bm.faces[:])
+    bm.to_mesh(mesh)
+    bm.free()
+
+    # reset custom normals so shading follows the recalculated faces
+    if recalc_normals and mesh.has_custom_normals:
+        mesh.normals_split_custom_set([(0, 0, 0)] * len(mesh.loops))
+
+    mesh.update()
+
+def read_triangles(mesh):
+    # vertex positions, triangle vertex indices and material index per triangle
+    # of an already triangulated mesh
+    verts = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", verts)
+    tris = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", tris)
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+    return verts.reshape(-1, 3), tris.reshape(-1, 3), material_indices
+
+def write_triangles(mesh, verts, tris, material_indices):
+    # fills an empty mesh from triangle arrays
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(verts, dtype=np.float32).ravel())
+    mesh.loops.add(len(tris) * 3)
+    mesh.loops.foreach_set("vertex_index", np.ascontiguousarray(tris, dtype=np.int32).ravel())
+    mesh.polygons.add(len(tris))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(tris) * 3, 3, dtype=np.int32))
+    # newer versions derive loop_total from loop_start
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", np.full(len(tris), 3, dtype=np.int32))
+    mesh.polygons.foreach_set("material_index", np.ascontiguousarray(material_indices, dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+def get_face_loop_indices(loop_starts, loop_totals):
+    # index of every loop, grouped by face
+    face_offsets = np.cumsum(loop_totals) - loop_totals
+    return np.repeat(loop_starts - face_offsets, loop_totals) + np.arange(loop_totals.sum()), face_offsets
+
+# components per element of each attribute type that can be copied between meshes
+ATTRIBUTE_COMPONENTS = { "FLOAT": 1, "INT": 1, "BOOLEAN": 1, "INT8": 1, "FLOAT2": 2, "INT32_2D": 2, "FLOAT_VECTOR": 3, "FLOAT_COLOR": 4, "BYTE_COLOR": 4, "QUATERNION": 4, "FLOAT4X4": 16 }
+
+def get_attribute_array(attribute, count):
+    data_type = attribute.data_type
+    if data_type in ("FLOAT_VECTOR", "FLOAT2"):
+        prop = "vector"
+    elif data_type in ("FLOAT_COLOR", "BYTE_COLOR"):
+        prop = "color"
+    else:
+        prop = "value"
+
+    dtype = bool if data_type == "BOOLEAN" else np.int32 if data_type in ("INT", "INT8", "INT32_2D") else np.float32
+    values = np.empty(count * ATTRIBUTE_COMPONENTS[data_type], dtype=dtype)
+    if count > 0:
+        attribute.data.foreach_get(prop, values)
+    return prop, values.reshape(count, -1)
+
+def read_corner_normals(mesh):
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    if hasattr(mesh, "corner_normals"):
+        mesh.corner_normals.foreach_get("vector", normals)
+    else:
+        mesh.calc_normals_split()
+        mesh.loops.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+def read_mesh_data(mesh, normals=False):
+    # every per vertex, face and face corner value of a mesh as arrays
+    # so meshes can be cut up and rebuilt without edit mode
+    data = {}
+    data["verts"] = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", data["verts"])
+    data["verts"] = data["verts"].reshape(-1, 3)
+    for collection, attr in ((mesh.loops, "vertex_index"), (mesh.polygons, "loop_start"), (mesh.polygons, "loop_total"), (mesh.polygons, "material_index")):
+        values = np.empty(len(collection), dtype=np.int64)
+        collection.foreach_get(attr, values)
+        data[attr] = values
+
+    data["uv_layers"] = {}
+    for uv_layer in mesh.uv_layers:
+        uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uvs)
+        data["uv_layers"][uv_layer.name] = uvs.reshape(-1, 2)
+
+    # generic attributes like vertex colors, edges are rebuilt so their attributes are dropped
+    data["attributes"] = {}
+    counts = { "POINT": len(mesh.vertices), "FACE": len(mesh.polygons), "CORNER": len(mesh.loops) }
+    for attribute in mesh.attributes:
+        if attribute.name.startswith(".") or attribute.name in ("position", "material_index") or attribute.name in data["uv_layers"]:
+            continue
+        if attribute.domain not in counts or attribute.data_type not in ATTRIBUTE_COMPONENTS:
+            continue
+        prop, values = get_attribute_array(attribute, counts[attribute.domain])
+        data["attributes"][attribute.name] = (attribute.domain, attribute.data_type, prop, values)
+
+    data["normals"] = read_corner_normals(mesh) if normals else None
+    return data
+
+def build_mesh_from_parts(name, parts, materials):
+    # builds one mesh from faces of several meshes
+    # parts are (mesh data, face indices, material slot lookup) with mesh data from read_mesh_data
+    # values a part doesn't have, like a missing uv layer, are filled with zeros
+    verts_list, loop_vertex_list, loop_total_list, material_list = [], [], [], []
+    selections = []
+    vert_offset = 0
+    for data, faces, slot_lookup in parts:
+        loop_totals = data["loop_total"][faces]
+        loop_indices, _ = get_face_loop_indices(data["loop_start"][faces], loop_totals)
+        used_verts, loop_vertex_indices = np.unique(data["vertex_index"][loop_indices], return_inverse=True)
+
+        verts_list.append(data["verts"][used_verts])
+        loop_vertex_list.append(loop_vertex_indices.reshape(-1) + vert_offset)
+        loop_total_list.append(loop_totals)
+        material_list.append(slot_lookup[np.clip(data["material_index"][faces], 0, len(slot_lookup) - 1)])
+        selections.append({ "POINT": used_verts, "FACE": faces, "CORNER": loop_indices })
+        vert_offset += len(used_verts)
+
+    loop_totals = np.concatenate(loop_total_list) if parts else np.zeros(0, dtype=np.int64)
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(vert_offset)
+    if parts:
+        mesh.vertices.foreach_set("co", np.concatenate(verts_list).ravel())
+    mesh.loops.add(int(loop_totals.sum()))
+    if parts:
+        mesh.loops.foreach_set("vertex_index", np.concatenate(loop_vertex_list).astype(np.int32))
+    mesh.polygons.add(len(loop_totals))
+    mesh.polygons.foreach_set("loop_start", (np.cumsum(loop_totals) - loop_totals).astype(np.int32))
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", loop_totals.astype(np.int32))
+    if parts:
+        mesh.polygons.foreach_set("material_index", np.concatenate(material_list).astype(np.int32))
+    for material in materials:
+        mesh.materials.append(material)
+
+    def gather(get_values, domain, components, dtype):
+        # one domain's values from every part, zeros where a part has none
+        values = []
+        for (data, _, _), selection in zip(parts, selections):
+            part_values = get_values(data)
+            if part_values is None:
+                part_values = np.zeros((len(selection[domain]), components), dtype=dtype)
+            else:
+                part_values = part_values[selection[domain]]
+            values.append(part_values.reshape(len(selection[domain]), -1))
+        return np.concatenate(values) if values else np.zeros((0, components), dtype=dtype)
+
+    uv_names = list(dict.fromkeys(name for data, _, _ in parts for name in data["uv_layers"]))
+    for uv_name in uv_names:
+        uv_layer = mesh.uv_layers.new(name=uv_name)
+        uv_layer.data.foreach_set("uv", gather(lambda data: data["uv_layers"].get(uv_name), "CORNER", 2, np.float32).ravel())
+
+    attributes = {}
+    for data, _, _ in parts:
+        for attribute_name, (domain, data_type, prop, values) in data["attributes"].items():
+            attributes.setdefault(attribute_name, (domain, data_type, prop, values.shape[1], values.dtype))
+    for attribute_name, (domain, data_type, prop, components, dtype) in attributes.items():
+        def get_values(data):
+            attribute = data["attributes"].get(attribute_name)
+            return attribute[3] if attribute is not None and attribute[:2] == (domain, data_type) else None
+        attribute = mesh.attributes.get(attribute_name) or mesh.attributes.new(attribute_name, data_type, domain)
+        if len(attribute.data) > 0:
+            attribute.data.foreach_set(prop, gather(get_values, domain, components, dtype).ravel())
+
+    mesh.update(calc_edges=True)
+
+    if parts and any(data["normals"] is not None for data, _, _ in parts):
+        if hasattr(mesh, "use_auto_smooth"):
+            mesh.use_auto_smooth = True
+        mesh.normals_split_custom_set(gather(lambda data: data["normals"], "CORNER", 3, np.float32).tolist())
+
+    return mesh
+
+def wrap_uvs(mesh):
+    # moves each face's uvs by whole units until its average uv is within [0,1]
+    uv_layer = mesh.uv_layers.active
+    if uv_layer is None or len(uv_layer.data) == 0:
+        return
+
+    uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+    uv_layer.data.foreach_get("uv", uvs)
+    uvs = uvs.reshape(-1, 2)
+
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int64)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_starts = loop_starts[loop_totals > 0]
+    loop_totals = loop_totals[loop_totals > 0]
+
+    # step out of range faces one unit at a time so the float32 result
+    # matches stepping each face individually, only faces still out of range are revisited
+    changed = False
+    while len(loop_totals) > 0:
+        loop_indices, face_offsets = get_face_loop_indices(loop_starts, loop_totals)
+        avg = np.add.reduceat(uvs[loop_indices].astype(np.float64), face_offsets, axis=0) / loop_totals[:, None]
+        step = np.where(avg > 1, -1, np.where(avg < 0, 1, 0)).astype(np.float32)
+
+        out_of_range = np.any(step != 0, axis=1)
+        if not out_of_range.any():
+            break
+
+        loop_starts = loop_starts[out_of_range]
+        loop_totals = loop_totals[out_of_range]
+        loop_indices, _ = get_face_loop_indices(loop_starts, loop_totals)
+        uvs[loop_indices] += np.repeat(step[out_of_range], loop_totals, axis=0)
+        changed = True
+
+    if changed:
+        uv_layer.data.foreach_set("uv", uvs.ravel())
+        mesh.update()
+
+def load_script(script_name):
+    # scripts are named with dashes so they can't be imported normally
+    module = _loaded_scripts.get(script_name)
+    if module is None:
+        path = os.path.join(SCRIPT_FOLDER, script_name)
+        module_name = os.path.splitext(script_name)[0].replace("-", "_")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_scripts[script_name] = module
+
+    return module
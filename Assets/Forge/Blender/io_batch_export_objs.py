@@ -20,7 +20,7 @@
 bl_info = {
     "name": "OBJ Batch Export",
     "author": "p2or, brockmann, trippeljojo",
-    "version": (0, 3),
+    "version": (0, 4),
     "blender": (3, 1, 0),
     "location": "File > Import-Export",
     "description": "Export multiple OBJ files, their UVs and Materials",
@@ -32,7 +32,11 @@ bl_info = {
 
 import bpy
 import os
-from bpy_extras.io_utils import ExportHelper
+import json
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from bpy_extras.io_utils import ExportHelper, axis_conversion
 
 from bpy.props import (BoolProperty,
                        IntProperty,
@@ -43,6 +47,187 @@ from bpy.props import (BoolProperty,
                        )
 
 
+# hashes of the last fast export to each folder, to skip objects that haven't changed
+HASH_FILE_NAME = ".batch_obj_hashes.json"
+
+# rows formatted per write, keeps memory flat on huge meshes
+CHUNK_ROWS = 65536
+
+
+def read_corner_normals(mesh):
+    if hasattr(mesh, "corner_normals"):
+        normals = np.empty(len(mesh.corner_normals) * 3, dtype=np.float32)
+        mesh.corner_normals.foreach_get("vector", normals)
+    else:
+        mesh.calc_normals_split()
+        normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+        mesh.loops.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+
+def read_object(obj, depsgraph, space_matrix, write_uvs, write_normals, triangulate):
+    """Evaluated geometry of an object as arrays in export space"""
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        matrix = np.array(space_matrix @ obj_eval.matrix_world, dtype=np.float64)
+        verts = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", verts)
+        verts = verts.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+        # corners of every face in order
+        if triangulate:
+            if hasattr(mesh, "calc_loop_triangles"):
+                mesh.calc_loop_triangles()
+            loops = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int64)
+            mesh.loop_triangles.foreach_get("loops", loops)
+            face_sizes = np.full(len(mesh.loop_triangles), 3, dtype=np.int64)
+            material_indices = np.empty(len(mesh.loop_triangles), dtype=np.int64)
+            mesh.loop_triangles.foreach_get("material_index", material_indices)
+        else:
+            loop_starts = np.empty(len(mesh.polygons), dtype=np.int64)
+            face_sizes = np.empty(len(mesh.polygons), dtype=np.int64)
+            material_indices = np.empty(len(mesh.polygons), dtype=np.int64)
+            mesh.polygons.foreach_get("loop_start", loop_starts)
+            mesh.polygons.foreach_get("loop_total", face_sizes)
+            mesh.polygons.foreach_get("material_index", material_indices)
+            face_offsets = np.cumsum(face_sizes) - face_sizes
+            loops = np.repeat(loop_starts - face_offsets, face_sizes) + np.arange(face_sizes.sum())
+
+        # mirrored objects would come out inside out, so reverse each face's
+        # corners keeping the first one, like the obj exporter does
+        mirrored = bool(np.linalg.det(matrix[:3, :3]) < 0)
+        if mirrored:
+            face_offsets = np.repeat(np.cumsum(face_sizes) - face_sizes, face_sizes)
+            corner = np.arange(len(loops)) - face_offsets
+            loops = loops[face_offsets + np.where(corner == 0, 0, np.repeat(face_sizes, face_sizes) - corner)]
+
+        vertex_indices = np.empty(len(mesh.loops), dtype=np.int64)
+        mesh.loops.foreach_get("vertex_index", vertex_indices)
+
+        uvs = None
+        if write_uvs and mesh.uv_layers.active is not None:
+            uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+            mesh.uv_layers.active.data.foreach_get("uv", uvs)
+            uvs = uvs.reshape(-1, 2)[loops]
+
+        normals = None
+        if write_normals:
+            normals = read_corner_normals(mesh)[loops] @ np.linalg.inv(matrix[:3, :3])
+            normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+
+        return {
+            "verts": verts,
+            "corners": vertex_indices[loops],
+            "uvs": uvs,
+            "normals": normals,
+            "face_sizes": face_sizes,
+            "material_indices": material_indices,
+            "materials": [m.name if m else None for m in mesh.materials],
+            "mirrored": mirrored,
+        }
+    finally:
+        obj_eval.to_mesh_clear()
+
+
+def get_geometry_hash(name, geometry, options):
+    sha = hashlib.sha256()
+    sha.update(repr((name, options, geometry["materials"], geometry["mirrored"])).encode("utf-8"))
+    for key in ("verts", "corners", "uvs", "normals", "face_sizes", "material_indices"):
+        if geometry[key] is not None:
+            sha.update(np.ascontiguousarray(geometry[key]).tobytes())
+    return sha.hexdigest()
+
+
+def write_rows(f, values, fmt):
+    """Formats a chunk of rows per write instead of one row at a time"""
+    for start in range(0, len(values), CHUNK_ROWS):
+        chunk = values[start:start + CHUNK_ROWS]
+        f.write((fmt * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def write_obj(file_path, name, geometry, mtl_name, group_by_object, group_by_material):
+    """Writes one object's arrays as obj text, runs on the writer threads"""
+    uvs, normals = geometry["uvs"], geometry["normals"]
+    corners = [geometry["corners"] + 1]
+    corner_fmt = "%d"
+    if uvs is not None:
+        uvs, uv_indices = np.unique(np.round(uvs, 6), axis=0, return_inverse=True)
+        corners.append(uv_indices.reshape(-1) + 1)
+        corner_fmt += "/%d"
+    if normals is not None:
+        normals, normal_indices = np.unique(np.round(normals, 4), axis=0, return_inverse=True)
+        corners.append(normal_indices.reshape(-1) + 1)
+        corner_fmt += "//%d" if uvs is None else "/%d"
+    corners = np.stack(corners, axis=1)
+
+    # faces grouped by material then size so each group is formatted in one go
+    face_sizes = geometry["face_sizes"]
+    face_offsets = np.cumsum(face_sizes) - face_sizes
+    material_indices = np.clip(geometry["material_indices"], 0, max(0, len(geometry["materials"]) - 1))
+    order = np.lexsort((face_sizes, material_indices))
+
+    with open(file_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("# Blender OBJ batch export\n")
+        if mtl_name:
+            f.write("mtllib {}\n".format(mtl_name))
+        f.write("{} {}\n".format("g" if group_by_object else "o", name))
+        write_rows(f, geometry["verts"], "v %.6f %.6f %.6f\n")
+        if uvs is not None:
+            write_rows(f, uvs, "vt %.6f %.6f\n")
+        if normals is not None:
+            write_rows(f, normals, "vn %.4f %.4f %.4f\n")
+        f.write("s 0\n")
+
+        if len(order) == 0:
+            return
+        groups = np.split(order, np.flatnonzero(np.diff(material_indices[order]) | np.diff(face_sizes[order])) + 1)
+        material = -1
+        for group in groups:
+            if material_indices[group[0]] != material:
+                material = material_indices[group[0]]
+                material_name = geometry["materials"][material] if len(geometry["materials"]) > 0 else None
+                if group_by_material and material_name:
+                    f.write("g {}_{}\n".format(name, material_name))
+                if mtl_name and material_name:
+                    f.write("usemtl {}\n".format(material_name))
+
+            size = face_sizes[group[0]]
+            group_corners = corners[(face_offsets[group][:, None] + np.arange(size)).ravel()]
+            write_rows(f, group_corners.reshape(len(group), -1), "f" + (" " + corner_fmt) * size + "\n")
+
+
+def get_mtl_text(materials, folder_path):
+    """One shared mtl with every exported material, read from bpy so it runs on the main thread"""
+    lines = ["# Blender MTL batch export\n"]
+    for mat in materials:
+        color = mat.diffuse_color
+        lines.append("\nnewmtl {}\n".format(mat.name))
+        lines.append("Kd {:.6f} {:.6f} {:.6f}\n".format(color[0], color[1], color[2]))
+        lines.append("d {:.6f}\n".format(color[3]))
+
+        # base color texture of the principled bsdf, if there is one
+        if mat.use_nodes and mat.node_tree:
+            for node in mat.node_tree.nodes:
+                if node.type != 'BSDF_PRINCIPLED' or not node.inputs["Base Color"].is_linked:
+                    continue
+                image_node = node.inputs["Base Color"].links[0].from_node
+                if image_node.type == 'TEX_IMAGE' and image_node.image:
+                    image_path = bpy.path.abspath(image_node.image.filepath)
+                    try:
+                        image_path = os.path.relpath(image_path, folder_path)
+                    except ValueError:
+                        pass
+                    lines.append("map_Kd {}\n".format(image_path.replace("\\", "/")))
+                break
+    return "".join(lines)
+
+
+def write_text(file_path, text):
+    with open(file_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+
+
 class WM_OT_batchExportObjs(bpy.types.Operator, ExportHelper):
     """Batch export the scene to separate obj files"""
     bl_idname = "export_scene.batch_obj"
@@ -147,6 +332,24 @@ class WM_OT_batchExportObjs(bpy.types.Operator, ExportHelper):
                         "(produces at most 32 different smooth groups, usually much less)",
             default=False)
 
+    # Fast Export
+    fast_export: BoolProperty(
+            name="Fast Export",
+            description="Evaluate the scene once and write the files on several threads, formatting still runs one object at a time. "
+                        "Falls back to the obj exporter for render evaluation, nurbs, polygroups and smooth groups",
+            default=True)
+
+    skip_unchanged: BoolProperty(
+            name="Skip Unchanged",
+            description="Don't rewrite objects whose geometry matches the last fast export to this folder",
+            default=True)
+
+    thread_count: IntProperty(
+            name="Threads",
+            description="Writer threads, 0 uses one per core",
+            min=0, max=256,
+            default=0)
+
     def execute(self, context):                
         # Get the current folder
         folder_path = os.path.dirname(self.filepath)
@@ -156,6 +359,11 @@ class WM_OT_batchExportObjs(bpy.types.Operator, ExportHelper):
         if self.selection_only == False:
             candidates = [o for o in context.scene.objects]
 
+        if self.fast_export and self.eval_mode == 'DAG_EVAL_VIEWPORT' and not (
+                self.write_nurbs or self.group_by_vertex or self.smoothing_groups):
+            self.export_fast(context, folder_path, [o for o in candidates if o.type == 'MESH'])
+            return {'FINISHED'}
+
         # Deselect all objects
         bpy.ops.object.select_all(action='DESELECT')
         
@@ -193,6 +401,62 @@ class WM_OT_batchExportObjs(bpy.types.Operator, ExportHelper):
             
         return {'FINISHED'}
 
+    def export_fast(self, context, folder_path, objects):
+        # Evaluate once, then read each object's arrays here while the
+        # previous objects are formatted and written on the pool.
+        # Formatting holds the GIL so only reading, hashing and file writes
+        # overlap, it doesn't scale with cores
+        depsgraph = context.evaluated_depsgraph_get()
+        space_matrix = axis_conversion(to_forward=self.axis_forward, to_up=self.axis_up).to_4x4() * self.scale_factor
+        space_matrix[3][3] = 1.0
+        options = (self.axis_forward, self.axis_up, self.scale_factor, self.write_uvs, self.write_normals,
+                   self.write_materials, self.triangulate_faces, self.group_by_object, self.group_by_material)
+
+        mtl_name = None
+        if self.write_materials:
+            mtl_name = "{}.mtl".format(os.path.splitext(os.path.basename(self.filepath))[0] or "materials")
+
+        hash_path = os.path.join(folder_path, HASH_FILE_NAME)
+        previous_hashes = {}
+        if self.skip_unchanged and os.path.exists(hash_path):
+            with open(hash_path, "r", encoding="utf-8") as f:
+                previous_hashes = json.load(f)
+
+        hashes = dict(previous_hashes)
+        materials = {}
+        skipped = 0
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.thread_count or os.cpu_count()) as pool:
+            for obj in objects:
+                geometry = read_object(obj, depsgraph, space_matrix, self.write_uvs, self.write_normals, self.triangulate_faces)
+                for mat in obj.material_slots:
+                    if mat.material:
+                        materials[mat.material.name] = mat.material
+
+                file_path = os.path.join(folder_path, "{}.obj".format(obj.name))
+                geometry_hash = get_geometry_hash(obj.name, geometry, options)
+                hashes[obj.name] = geometry_hash
+                if previous_hashes.get(obj.name) == geometry_hash and os.path.exists(file_path):
+                    skipped += 1
+                    continue
+
+                futures.append(pool.submit(write_obj, file_path, obj.name, geometry, mtl_name,
+                                           self.group_by_object, self.group_by_material))
+
+            # materials are shared so they're written once for every object
+            # bpy isn't safe off the main thread, so only the finished text goes to the pool
+            if mtl_name:
+                mtl_text = get_mtl_text(list(materials.values()), folder_path)
+                futures.append(pool.submit(write_text, os.path.join(folder_path, mtl_name), mtl_text))
+
+            for future in futures:
+                future.result()
+
+        with open(hash_path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+
+        self.report({'INFO'}, "Exported {} objects, {} unchanged".format(len(objects) - skipped, skipped))
+
 
 def menu_func_import(self, context):
     self.layout.operator(WM_OT_batchExportObjs.bl_idname, text="Wavefront Batch (.obj)")
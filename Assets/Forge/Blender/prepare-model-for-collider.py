@@ -3,101 +3,76 @@ import bpy
 import os
 import time
 
-argv = sys.argv
-try:
-    argv = argv[argv.index("--") + 1:]  # get all args after "--"
-except ValueError:
-    # test value
-    argv = [ "M:/Unity/horizon-forge/levels/New Map/assets/shrub/0002_20B8/shrub.bin.glb"
-    , "M:/Unity/horizon-forge/Assets/Maps/New Map/Shrub/8376/8376.fbx", "col_2f" ]
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
 
-print(argv)
+def run(argv):
+    print(argv)
 
-in_filepath = argv[0]
-out_filepath = argv[1]
-default_mat_name = argv[2]
-out_ext = os.path.splitext(out_filepath)[1]
-ext = os.path.splitext(in_filepath)[1]
+    in_filepath = argv[0]
+    out_filepath = argv[1]
+    default_mat_name = argv[2]
+    out_ext = os.path.splitext(out_filepath)[1]
+    forge_common.set_stage_context(file=in_filepath)
 
-# reset scene
-bpy.ops.wm.read_factory_settings(use_empty=True)
+    # import file
+    with forge_common.stage("import"):
+        forge_common.import_file(in_filepath)
 
-# import file
-if ext == ".dae":
-    bpy.ops.wm.collada_import(filepath = in_filepath, 
-                          auto_connect = False, 
-                          find_chains = False, 
-                          fix_orientation = False) 
-    
-elif ext == ".blend":
-    bpy.ops.wm.open_mainfile(filepath = in_filepath)
-    
-elif ext == ".glb" or ext == ".gltf":
-    bpy.ops.import_scene.gltf(filepath = in_filepath) 
+    C = bpy.context
 
-C = bpy.context
-ob = C.object
-me = ob.data
-uvlayer = me.uv_layers.active
+    # Object Mode
+    if C.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
 
-# Object Mode
-bpy.ops.object.mode_set(mode='OBJECT')
+    # merge vertices by distance
+    with forge_common.stage("merge"):
+        for me in forge_common.get_scene_meshes():
+            forge_common.merge_by_distance(me, 0.001)
 
-# merge vertices by distance
-all_objects = [x for x in C.scene.objects]
-for obj in all_objects:
-    bpy.ops.object.select_all(action='DESELECT')
-    obj.select_set(True)
-    bpy.context.view_layer.objects.active = obj
-    # go edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    # select all faces
-    bpy.ops.mesh.select_all(action='SELECT')
-    # merge
-    bpy.ops.mesh.remove_doubles(threshold = 0.001)
-    # reset normals
-    #bpy.ops.mesh.normals_tools(mode='RESET')
-    # recalculate outside normals 
-    #bpy.ops.mesh.normals_make_consistent(inside=False)
-    # go object mode again
-    bpy.ops.object.editmode_toggle()
 
-# Object Mode
-bpy.ops.object.mode_set(mode='OBJECT')
+    # all_objects = [x for x in C.scene.objects]
+    # for obj in all_objects:
+    #     bpy.ops.object.select_all(action='DESELECT')
+    #     obj.select_set(True)
+    #     bpy.context.view_layer.objects.active = obj
+    #     # go edit mode
+    #     bpy.ops.object.mode_set(mode='EDIT')
+    #     # select al faces
+    #     bpy.ops.mesh.select_all(action='SELECT')
+    #     # recalculate outside normals
+    #     bpy.ops.mesh.normals_make_consistent(inside=False)
+    #     # go object mode again
+    #     bpy.ops.object.editmode_toggle()
 
+    # force material ids to col_XX format
+    for obj in bpy.data.objects:
+        for num, m in list(enumerate(obj.material_slots)):
+            if m.material:
+                mat_name = m.material.name
 
-# all_objects = [x for x in C.scene.objects]
-# for obj in all_objects:
-#     bpy.ops.object.select_all(action='DESELECT')
-#     obj.select_set(True)
-#     bpy.context.view_layer.objects.active = obj
-#     # go edit mode
-#     bpy.ops.object.mode_set(mode='EDIT')
-#     # select al faces
-#     bpy.ops.mesh.select_all(action='SELECT')
-#     # recalculate outside normals 
-#     bpy.ops.mesh.normals_make_consistent(inside=False)
-#     # go object mode again
-#     bpy.ops.object.editmode_toggle()
+                # material_0, material_1, etc
+                if mat_name.find("col_") < 0:
+                    print ("Renaming material ", mat_name, " to ", default_mat_name)
+                    m.material.name = default_mat_name
 
-# force material ids to col_XX format
-for obj in bpy.data.objects:
-    for num, m in list(enumerate(obj.material_slots)):
-        if m.material:
-            mat_name = m.material.name
+    # Export
+    with forge_common.stage("export", counts=False):
+        if out_ext == ".blend":
+            bpy.ops.wm.save_as_mainfile(filepath = out_filepath)
+        elif out_ext == ".glb":
+            bpy.ops.export_scene.gltf(filepath = out_filepath)
+        else:
+            bpy.ops.export_scene.fbx(filepath = out_filepath, axis_forward='Y', axis_up='Z', apply_scale_options='FBX_SCALE_ALL')
 
-            # material_0, material_1, etc
-            if mat_name.find("col_") < 0:
-                print ("Renaming material ", mat_name, " to ", default_mat_name)
-                m.material.name = default_mat_name
+if __name__ == "__main__":
+    # test value
+    argv = forge_common.get_argv([ "M:/Unity/horizon-forge/levels/New Map/assets/shrub/0002_20B8/shrub.bin.glb"
+    , "M:/Unity/horizon-forge/Assets/Maps/New Map/Shrub/8376/8376.fbx", "col_2f" ])
 
-# Export
-if out_ext == ".blend":
-    bpy.ops.wm.save_as_mainfile(filepath = out_filepath)
-elif out_ext == ".glb":
-    bpy.ops.export_scene.gltf(filepath = out_filepath)
-else:
-    bpy.ops.export_scene.fbx(filepath = out_filepath, axis_forward='Y', axis_up='Z', apply_scale_options='FBX_SCALE_ALL')
+    # reset scene
+    forge_common.reset_scene()
+    run(argv)
 
-# success
-exit(1)
+    # success
+    exit(1)
@@ -2,31 +2,11 @@ import bpy
 import sys
 import os
 import bmesh
+import numpy as np
 from mathutils import Matrix
 
-def add(ob, face, u_off, v_off):
-    for vert_idx, loop_idx in zip(face.vertices, face.loop_indices):
-        uv_coords = ob.data.uv_layers.active.data[loop_idx].uv
-        uv_coords[0] += u_off
-        uv_coords[1] += v_off
-        ob.data.uv_layers.active.data[loop_idx].uv = uv_coords
-
-def avg(ob, face):
-    uAvg = 0
-    vAvg = 0
-    count = 0
-    
-    for vert_idx, loop_idx in zip(face.vertices, face.loop_indices):
-        uv_coords = ob.data.uv_layers.active.data[loop_idx].uv
-        uAvg += uv_coords[0]
-        vAvg += uv_coords[1]
-        count += 1
-    
-    
-    if count > 0:
-        return (uAvg / count, vAvg / count)
-    
-    return 0
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import forge_common
 
 def triangulate_object(obj):
     me = obj.data
@@ -41,233 +21,233 @@ def triangulate_object(obj):
     bm.to_mesh(me)
     bm.free()
 
-def apply_transfrom(ob, use_location=False, use_rotation=False, use_scale=False):
-    mb = ob.matrix_basis
-    I = Matrix()
-    loc, rot, scale = mb.decompose()
-
-    # rotation
-    T = Matrix.Translation(loc)
-    #R = rot.to_matrix().to_4x4()
-    R = mb.to_3x3().normalized().to_4x4()
-    S = Matrix.Diagonal(scale).to_4x4()
-
-    transform = [I, I, I]
-    basis = [T, R, S]
-
-    def swap(i):
-        transform[i], basis[i] = basis[i], transform[i]
-
-    if use_location:
-        swap(0)
-    if use_rotation:
-        swap(1)
-    if use_scale:
-        swap(2)
-        
-    M = transform[0] @ transform[1] @ transform[2]
-    if hasattr(ob.data, "transform"):
-        ob.data.transform(M)
-    
-    for c in ob.children:
-        c.matrix_local = M @ c.matrix_local
-        
-    ob.matrix_basis = basis[0] @ basis[1] @ basis[2]
-    print(ob.name)
-
-def apply_all_transforms_in_hierarchy(ob, levels=10):
-    def recurse(ob, parent, depth):
-        if depth > levels: 
-            return
-        
-        apply_transfrom(ob, use_location=True, use_rotation=True, use_scale=True)
-
-        for child in ob.children:
-            recurse(child, ob,  depth + 1)
-    recurse(ob, ob.parent, 0)
-    
-argv = sys.argv
-try:
-    argv = argv[argv.index("--") + 1:]  # get all args after "--"
-except ValueError:
-    # test value
-    argv = [ "", "C:/Users/dna11/AppData/Local/Temp/horizon-forge/shrub-converter/shrub.glb", "de_dust2.001;de_dust2.002" ]
-
-in_filepath = argv[0]
-out_filepath = argv[1]
-objs_to_export = argv[2]
-cleanup = False
-obj_names = objs_to_export.split(';') if objs_to_export else []
-ext = os.path.splitext(in_filepath)[1]
-
-print(out_filepath)
-print(objs_to_export)
-
-# reset scene
-bpy.ops.wm.read_factory_settings(use_empty=True)
-
-# import file
-if ext == ".dae":
-    bpy.ops.wm.collada_import(filepath = in_filepath, 
-                          auto_connect = False, 
-                          find_chains = False, 
-                          fix_orientation = False) 
-    
-elif ext == ".blend":
-    bpy.ops.wm.open_mainfile(filepath = in_filepath)
-    
-elif ext == ".glb" or ext == ".gltf":
-    bpy.ops.import_scene.gltf(filepath = in_filepath) 
-
-# enter object mode
-if bpy.context.mode != 'OBJECT':
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-#Deselect all
-bpy.ops.object.select_all(action='DESELECT')
-
-# apply all modifiers
-for obj in bpy.data.objects:
-    print(f'{obj.name} {obj.type}')
-    if obj.type == 'MESH':
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-
-bpy.ops.object.convert(target='MESH')
-#for obj in bpy.context.scene.objects:
-#    triangulate_object(obj)
-
-#
-bpy.ops.object.mode_set(mode='EDIT')
-bpy.ops.mesh.select_all(action='SELECT')
-bpy.ops.mesh.remove_doubles(threshold = 0.001)
-bpy.ops.object.mode_set(mode='OBJECT')
-
-#Deselect all
-bpy.ops.object.select_all(action='DESELECT')
-
-# apply all transforms
-root_objs = (o for o in bpy.data.objects if not o.parent)
-for obj in root_objs:
-    apply_all_transforms_in_hierarchy(obj)
-
-# iterate every object and move uv shapes to (0,0)
-if len(obj_names) == 0 and bpy.data.objects != []:
+def flatten_hierarchy():
+    # bakes every mesh object's world transform into its mesh
+    # and leaves every object with an identity transform
+    matrices = { ob.as_pointer(): ob.matrix_world.copy() for ob in bpy.data.objects }
+
+    # objects sharing a mesh each need their own copy to bake into
+    seen = set()
+    for ob in bpy.data.objects:
+        if ob.type == 'MESH' and ob.data is not None:
+            if ob.data.as_pointer() in seen:
+                ob.data = ob.data.copy()
+            seen.add(ob.data.as_pointer())
+
     for ob in bpy.data.objects:
-        if len(obj_names) > 0 and ob.name not in obj_names:
+        if ob.type == 'MESH' and ob.data is not None:
+            ob.data.transform(matrices[ob.as_pointer()])
+        ob.matrix_parent_inverse = Matrix()
+        ob.matrix_basis = Matrix()
+
+def split_by_material():
+    # rebuilds every non collider mesh as one mesh per material named "0", "1", ...
+    # and merges each "<name>_collider" into the collider of the first mesh built from <name>
+    objects = [ob for ob in bpy.data.objects if ob.type == 'MESH' and not ob.name.endswith('_collider')]
+    object_names = { ob.name for ob in objects }
+    colliders = [ob for ob in bpy.data.objects if ob.type == 'MESH' and ob.name.endswith('_collider') and ob.name[:-9] in object_names]
+    normals = any(ob.data.has_custom_normals for ob in objects + colliders)
+
+    # faces of every object bucketed by material, in the order materials are first used
+    pieces = {}
+    first_piece_by_name = {}
+    for ob in objects:
+        data = forge_common.read_mesh_data(ob.data, normals)
+        slot_materials = [slot.material for slot in ob.material_slots] or [None]
+        slots = np.clip(data["material_index"], 0, len(slot_materials) - 1)
+        unique_slots, first_faces = np.unique(slots, return_index=True)
+        for slot in unique_slots[np.argsort(first_faces)]:
+            material = slot_materials[slot]
+            key = material.as_pointer() if material else None
+            if key not in pieces:
+                pieces[key] = (len(pieces), material, [])
+            pieces[key][2].append((data, np.flatnonzero(slots == slot), np.zeros(len(slot_materials), dtype=np.int64)))
+            first_piece_by_name.setdefault(ob.name, pieces[key][0])
+
+    # colliders keep their own materials
+    collider_parts = {}
+    for ob in colliders:
+        if ob.name[:-9] not in first_piece_by_name:
             continue
-        
-        me = ob.data
-
-        # Or just cycle all loops
-        if ob.type == 'MESH' and ob.data is not None and ob.data.uv_layers.active is not None and len(ob.data.uv_layers.active.data) > 0:
-            for face in ob.data.polygons:
-                uAvg, vAvg = avg(ob, face)
-                while uAvg > 1 or uAvg < 0 or vAvg > 1 or vAvg < 0:
-                    if uAvg > 1:
-                        add(ob, face, -1, 0)
-                    elif uAvg < 0:
-                        add(ob, face, 1, 0)
-                    
-                    if vAvg > 1:
-                        add(ob, face, 0, -1)
-                    elif vAvg < 0:
-                        add(ob, face, 0, 1)
-                        
-                    uAvg, vAvg = avg(ob, face)
-                    
-                    #ob.data.uv_layers.active.data[loop_idx].uv = uv_coords
-
-# split every mesh by material
-if len(obj_names) == 0 and bpy.data.objects != []:
+        data = forge_common.read_mesh_data(ob.data, normals)
+        slot_materials = [slot.material for slot in ob.material_slots] or [None]
+        collider_parts.setdefault(first_piece_by_name[ob.name[:-9]], []).append((ob, data, slot_materials))
+
+    # clear the old objects first so the new ones get their names
+    removed = objects + [ob for parts in collider_parts.values() for ob, _, _ in parts]
+    meshes = { ob.data for ob in removed }
+    for ob in removed:
+        bpy.data.objects.remove(ob)
+    for me in meshes:
+        if me.users == 0:
+            bpy.data.meshes.remove(me)
+
+    for idx, material, parts in pieces.values():
+        me = forge_common.build_mesh_from_parts(str(idx), parts, [material])
+        ob = bpy.data.objects.new(str(idx), me)
+        bpy.context.scene.collection.objects.link(ob)
+
+    for idx, parts in collider_parts.items():
+        # slots for every material used by the merged colliders
+        materials = []
+        mesh_parts = []
+        for _, data, slot_materials in parts:
+            slot_lookup = []
+            for material in slot_materials:
+                if material not in materials:
+                    materials.append(material)
+                slot_lookup.append(materials.index(material))
+            mesh_parts.append((data, np.arange(len(data["loop_total"])), np.array(slot_lookup, dtype=np.int64)))
+
+        name = str(idx) + '_collider'
+        me = forge_common.build_mesh_from_parts(name, mesh_parts, materials)
+        ob = bpy.data.objects.new(name, me)
+        bpy.context.scene.collection.objects.link(ob)
+
+def export_group(out_filepath, obj_names, cleanup):
+    bpy.ops.object.select_all(action='DESELECT')
+    if not obj_names:
+        # export scene
+        bpy.ops.export_scene.gltf(
+                    filepath=out_filepath,
+                    use_selection=False,
+                    )
+        return
+
+    # join copies so the prepared scene is left intact for the next group
+    copies = []
+    for ob in list(bpy.data.objects):
+        if ob.name in obj_names:
+            copy = ob.copy()
+            if ob.data is not None:
+                copy.data = ob.data.copy()
+            bpy.context.scene.collection.objects.link(copy)
+            copies.append(copy)
+
+    if len(copies) == 0:
+        raise RuntimeError(f'No objects found to export for {out_filepath}')
+
+    active_object = copies[0]
+    for ob in copies:
+        ob.select_set(True)
+
+    bpy.context.view_layer.objects.active = active_object
+    bpy.ops.object.join()
+    if cleanup:
+      bpy.ops.object.mode_set(mode='EDIT')
+      bpy.ops.mesh.select_all(action='SELECT')
+      bpy.ops.mesh.remove_doubles(threshold = 0.0001)
+      bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.ops.object.select_all(action='DESELECT')
 
+    # move anything already named shrub out of the way while exporting
+    renamed = []
+    for collection in (bpy.data.objects, bpy.data.meshes):
+        existing = collection.get("shrub")
+        if existing is not None and existing != active_object and existing != active_object.data:
+            existing.name = "shrub_export_tmp"
+            renamed.append(existing)
+
+    active_object.name = "shrub"
+    active_object.data.name = "shrub"
+    active_object.select_set(True)
+    bpy.context.view_layer.objects.active = active_object
+    print(active_object)
+    # export selection
+    bpy.ops.export_scene.gltf(
+                filepath=out_filepath,
+                use_selection=True,
+                )
+
+    # remove joined copy and restore names
+    mesh = active_object.data
+    bpy.data.objects.remove(active_object)
+    if mesh is not None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+    for existing in renamed:
+        existing.name = "shrub"
+
+def run(argv):
+    # argv is the input file followed by one or more (out_filepath, objs_to_export) pairs
+    # the model is prepared once and every pair is exported from the same scene
+    in_filepath = argv[0]
+    groups = [(argv[i], argv[i+1] if i+1 < len(argv) else "") for i in range(1, len(argv), 2)]
+    cleanup = False
+    groups = [(out_filepath, objs_to_export.split(';') if objs_to_export else []) for out_filepath, objs_to_export in groups]
+
+    # uv fixes and splitting by material rename objects
+    # so they only happen when exporting everything
+    obj_names = [] if all(len(names) == 0 for _, names in groups) else [name for _, names in groups for name in names]
+
+    for out_filepath, names in groups:
+        print(out_filepath)
+        print(';'.join(names))
+
+    forge_common.set_stage_context(file=in_filepath)
+
+    # import file
+    with forge_common.stage("import"):
+        forge_common.import_file(in_filepath)
+
+    # enter object mode
     if bpy.context.mode != 'OBJECT':
         bpy.ops.object.mode_set(mode='OBJECT')
 
-    # select all
+    #Deselect all
     bpy.ops.object.select_all(action='DESELECT')
-    for ob in bpy.data.objects:
-        if ob.type == 'MESH' and not ob.name.endswith('_collider'):
-            ob.select_set(True)
-            bpy.context.view_layer.objects.active = ob
 
-    # join all
-    bpy.ops.object.join()
+    # apply all modifiers
+    for obj in bpy.data.objects:
+        print(f'{obj.name} {obj.type}')
+        if obj.type == 'MESH':
+            obj.select_set(True)
+            bpy.context.view_layer.objects.active = obj
+
+    with forge_common.stage("convert"):
+        bpy.ops.object.convert(target='MESH')
+    #for obj in bpy.context.scene.objects:
+    #    triangulate_object(obj)
+
+    #
+    with forge_common.stage("merge"):
+        bpy.ops.object.mode_set(mode='EDIT')
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.remove_doubles(threshold = 0.001)
+        bpy.ops.object.mode_set(mode='OBJECT')
 
-    # split by material
-    objs = list(bpy.data.objects)
-    for ob in objs:
-        bpy.ops.object.select_all(action='DESELECT')
-        if not ob.name.endswith('_collider'):
-            ob.select_set(True)
-                
-            # enter edit mode
-            if bpy.context.mode != 'EDIT':
-                bpy.ops.object.mode_set(mode='EDIT')
-                
-            bpy.ops.mesh.separate(type='MATERIAL')
-                
-            # exit edit mode
-            bpy.ops.object.mode_set(mode='OBJECT')
-          
-    # rename by idx
-    rename_map = {}
-    objs = list(bpy.data.objects)
-    idx = 0
-    for ob in objs:
-        if ob.type == 'MESH' and not ob.name.endswith('_collider'):
-            rename_map[ob.name] = str(idx)
-            ob.name = str(idx)
-            ob.data.name = str(idx)
-            idx += 1
-    
-    # rename colliders
-    objs = list(bpy.data.objects)
-    idx = 0
-    for ob in objs:
-        if ob.name.endswith('_collider'):
-            name = ob.name[:-9]
-            if name in rename_map:
-                ob.data.name = ob.name = rename_map[name] + '_collider'
-
-                
-# export as glb
-bpy.ops.object.select_all(action='DESELECT')
-if out_filepath:
-    if objs_to_export:
-        obj_names = objs_to_export.split(';')
-        active_object = None
-        for ob in bpy.data.objects:
-            print(ob.name)
-            if ob.name in obj_names:
-                if not active_object:
-                    active_object = ob
-                ob.select_set(True)
-
-        bpy.context.view_layer.objects.active = active_object
-        bpy.ops.object.join()
-        if cleanup:
-          bpy.ops.object.mode_set(mode='EDIT')
-          bpy.ops.mesh.select_all(action='SELECT')
-          bpy.ops.mesh.remove_doubles(threshold = 0.0001)
-          bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.select_all(action='DESELECT')
-        active_object.name = "shrub"
-        active_object.data.name = "shrub"
-        active_object.select_set(True)
-        bpy.context.view_layer.objects.active = active_object
-        print(active_object)
-        # export selection
-        bpy.ops.export_scene.gltf(
-                    filepath=out_filepath,
-                    use_selection=True,
-                    )
-    else:
-        # export scene
-        bpy.ops.export_scene.gltf(
-                    filepath=out_filepath,
-                    use_selection=False,
-                    )
+    #Deselect all
+    bpy.ops.object.select_all(action='DESELECT')
+
+    # bake transforms into the meshes
+    with forge_common.stage("transforms", counts=False):
+        flatten_hierarchy()
+
+    # iterate every object and move uv shapes to (0,0)
+    if len(obj_names) == 0 and bpy.data.objects != []:
+        with forge_common.stage("uv wrap", counts=False):
+            meshes = { ob.data for ob in bpy.data.objects if ob.type == 'MESH' }
+            for me in meshes:
+                forge_common.wrap_uvs(me)
+
+    # split every mesh by material
+    if len(obj_names) == 0 and bpy.data.objects != []:
+        with forge_common.stage("split by material"):
+            split_by_material()
+
+    # export as glb
+    for out_filepath, names in groups:
+        if out_filepath:
+            with forge_common.stage("export", counts=False) as stage:
+                stage["out"] = out_filepath
+                export_group(out_filepath, names, cleanup)
+
+if __name__ == "__main__":
+    # test value
+    argv = forge_common.get_argv([ "", "C:/Users/dna11/AppData/Local/Temp/horizon-forge/shrub-converter/shrub.glb", "de_dust2.001;de_dust2.002" ])
+
+    # reset scene
+    forge_common.reset_scene()
+    run(argv)
 
-# success
-exit(1)
+    # success
+    exit(1)
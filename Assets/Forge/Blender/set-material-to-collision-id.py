@@ -1,27 +1,215 @@
 import bpy
-from random import random
-
-mat = None
-for m in bpy.data.materials:
-    if m.name == 'col_f':
-        mat = m
-        
-        
-if mat is not None:
-    
-    for ob in bpy.context.selected_objects:
-        if ob.type == 'MESH':
-            me = ob.data
-            
-            # Can't assign materials in editmode
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-            me.materials.clear()
-            me.materials.append(mat)
-
-            i = 0
-            for poly in me.polygons:
-                if poly.select:
-                    poly.material_index = 0
-                    i += 1
-        
\ No newline at end of file
+import sys
+import json
+import fnmatch
+import numpy as np
+
+# assigns col_XX collision materials to faces of many objects at once from rules
+#
+# rules are a json list, the first rule matching a face sets its material
+#   { "id": "2f",                   collision id, material col_2f
+#     "slope": [0, 50],             optional, degrees between the face normal and up
+#     "material": "grass*",         optional, pattern the face's current material name must match
+#     "attribute": "Col",           optional, vertex color or attribute the face must be painted with
+#     "channel": 0,                 optional, component of the attribute to test
+#     "threshold": 0.5,             optional, face average must be at least this
+#     "selected": true }            optional, only faces selected in edit mode
+# faces no rule matches keep their material
+#
+# run from the text editor to register the operator (Object > Assign Collision Ids)
+# or headless with
+#   blender --background level.blend --python set-material-to-collision-id.py -- rules.json [out.blend]
+
+ATTRIBUTE_PROPS = { "FLOAT": ("value", 1), "INT": ("value", 1), "BOOLEAN": ("value", 1), "INT8": ("value", 1),
+                    "FLOAT2": ("vector", 2), "FLOAT_VECTOR": ("vector", 3), "FLOAT_COLOR": ("color", 4), "BYTE_COLOR": ("color", 4) }
+
+def get_collision_material_name(id):
+    return id if id.startswith("col_") else f'col_{id}'
+
+def get_collision_material(id):
+    name = get_collision_material_name(id)
+    return bpy.data.materials.get(name) or bpy.data.materials.new(name)
+
+def get_face_loops(me):
+    loop_starts = np.empty(len(me.polygons), dtype=np.int64)
+    loop_totals = np.empty(len(me.polygons), dtype=np.int64)
+    me.polygons.foreach_get("loop_start", loop_starts)
+    me.polygons.foreach_get("loop_total", loop_totals)
+    face_offsets = np.cumsum(loop_totals) - loop_totals
+    return np.repeat(loop_starts - face_offsets, loop_totals) + np.arange(loop_totals.sum()), face_offsets, loop_totals
+
+def get_face_attribute(me, name, channel):
+    # average of an attribute over each face, whatever domain it's stored on
+    attribute = me.attributes.get(name)
+    if attribute is None or attribute.data_type not in ATTRIBUTE_PROPS or attribute.domain not in ("POINT", "CORNER", "FACE"):
+        raise RuntimeError(f'{me.name} has no point, corner or face attribute {name}')
+
+    prop, components = ATTRIBUTE_PROPS[attribute.data_type]
+    values = np.empty(len(attribute.data) * components, dtype=np.float64)
+    attribute.data.foreach_get(prop, values)
+    values = values.reshape(-1, components)[:, min(channel, components - 1)]
+    if attribute.domain == "FACE":
+        return values
+
+    loop_indices, face_offsets, loop_totals = get_face_loops(me)
+    if attribute.domain == "POINT":
+        vertex_indices = np.empty(len(me.loops), dtype=np.int64)
+        me.loops.foreach_get("vertex_index", vertex_indices)
+        values = values[vertex_indices]
+
+    face_values = np.zeros(len(loop_totals), dtype=np.float64)
+    valid = loop_totals > 0
+    face_values[valid] = np.add.reduceat(values[loop_indices], face_offsets[valid]) / loop_totals[valid]
+    return face_values
+
+def get_face_slopes(ob):
+    # degrees between each face's world space normal and up
+    me = ob.data
+    normals = np.empty(len(me.polygons) * 3, dtype=np.float64)
+    me.polygons.foreach_get("normal", normals)
+    matrix = np.array(ob.matrix_world, dtype=np.float64)[:3, :3]
+    normals = normals.reshape(-1, 3) @ np.linalg.inv(matrix)
+    up = normals[:, 2] / np.maximum(np.linalg.norm(normals, axis=1), 1e-12)
+    return np.degrees(np.arccos(np.clip(up, -1, 1)))
+
+def assign_collision_ids(ob, rules):
+    # returns how many faces each rule matched
+    me = ob.data
+    face_count = len(me.polygons)
+    material_indices = np.empty(face_count, dtype=np.int64)
+    me.polygons.foreach_get("material_index", material_indices)
+    slots = list(me.materials)
+    face_slots = np.clip(material_indices, 0, max(0, len(slots) - 1))
+
+    # faces keep their slot unless a rule matches, rule targets are added after the existing slots
+    targets = face_slots.copy()
+    unmatched = np.ones(face_count, dtype=bool)
+    slopes = None
+    matched = []
+    for i, rule in enumerate(rules):
+        mask = unmatched.copy()
+        if "slope" in rule:
+            if slopes is None:
+                slopes = get_face_slopes(ob)
+            mask &= (slopes >= rule["slope"][0]) & (slopes <= rule["slope"][1])
+        if "material" in rule:
+            slot_matches = np.array([fnmatch.fnmatchcase(x.name if x else "", rule["material"]) for x in slots] or [fnmatch.fnmatchcase("", rule["material"])])
+            mask &= slot_matches[face_slots]
+        if "attribute" in rule:
+            mask &= get_face_attribute(me, rule["attribute"], rule.get("channel", 0)) >= rule.get("threshold", 0.5)
+        if rule.get("selected", False):
+            selected = np.empty(face_count, dtype=bool)
+            me.polygons.foreach_get("select", selected)
+            mask &= selected
+
+        targets[mask] = len(slots) + i
+        unmatched &= ~mask
+        matched.append(int(mask.sum()))
+
+    # rebuild the slots with only what's used, in first use order
+    materials = slots + [get_collision_material(rule["id"]) for rule in rules]
+    used, first_use, remap = np.unique(targets, return_index=True, return_inverse=True)
+    order = np.argsort(first_use, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    me.materials.clear()
+    for i in used[order]:
+        me.materials.append(materials[i])
+    me.polygons.foreach_set("material_index", rank[remap.reshape(-1)].astype(np.int32))
+    me.update()
+    return matched
+
+def assign_objects(objects, rules):
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    meshes = {}
+    for ob in [x for x in objects if x.type == 'MESH']:
+        meshes.setdefault(ob.data.as_pointer(), []).append(ob)
+
+    # slopes depend on the transform, so only instances rotated or scaled differently get their own copy
+    # everything else is assigned once per mesh
+    has_slope = any("slope" in rule for rule in rules)
+    totals = [0] * len(rules)
+    for instances in meshes.values():
+        groups = {}
+        for ob in instances:
+            key = np.round(np.array(ob.matrix_world, dtype=np.float64)[:3, :3], 6).tobytes() if has_slope else None
+            groups.setdefault(key, []).append(ob)
+
+        for i, group in enumerate(groups.values()):
+            if i > 0:
+                me = group[0].data.copy()
+                for ob in group:
+                    ob.data = me
+
+            for j, count in enumerate(assign_collision_ids(group[0], rules)):
+                totals[j] += count
+
+    for rule, count in zip(rules, totals):
+        print(f'{get_collision_material_name(rule["id"])}: {count} faces')
+    return totals
+
+def load_rules(filepath):
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class OBJECT_OT_assign_collision_ids(bpy.types.Operator):
+    """Assign collision materials to the selected objects from slope, material and attribute rules"""
+    bl_idname = "object.assign_collision_ids"
+    bl_label = "Assign Collision Ids"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    rules_path: bpy.props.StringProperty(name="Rules", description="Json rules file, overrides the slope ids below", subtype='FILE_PATH')
+    floor_id: bpy.props.StringProperty(name="Floor", default="f")
+    wall_id: bpy.props.StringProperty(name="Wall", default="")
+    ceiling_id: bpy.props.StringProperty(name="Ceiling", default="")
+    max_floor_angle: bpy.props.FloatProperty(name="Max Floor Angle", default=50, min=0, max=180)
+    min_ceiling_angle: bpy.props.FloatProperty(name="Min Ceiling Angle", default=130, min=0, max=180)
+    selected_faces: bpy.props.BoolProperty(name="Selected Faces Only", default=False)
+
+    def get_rules(self):
+        if self.rules_path:
+            return load_rules(bpy.path.abspath(self.rules_path))
+
+        rules = []
+        for id, slope in ((self.floor_id, [0, self.max_floor_angle]), (self.ceiling_id, [self.min_ceiling_angle, 180]), (self.wall_id, [0, 180])):
+            if id:
+                rules.append({ "id": id, "slope": slope, "selected": self.selected_faces })
+        return rules
+
+    def execute(self, context):
+        totals = assign_objects(context.selected_objects, self.get_rules())
+        self.report({'INFO'}, f'Assigned {sum(totals)} faces')
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+def menu_func(self, context):
+    self.layout.operator(OBJECT_OT_assign_collision_ids.bl_idname)
+
+def register():
+    bpy.utils.register_class(OBJECT_OT_assign_collision_ids)
+    bpy.types.VIEW3D_MT_object.append(menu_func)
+
+def unregister():
+    bpy.utils.unregister_class(OBJECT_OT_assign_collision_ids)
+    bpy.types.VIEW3D_MT_object.remove(menu_func)
+
+if __name__ == "__main__":
+    if not bpy.app.background:
+        register()
+    else:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+        # every mesh in the open blend
+        assign_objects(bpy.context.scene.objects, load_rules(argv[0]))
+        if len(argv) > 1:
+            bpy.ops.wm.save_as_mainfile(filepath = argv[1])
+        else:
+            bpy.ops.wm.save_mainfile()
+
+        # success
+        exit(1)
@@ -230,6 +230,8 @@ public class ConvertToShrubDatabase : ScriptableObject
             data.ShrubClasses.Clear();
             data.Materials.RemoveAll(x => !materials.Any(m => m.name == x.Name));
 
+            var exportGroups = new List<(string OutGlbFile, string ObjectsToSelect)>();
+            var finishChunks = new List<Func<bool>>();
             for (int i = 0; i < shrubsToCreate; ++i)
             {
                 var outShrubClass = GetFreeShrubClass();
@@ -369,13 +371,9 @@ public class ConvertToShrubDatabase : ScriptableObject
                     meshes.Add(meshNames[mIdx]);
                 }
 
-                // export selected meshes to glb
+                // queue selected meshes for export to glb
                 if (File.Exists(shrubGlbPath)) File.Delete(shrubGlbPath);
-                if (!BlenderHelper.PrepareFileForShrubConvert(glbModelAssetPath, shrubGlbPath, String.Join(";", meshes)))
-                {
-                    Debug.LogError("Unable to convert .blend to .glb");
-                    return false;
-                }
+                exportGroups.Add((shrubGlbPath, String.Join(";", meshes)));
 
                 // export collider from '_collider'
                 // or use shrub mesh if none
@@ -392,27 +390,44 @@ public class ConvertToShrubDatabase : ScriptableObject
                 //    File.Copy(shrubGlbPath, shrubColliderGlbPath, true);
                 //}
 
-                // convert to shrub
-                if (!WrenchHelper.ConvertToShrub(workingDir, convertedShrubDest, "shrub"))
+                // finish chunk once every glb has been exported
+                finishChunks.Add(() =>
                 {
-                    Debug.LogError("Failed to convert glb to shrub.bin");
-                    return false;
-                }
-
-                // convert packed shrub to asset
-                assetImports.Add(
-                    new PackerImporterWindow.PackerAssetImport()
+                    // convert to shrub
+                    if (!WrenchHelper.ConvertToShrub(workingDir, convertedShrubDest, "shrub"))
                     {
-                        AssetFolder = workingDir,
-                        DestinationFolder = outputShrubDir,
-                        AssetType = FolderNames.ShrubFolder,
-                        Name = outShrubClass.ToString(),
-                        PrependModelNameToTextures = true,
-                        MaxTexSize = 512,
-                        OnImport = onImportActions
-                    });
-
-                ++shrubsCreated;
+                        Debug.LogError("Failed to convert glb to shrub.bin");
+                        return false;
+                    }
+
+                    // convert packed shrub to asset
+                    assetImports.Add(
+                        new PackerImporterWindow.PackerAssetImport()
+                        {
+                            AssetFolder = workingDir,
+                            DestinationFolder = outputShrubDir,
+                            AssetType = FolderNames.ShrubFolder,
+                            Name = outShrubClass.ToString(),
+                            PrependModelNameToTextures = true,
+                            MaxTexSize = 512,
+                            OnImport = onImportActions
+                        });
+
+                    ++shrubsCreated;
+                    return true;
+                });
+            }
+
+            // prepare the model once and export every chunk from it
+            if (exportGroups.Any() && !BlenderHelper.PrepareFileForShrubConvert(glbModelAssetPath, exportGroups))
+            {
+                Debug.LogError("Unable to convert .blend to .glb");
+                return false;
+            }
+
+            foreach (var finishChunk in finishChunks)
+            {
+                if (!finishChunk()) return false;
             }
         }
         finally
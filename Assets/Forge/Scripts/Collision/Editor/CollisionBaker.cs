@@ -1,4 +1,5 @@
 using GLTFast.Export;
+using Newtonsoft.Json.Linq;
 using System;
 using System.Collections;
 using System.Collections.Generic;
@@ -28,6 +29,7 @@ public static class CollisionBaker
         var collisionAssetFile = Path.Combine(binFolder, FolderNames.BinaryCollisionAssetFile);
         var collisionBinFile = Path.Combine(binFolder, FolderNames.BinaryCollisionBinFile);
         var affectedInstancedColliders = new List<CollisionRenderHandle>();
+        var collisionResults = new List<(string Reason, Vector3 Position)>();
         GameObject combinedRootGo = null;
 
         var exportSettings = new ExportSettings
@@ -46,6 +48,7 @@ public static class CollisionBaker
 
         try
         {
+            BlenderTimings.Begin($"collision {scene.name}");
             EditorUtility.DisplayProgressBar("Baking Collision", "Collecting Colliders", 0.25f);
 
             // build instanced collision
@@ -94,7 +97,31 @@ public static class CollisionBaker
 
             // merge and export as collada
             EditorUtility.DisplayProgressBar("Baking Collision", "Baking Collision", 0.75f);
-            if (!BlenderHelper.PackCollision(collisionBlendFile, collisionDaeFile, outInstancedCollisionGlbFile))
+            var collisionReportFile = Path.Combine(FolderNames.GetTempFolder(), $"collision-report.json");
+            if (File.Exists(collisionReportFile)) File.Delete(collisionReportFile);
+            var packed = BlenderHelper.PackCollision(collisionBlendFile, collisionDaeFile, collisionReportFile, outInstancedCollisionGlbFile);
+
+            // collect anything validation found before packing
+            var report = File.Exists(collisionReportFile) ? JObject.Parse(File.ReadAllText(collisionReportFile)) : null;
+            if (report != null)
+            {
+                var issues = report["issues"] as JArray ?? new JArray();
+                foreach (var issue in issues)
+                {
+                    Debug.LogWarning($"Collision {issue.Value<string>("severity")}: {issue.Value<string>("reason")} ({issue.Value<int>("count")})");
+                    foreach (var p in issue["positions"])
+                        collisionResults.Add((issue.Value<string>("reason"), new Vector3(p.Value<float>(0), p.Value<float>(1), p.Value<float>(2)).SwizzleXZY()));
+                }
+
+                if (!report.Value<bool>("ok"))
+                {
+                    ShowCollisionResults(collisionResults);
+                    Debug.LogError($"Collision failed validation. See the Collision Results Visualizer for locations.");
+                    return false;
+                }
+            }
+
+            if (!packed)
             {
                 Debug.LogError($"Failed to export collision blend as collada {collisionDaeFile}");
                 return false;
@@ -109,45 +136,19 @@ public static class CollisionBaker
             }
 
             // parse wrench output, looking for bad sectors
-            var collisionResultsVisualizer = GameObject.FindObjectOfType<CollisionResultsVisualizer>();
             var regex = new Regex(@"warning: Collision sector (\d+) (\d+) (\d+) dropped: (.+)");
             var matches = regex.Matches(buildOutput);
-            if (matches.Any())
+            foreach (Match match in matches)
             {
-                if (!collisionResultsVisualizer)
-                {
-                    // create new
-                    var go = new GameObject("Collision Results Visualizer");
-                    collisionResultsVisualizer = go.AddComponent<CollisionResultsVisualizer>();
-                }
-                else
-                {
-                    // delete children
-                    while (collisionResultsVisualizer.transform.childCount > 0)
-                        GameObject.DestroyImmediate(collisionResultsVisualizer.transform.GetChild(0).gameObject);
-                }
-
-                foreach (Match match in matches)
-                {
-                    var y = match.Groups.ElementAtOrDefault(1).Value;
-                    var z = match.Groups.ElementAtOrDefault(2).Value;
-                    var x = match.Groups.ElementAtOrDefault(3).Value;
-                    var reason = match.Groups.ElementAtOrDefault(4).Value;
-
-                    var go = new GameObject(reason);
-                    go.transform.SetParent(collisionResultsVisualizer.transform, false);
-                    var node = go.AddComponent<CollisionResultsVisualizerNode>();
-                    node.transform.position = new Vector3(float.Parse(x) + 0.5f, float.Parse(y) + 0.5f, float.Parse(z) + 0.5f) * 4;
-                    Debug.Log($"{reason}: {node.transform.position}");
-                }
-
-                collisionResultsVisualizer.UpdateShaderGlobals();
-            }
-            else
-            {
-                GameObject.DestroyImmediate(collisionResultsVisualizer.gameObject);
+                var y = match.Groups.ElementAtOrDefault(1).Value;
+                var z = match.Groups.ElementAtOrDefault(2).Value;
+                var x = match.Groups.ElementAtOrDefault(3).Value;
+                var reason = match.Groups.ElementAtOrDefault(4).Value;
+                collisionResults.Add((reason, new Vector3(float.Parse(x) + 0.5f, float.Parse(y) + 0.5f, float.Parse(z) + 0.5f) * 4));
             }
 
+            ShowCollisionResults(collisionResults);
+
             Debug.Log("Collision successfully baked!");
         }
         catch (Exception ex)
@@ -164,12 +165,47 @@ public static class CollisionBaker
             // remove temporary collision bake root
             if (combinedRootGo) GameObject.DestroyImmediate(combinedRootGo);
 
+            BlenderTimings.End();
             EditorUtility.ClearProgressBar();
         }
 
         return true;
     }
 
+    static void ShowCollisionResults(List<(string Reason, Vector3 Position)> results)
+    {
+        var collisionResultsVisualizer = GameObject.FindObjectOfType<CollisionResultsVisualizer>();
+        if (!results.Any())
+        {
+            if (collisionResultsVisualizer) GameObject.DestroyImmediate(collisionResultsVisualizer.gameObject);
+            return;
+        }
+
+        if (!collisionResultsVisualizer)
+        {
+            // create new
+            var go = new GameObject("Collision Results Visualizer");
+            collisionResultsVisualizer = go.AddComponent<CollisionResultsVisualizer>();
+        }
+        else
+        {
+            // delete children
+            while (collisionResultsVisualizer.transform.childCount > 0)
+                GameObject.DestroyImmediate(collisionResultsVisualizer.transform.GetChild(0).gameObject);
+        }
+
+        foreach (var result in results)
+        {
+            var go = new GameObject(result.Reason);
+            go.transform.SetParent(collisionResultsVisualizer.transform, false);
+            var node = go.AddComponent<CollisionResultsVisualizerNode>();
+            node.transform.position = result.Position;
+            Debug.Log($"{result.Reason}: {node.transform.position}");
+        }
+
+        collisionResultsVisualizer.UpdateShaderGlobals();
+    }
+
     [MenuItem("Forge/Tools/Collision/Export Selected Instanced Collision")]
     public static async Task<bool> ExportSelectedInstancedCollision()
     {
@@ -86,7 +86,7 @@ public class CustomShrubEditor : Editor
         var modelGo = customShrub.modelToConvert;
         var blenderModelAssetPath = AssetDatabase.GetAssetPath(modelGo);
         if (String.IsNullOrEmpty(blenderModelAssetPath)) return 0;
-        var glbModelAssetPath = Path.Combine(Path.GetDirectoryName(blenderModelAssetPath), "split.glb");
+        var childGlbModelAssetPaths = new List<string>();
         var assetImports = new List<PackerImporterWindow.PackerAssetImport>();
         var postImportActions = new List<Action>();
         var cancel = false;
@@ -97,23 +97,24 @@ public class CustomShrubEditor : Editor
             if (customShrub.shrubPerRootLevelObject && modelGo.transform.childCount > 0)
             {
                 var childCount = modelGo.transform.childCount;
-                for (int i = 0; i < childCount; ++i)
+                var children = Enumerable.Range(0, childCount).Select(x => modelGo.transform.GetChild(x)).Where(x => x).ToList();
+                childGlbModelAssetPaths = children.Select((x, i) => Path.Combine(Path.GetDirectoryName(blenderModelAssetPath), $"split-{i}.glb")).ToList();
+
+                // export every child in one pass
+                if (!BlenderHelper.PrepareFileForShrubConvert(blenderModelAssetPath, children.Select((x, i) => (childGlbModelAssetPaths[i], x.name))))
                 {
-                    var child = modelGo.transform.GetChild(i);
-                    if (!child) continue;
+                    Debug.LogError("Unable to convert .blend to .glb");
+                    return 0;
+                }
+                AssetDatabase.Refresh();
 
+                for (int i = 0; i < children.Count; ++i)
+                {
+                    var child = children[i];
                     if (CancelProgressBar(ref cancel, "Shrub Converter", $"Processing shrub root object {child.name}...", i / (float)childCount)) break;
 
-                    // export child
-                    if (!BlenderHelper.PrepareFileForShrubConvert(blenderModelAssetPath, glbModelAssetPath, $"{child.name}"))
-                    {
-                        Debug.LogError("Unable to convert .blend to .glb");
-                        break;
-                    }
-                    AssetDatabase.Refresh();
-
                     // convert
-                    var count = Convert(glbModelAssetPath, child.name, sClass, customShrub, null, assetImports, postImportActions);
+                    var count = Convert(childGlbModelAssetPaths[i], child.name, sClass, customShrub, null, assetImports, postImportActions);
                     if (count < 0) break;
 
                     sClass += count;
@@ -140,9 +141,10 @@ public class CustomShrubEditor : Editor
         }
         finally
         {
-            // delete temp shrub asset
-            if (File.Exists(glbModelAssetPath))
-                AssetDatabase.DeleteAsset(glbModelAssetPath);
+            // delete temp shrub assets
+            foreach (var childGlbModelAssetPath in childGlbModelAssetPaths)
+                if (File.Exists(childGlbModelAssetPath))
+                    AssetDatabase.DeleteAsset(childGlbModelAssetPath);
         }
 
         return sClass - customShrub.startingShrubClass;
@@ -153,7 +155,7 @@ public class CustomShrubEditor : Editor
         var modelGo = customShrub.modelToConvert;
         var blenderModelAssetPath = AssetDatabase.GetAssetPath(modelGo);
         if (String.IsNullOrEmpty(blenderModelAssetPath)) return 0;
-        var glbModelAssetPath = Path.Combine(Path.GetDirectoryName(blenderModelAssetPath), "split.glb");
+        var childGlbModelAssetPaths = new List<string>();
         var assetImports = new List<PackerImporterWindow.PackerAssetImport>();
         var postImportActions = new List<Action>();
         var cancel = false;
@@ -164,23 +166,24 @@ public class CustomShrubEditor : Editor
             if (customShrub.shrubPerRootLevelObject && modelGo.transform.childCount > 0)
             {
                 var childCount = modelGo.transform.childCount;
-                for (int i = 0; i < childCount; ++i)
+                var children = Enumerable.Range(0, childCount).Select(x => modelGo.transform.GetChild(x)).Where(x => x).ToList();
+                childGlbModelAssetPaths = children.Select((x, i) => Path.Combine(Path.GetDirectoryName(blenderModelAssetPath), $"split-{i}.glb")).ToList();
+
+                // export every child in one pass
+                if (!BlenderHelper.PrepareFileForShrubConvert(blenderModelAssetPath, children.Select((x, i) => (childGlbModelAssetPaths[i], x.name))))
                 {
-                    var child = modelGo.transform.GetChild(i);
-                    if (!child) continue;
+                    Debug.LogError("Unable to convert .blend to .glb");
+                    return 0;
+                }
+                AssetDatabase.Refresh();
 
+                for (int i = 0; i < children.Count; ++i)
+                {
+                    var child = children[i];
                     if (CancelProgressBar(ref cancel, "Shrub Converter", $"Processing shrub root object {child.name}...", i / (float)childCount)) break;
 
-                    // export child
-                    if (!BlenderHelper.PrepareFileForShrubConvert(blenderModelAssetPath, glbModelAssetPath, child.name))
-                    {
-                        Debug.LogError("Unable to convert .blend to .glb");
-                        break;
-                    }
-                    AssetDatabase.Refresh();
-
                     // convert
-                    var count = Convert(glbModelAssetPath, child.name, sClass, customShrub, null, assetImports, postImportActions, count: true);
+                    var count = Convert(childGlbModelAssetPaths[i], child.name, sClass, customShrub, null, assetImports, postImportActions, count: true);
                     if (count < 0) break;
 
                     sClass += count;
@@ -195,9 +198,10 @@ public class CustomShrubEditor : Editor
         }
         finally
         {
-            // delete temp shrub asset
-            if (File.Exists(glbModelAssetPath))
-                AssetDatabase.DeleteAsset(glbModelAssetPath);
+            // delete temp shrub assets
+            foreach (var childGlbModelAssetPath in childGlbModelAssetPaths)
+                if (File.Exists(childGlbModelAssetPath))
+                    AssetDatabase.DeleteAsset(childGlbModelAssetPath);
         }
 
         return sClass - customShrub.startingShrubClass;
@@ -278,6 +282,8 @@ public class CustomShrubEditor : Editor
             // if count, return # of shrubs to create
             if (count) return shrubsToCreate;
 
+            var exportGroups = new List<(string OutGlbFile, string ObjectsToSelect)>();
+            var finishChunks = new List<Func<bool>>();
             for (int i = 0; i < shrubsToCreate; ++i)
             {
                 var workingDir = Path.Combine(FolderNames.GetTempFolder(), $"shrub-converter-{startingShrubClass + i}");
@@ -393,68 +399,75 @@ public class CustomShrubEditor : Editor
                     meshes.Add(meshNames[mIdx]);
                 }
 
-                // export selected meshes to glb
+                // queue selected meshes for export to glb
                 if (File.Exists(shrubGlbPath)) File.Delete(shrubGlbPath);
-                if (!BlenderHelper.PrepareFileForShrubConvert(glbModelAssetPath, shrubGlbPath, String.Join(";", meshes)))
-                {
-                    Debug.LogError("Unable to convert .blend to .glb");
-                    return -1;
-                }
+                exportGroups.Add((shrubGlbPath, String.Join(";", meshes)));
 
                 // export collider from '_collider'
                 // or use shrub mesh if none
-                if (meshes.Any(m => renderers.Any(r => r.name == $"{m}_collider")))
-                {
-                    if (!BlenderHelper.PrepareFileForShrubConvert(glbModelAssetPath, shrubColliderGlbPath, String.Join(";", meshes.Select(x => $"{x}_collider"))))
-                    {
-                        Debug.LogError("Unable to convert .blend to .glb");
-                        return -1;
-                    }
-                }
-                else
-                {
-                    File.Copy(shrubGlbPath, shrubColliderGlbPath, true);
-                }
+                var hasCollider = meshes.Any(m => renderers.Any(r => r.name == $"{m}_collider"));
+                if (hasCollider)
+                    exportGroups.Add((shrubColliderGlbPath, String.Join(";", meshes.Select(x => $"{x}_collider"))));
 
-                // convert to shrub
-                if (!WrenchHelper.ConvertToShrub(workingDir, convertedShrubDest, "shrub"))
+                // finish chunk once every glb has been exported
+                finishChunks.Add(() =>
                 {
-                    Debug.LogError("Failed to convert glb to shrub.bin");
-                    return -1;
-                }
+                    if (!hasCollider)
+                        File.Copy(shrubGlbPath, shrubColliderGlbPath, true);
 
-                // convert packed shrub to asset
-                assetImports.Add(
-                    new PackerImporterWindow.PackerAssetImport()
+                    // convert to shrub
+                    if (!WrenchHelper.ConvertToShrub(workingDir, convertedShrubDest, "shrub"))
                     {
-                        AssetFolder = workingDir,
-                        DestinationFolder = outputShrubDir,
-                        AssetType = FolderNames.ShrubFolder,
-                        Name = outShrubClass.ToString(),
-                        PrependModelNameToTextures = true,
-                        MaxTexSize = texSize,
-                    });
-
-                if (customShrub.generateColliders)
-                {
-                    postImportActions.Add(() =>
+                        Debug.LogError("Failed to convert glb to shrub.bin");
+                        return false;
+                    }
+
+                    // convert packed shrub to asset
+                    assetImports.Add(
+                        new PackerImporterWindow.PackerAssetImport()
+                        {
+                            AssetFolder = workingDir,
+                            DestinationFolder = outputShrubDir,
+                            AssetType = FolderNames.ShrubFolder,
+                            Name = outShrubClass.ToString(),
+                            PrependModelNameToTextures = true,
+                            MaxTexSize = texSize,
+                        });
+
+                    if (customShrub.generateColliders)
                     {
-                        var colFile = Path.Combine(outputShrubDir, $"{outShrubClass}_col.fbx");
-                        var defaultMatId = "col_2f";
+                        postImportActions.Add(() =>
+                        {
+                            var colFile = Path.Combine(outputShrubDir, $"{outShrubClass}_col.fbx");
+                            var defaultMatId = "col_2f";
+
+                            if (int.TryParse(customShrub.generateCollidersDefaultMaterialId, System.Globalization.NumberStyles.HexNumber, CultureInfo.InvariantCulture, out var id))
+                                defaultMatId = $"col_{id:x}";
+
+                            if (BlenderHelper.PrepareMeshFileForCollider(shrubColliderGlbPath, colFile, defaultMatId))
+                            {
+                                AssetDatabase.ImportAsset(colFile);
+                                AssetDatabase.Refresh();
+                                WrenchHelper.SetDefaultWrenchModelImportSettings(colFile, "Collider", false);
+                            }
+                        });
+                    }
 
-                        if (int.TryParse(customShrub.generateCollidersDefaultMaterialId, System.Globalization.NumberStyles.HexNumber, CultureInfo.InvariantCulture, out var id))
-                            defaultMatId = $"col_{id:x}";
+                    ++shrubsCreated;
+                    return true;
+                });
+            }
 
-                        if (BlenderHelper.PrepareMeshFileForCollider(shrubColliderGlbPath, colFile, defaultMatId))
-                        {
-                            AssetDatabase.ImportAsset(colFile);
-                            AssetDatabase.Refresh();
-                            WrenchHelper.SetDefaultWrenchModelImportSettings(colFile, "Collider", false);
-                        }
-                    });
-                }
+            // prepare the model once and export every chunk from it
+            if (exportGroups.Any() && !BlenderHelper.PrepareFileForShrubConvert(glbModelAssetPath, exportGroups))
+            {
+                Debug.LogError("Unable to convert .blend to .glb");
+                return -1;
+            }
 
-                ++shrubsCreated;
+            foreach (var finishChunk in finishChunks)
+            {
+                if (!finishChunk()) return -1;
             }
 
             postImportActions.Add(() =>
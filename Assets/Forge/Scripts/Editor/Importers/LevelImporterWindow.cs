@@ -65,6 +65,9 @@ public class LevelImporterWindow : EditorWindow
     static readonly List<string> AssetImportOptions = new List<string>() { "Skip", "Add" };
     static readonly List<string> AssetMobyImportOptions = new List<string>() { "Skip", "Add" };
 
+    // size of the tiles tfrags are split into on import
+    static readonly float TfragTileSize = 128;
+
     int importSource = 0;
     int importBaseLevelIdx = 0;
     int importLevelIdx = 0;
@@ -531,6 +534,9 @@ public class LevelImporterWindow : EditorWindow
 
         try
         {
+            // timings of every blender job in the import, packer imports nest into this one
+            BlenderTimings.Begin($"import level {mapName}");
+
             //ImportWorldConfig(destMapBinFolder, destMapFolder, assetImports);
             //ImportSky(destMapBinFolder, destMapFolder, assetImports);
             //ImportMobys(destMapBinFolder, destMapFolder, assetImports);
@@ -639,6 +645,7 @@ public class LevelImporterWindow : EditorWindow
                 postAction?.Invoke();
 
             if (rootGo) rootGo.transform.SetAsLastSibling();
+            BlenderTimings.End();
             FinalizeImport();
         }
     }
@@ -676,6 +683,9 @@ public class LevelImporterWindow : EditorWindow
 
         try
         {
+            // timings of every blender job in the import, packer imports nest into this one
+            BlenderTimings.Begin($"import merge {destMapName}");
+
             // prepare
             UpdateImportProgressBar(ImportStage.Preparing_Map_Files);
             PrepareMapResourceFolder(destMapFolder, tempMapBinFolder);
@@ -742,6 +752,7 @@ public class LevelImporterWindow : EditorWindow
                 postAction?.Invoke();
 
             if (rootGo) rootGo.transform.SetAsLastSibling();
+            BlenderTimings.End();
             FinalizeImport();
         }
     }
@@ -1764,25 +1775,56 @@ public class LevelImporterWindow : EditorWindow
             AssetDatabase.CreateAsset(mat, outMatFile);
         }
 
-        BlenderHelper.ImportMesh(terrainOutColladaFile, terrainMapResourcesFolder, "tfrags", overwrite: true, out var outMeshFile, fixNormals: false);
-        AssetDatabase.ImportAsset(UnityHelper.GetProjectRelativePath(outMeshFile));
-        SetModelImportSettings(outMeshFile, addCollider: false, remapMaterials: true);
+        // terrain is split into tiles converted in parallel, each its own asset so unity can cull them separately
+        var tiles = BlenderHelper.ImportMeshTiles(terrainOutColladaFile, terrainMapResourcesFolder, "tfrags", ".fbx", TfragTileSize, fixNormals: false);
+        if (tiles == null) return;
 
-        // spawn instance
-        var tfragPrefab = AssetDatabase.LoadAssetAtPath<GameObject>(UnityHelper.GetProjectRelativePath(outMeshFile));
-        if (tfragPrefab)
+        // a missing tile leaves a hole in the terrain, so don't spawn the rest without asking
+        var failedTiles = tiles.Where(x => !x.Success).ToList();
+        if (failedTiles.Any())
         {
-            var tfragGo = (GameObject)PrefabUtility.InstantiatePrefab(tfragPrefab);
-            if (tfragGo)
-            {
-                tfragGo.transform.SetParent(rootGo.transform, true);
-                var tfrag = tfragGo.AddComponent<Tfrag>();
-                tfragGo.layer = LayerMask.NameToLayer("OCCLUSION_BAKE");
-                UnityHelper.RecurseHierarchy(tfragGo.transform, (t) => t.gameObject.layer = tfragGo.layer);
+            foreach (var tile in failedTiles)
+                Debug.LogError($"Failed to convert terrain tile {Path.GetFileName(tile.OutMeshFile)}: {tile.Error}");
 
-                // populate tfrag chunks
-                ReadTfragChunks(mapBinFolder, tfrag);
-            }
+            if (!EditorUtility.DisplayDialog(WindowTitle, $"{failedTiles.Count} of {tiles.Count} terrain tiles failed to convert, see the console for details.\nWould you like to import the remaining tiles anyway?", "Continue", "Skip Terrain"))
+                return;
+        }
+
+        foreach (var tile in tiles.Where(x => x.Success))
+        {
+            AssetDatabase.ImportAsset(UnityHelper.GetProjectRelativePath(tile.OutMeshFile));
+            SetModelImportSettings(tile.OutMeshFile, addCollider: false, configure: (importer) => RemapTfragTileMaterials(importer, terrainMaterialsMapResourcesFolder));
+        }
+
+        // spawn instances
+        var tfragGo = new GameObject("tfrags");
+        tfragGo.transform.SetParent(rootGo.transform, true);
+        var tfrag = tfragGo.AddComponent<Tfrag>();
+        tfragGo.layer = LayerMask.NameToLayer("OCCLUSION_BAKE");
+
+        foreach (var tile in tiles.Where(x => x.Success))
+        {
+            var tilePrefab = AssetDatabase.LoadAssetAtPath<GameObject>(UnityHelper.GetProjectRelativePath(tile.OutMeshFile));
+            if (!tilePrefab) continue;
+
+            var tileGo = (GameObject)PrefabUtility.InstantiatePrefab(tilePrefab);
+            if (tileGo) tileGo.transform.SetParent(tfragGo.transform, true);
+        }
+
+        UnityHelper.RecurseHierarchy(tfragGo.transform, (t) => t.gameObject.layer = tfragGo.layer);
+
+        // populate tfrag chunks
+        ReadTfragChunks(mapBinFolder, tfrag);
+    }
+
+    // tile models are named after their tile, so map their materials to the shared tfrag materials by name
+    // only adds the remaps, the caller reimports
+    void RemapTfragTileMaterials(ModelImporter importer, string materialsFolder)
+    {
+        foreach (var material in AssetDatabase.LoadAllAssetRepresentationsAtPath(importer.assetPath).OfType<Material>())
+        {
+            var tfragMaterial = AssetDatabase.LoadAssetAtPath<Material>(Path.Combine(materialsFolder, $"tfrags-{material.name}.mat"));
+            if (tfragMaterial) importer.AddRemap(new AssetImporter.SourceAssetIdentifier(material), tfragMaterial);
         }
     }
 
@@ -1795,6 +1837,9 @@ public class LevelImporterWindow : EditorWindow
         if (!File.Exists(terrainBinFile))
             return;
 
+        // chunks are spread across the tiles
+        var chunkTransforms = tfrag.GetComponentsInChildren<Transform>().GroupBy(x => x.name).ToDictionary(x => x.Key, x => x.First());
+
         // import instances
         var instancesById = new Dictionary<int, TfragChunk>();
         using (var fs = File.OpenRead(terrainBinFile))
@@ -1807,7 +1852,7 @@ public class LevelImporterWindow : EditorWindow
                 for (int i = 0; i < packetCount; i++)
                 {
                     // find chunk gameobject
-                    var chunkTransform = tfrag.transform.Find($"tfrag_{i}");
+                    var chunkTransform = chunkTransforms.GetValueOrDefault($"tfrag_{i}");
                     if (!chunkTransform)
                     {
                         Debug.LogError($"Unable to find matching tfrag chunk for chunk {i}. Tfrag rebuilding may be broken.");
@@ -2209,7 +2254,7 @@ public class LevelImporterWindow : EditorWindow
             dzoConfig.DefaultCameraPosition.transform.position = (center / count) + Vector3.up * 15f;
     }
 
-    void SetModelImportSettings(string path, bool addCollider, bool remapMaterials = false, string[] labels = null)
+    void SetModelImportSettings(string path, bool addCollider, bool remapMaterials = false, string[] labels = null, Action<ModelImporter> configure = null)
     {
         var assetPath = UnityHelper.GetProjectRelativePath(path);
         ModelImporter importer = (ModelImporter)ModelImporter.GetAtPath(assetPath);
@@ -2230,6 +2275,7 @@ public class LevelImporterWindow : EditorWindow
         }
 
         if (remapMaterials) importer.SearchAndRemapMaterials(ModelImporterMaterialName.BasedOnModelNameAndMaterialName, ModelImporterMaterialSearch.Local);
+        configure?.Invoke(importer);
         importer.SaveAndReimport();
     }
 
@@ -146,11 +146,13 @@ public class PackerImporterWindow : EditorWindow
 
         try
         {
+            BlenderTimings.Begin($"import {imports.Count} assets");
             List<(PackerAssetImport, string, string)> modelsToConfigureImporterSettings = new List<(PackerAssetImport, string, string)>();
             List<bool> modelPrependedToTextureNames = new List<bool>();
             List<(PackerAssetImport Import, string Path, int Idx)> texturesToConfigureImporterSettings = new List<(PackerAssetImport, string, int)>();
             List<(PackerAssetImport Import, string ColladaPath)> importedColladaFiles = new List<(PackerAssetImport Import, string ColladaPath)>();
             List<string> materialsToConfigureImporterSettings = new List<string>();
+            List<(PackerAssetImport Import, BlenderHelper.MeshConversion Conversion, string ClassName)> meshConversions = new List<(PackerAssetImport, BlenderHelper.MeshConversion, string)>();
             var cancel = false;
 
             AssetDatabase.StartAssetEditing();
@@ -311,29 +313,12 @@ public class PackerImporterWindow : EditorWindow
                                             break;
                                     }
 
-                                    // import mesh
-                                    if (!BlenderHelper.ImportMesh(meshFileName, assetDestFolder, className, overwrite, out var outPath, fixNormals: true)) continue;
-
-                                    // import collision
-                                    if (import.GenerateCollisionId.HasValue)
-                                    {
-                                        var colFile = Path.Combine(assetDestFolder, $"{className}_col.fbx");
-                                        BlenderHelper.PrepareMeshFileForCollider(meshFileName, colFile, $"col_{import.GenerateCollisionId.Value:x}");
-
-                                        if (File.Exists(colFile))
-                                        {
-                                            lock (lockObject)
-                                            {
-                                                modelsToConfigureImporterSettings.Add((import, "Collider", colFile));
-                                                modelPrependedToTextureNames.Add(import.PrependModelNameToTextures);
-                                            }
-                                        }
-                                    }
+                                    // queue mesh for batch conversion
+                                    if (!BlenderHelper.TryCreateMeshConversion(meshFileName, assetDestFolder, className, ".fbx", overwrite, fixNormals: true, out var meshConversion)) continue;
 
                                     lock (lockObject)
                                     {
-                                        modelsToConfigureImporterSettings.Add((import, import.AssetType, outPath));
-                                        modelPrependedToTextureNames.Add(import.PrependModelNameToTextures);
+                                        meshConversions.Add((import, meshConversion, className));
                                     }
                                     break;
                                 }
@@ -398,9 +383,10 @@ public class PackerImporterWindow : EditorWindow
                 lock (lockObject) { ++i; }
             })).ToArray();
 
-            // import each action in parallel
+            // import each action in parallel, at most one per blender worker
             // wrap in Task.Run so that it's non blocking
-            Task.Run(() => Parallel.Invoke(importActions.ToArray()));
+            var parallelOptions = new ParallelOptions() { MaxDegreeOfParallelism = BlenderHelper.GetWorkerCount() };
+            Task.Run(() => Parallel.Invoke(parallelOptions, importActions.ToArray()));
 
             // wait for imports to finish
             while (i < imports.Count)
@@ -411,6 +397,56 @@ public class PackerImporterWindow : EditorWindow
                 Thread.Sleep(100);
             }
 
+            // convert meshes in batches
+            // so each blender session handles many assets
+            if (!cancel && meshConversions.Any())
+            {
+                var cancellationTokenSource = new CancellationTokenSource();
+                var convertTask = Task.Run(async () =>
+                {
+                    await BlenderHelper.ConvertMeshesAsync(meshConversions.Select(x => x.Conversion).ToList(), cancellationTokenSource.Token);
+
+                    // import collision
+                    await Task.WhenAll(meshConversions.Select(async (meshConversion) =>
+                    {
+                        var import = meshConversion.Import;
+                        if (!meshConversion.Conversion.Success || !import.GenerateCollisionId.HasValue) return;
+
+                        var colFile = Path.Combine(import.DestinationFolder, $"{meshConversion.ClassName}_col.fbx");
+                        await BlenderHelper.PrepareMeshFileForColliderAsync(meshConversion.Conversion.MeshFile, colFile, $"col_{import.GenerateCollisionId.Value:x}", cancellationTokenSource.Token);
+
+                        if (File.Exists(colFile))
+                        {
+                            lock (lockObject)
+                            {
+                                modelsToConfigureImporterSettings.Add((import, "Collider", colFile));
+                                modelPrependedToTextureNames.Add(import.PrependModelNameToTextures);
+                            }
+                        }
+                    }));
+                });
+
+                while (!convertTask.IsCompleted)
+                {
+                    if (!cancel && EditorUtility.DisplayCancelableProgressBar($"Importing", $"Converting {meshConversions.Count} meshes", 1f))
+                    {
+                        cancel = true;
+                        cancellationTokenSource.Cancel();
+                    }
+
+                    Thread.Sleep(100);
+                }
+
+                if (convertTask.Exception != null)
+                    Debug.LogException(convertTask.Exception);
+
+                foreach (var meshConversion in meshConversions.Where(x => x.Conversion.Success))
+                {
+                    modelsToConfigureImporterSettings.Add((meshConversion.Import, meshConversion.Import.AssetType, meshConversion.Conversion.OutMeshFile));
+                    modelPrependedToTextureNames.Add(meshConversion.Import.PrependModelNameToTextures);
+                }
+            }
+
             AssetDatabase.StopAssetEditing();
             AssetDatabase.Refresh();
 
@@ -500,6 +536,7 @@ public class PackerImporterWindow : EditorWindow
         }
         finally
         {
+            BlenderTimings.End();
             EditorUtility.ClearProgressBar();
             AssetDatabase.SaveAssets();
             AssetDatabase.Refresh(ImportAssetOptions.ForceUpdate);
@@ -35,6 +35,19 @@ public class ForgeSettingsEditor : Editor
         forgeSettings.SelectionColor = EditorGUILayout.ColorField("Selection Color", forgeSettings.SelectionColor);
         Shader.SetGlobalColor("_FORGE_SELECTION_COLOR", forgeSettings.SelectionColor);
 
+        // blender
+        var blenderWorkerCount = Mathf.Max(0, EditorGUILayout.IntField("Blender Workers (0 = Auto)", forgeSettings.BlenderWorkerCount));
+        var blenderJobTimeoutMinutes = Mathf.Max(1, EditorGUILayout.IntField("Blender Job Timeout (Minutes)", forgeSettings.BlenderJobTimeoutMinutes));
+        var collisionShardCount = Mathf.Max(0, EditorGUILayout.IntField("Collision Shards (0 = Auto)", forgeSettings.CollisionShardCount));
+        if (blenderWorkerCount != forgeSettings.BlenderWorkerCount || blenderJobTimeoutMinutes != forgeSettings.BlenderJobTimeoutMinutes || collisionShardCount != forgeSettings.CollisionShardCount)
+        {
+            forgeSettings.BlenderWorkerCount = blenderWorkerCount;
+            forgeSettings.BlenderJobTimeoutMinutes = blenderJobTimeoutMinutes;
+            forgeSettings.CollisionShardCount = collisionShardCount;
+            BlenderHelper.ApplySettings(forgeSettings);
+            EditorUtility.SetDirty(target);
+        }
+
         // init build folders
         if (forgeSettings.DLBuildFolders == null)
             forgeSettings.DLBuildFolders = new string[0];
@@ -0,0 +1,160 @@
+using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.IO;
+using System.Linq;
+using System.Security.Cryptography;
+using System.Text;
+
+// local store of blender script outputs keyed by a hash of everything that affects them
+// lets re-imports skip blender when nothing has changed
+public static class BlenderCache
+{
+    public static bool Enabled = true;
+    public static long MaxCacheSizeBytes = 4L * 1024 * 1024 * 1024;
+
+    static readonly string CacheFolderName = "blender-cache";
+    static readonly object evictLock = new object();
+    static string blenderVersion = null;
+
+    public static string GetCacheFolder()
+    {
+        var path = Path.Combine(FolderNames.GetTempFolder(), CacheFolderName);
+        if (!Directory.Exists(path)) Directory.CreateDirectory(path);
+        return path;
+    }
+
+    // folder for scripts that keep their own finer grained cache, one per source file
+    public static string GetScriptCacheFolder(string pythonScript, string sourceFile)
+    {
+        if (!Enabled) return null;
+
+        using (var sha = SHA256.Create())
+        {
+            var pathHash = BitConverter.ToString(sha.ComputeHash(Encoding.UTF8.GetBytes(Path.GetFullPath(sourceFile).ToLowerInvariant()))).Replace("-", "").Substring(0, 16).ToLowerInvariant();
+            var path = Path.Combine(GetCacheFolder(), Path.GetFileNameWithoutExtension(pythonScript), pathHash);
+            if (!Directory.Exists(path)) Directory.CreateDirectory(path);
+            return path.Replace("\\", "/");
+        }
+    }
+
+    public static string GetKey(string pythonScript, string[] inputFiles, params string[] args)
+    {
+        using (var hash = IncrementalHash.CreateHash(HashAlgorithmName.SHA256))
+        {
+            void AppendString(string value) => hash.AppendData(Encoding.UTF8.GetBytes((value ?? "") + "\0"));
+            void AppendFile(string path)
+            {
+                using (var fs = File.OpenRead(path))
+                {
+                    var buffer = new byte[1024 * 1024];
+                    int read;
+                    while ((read = fs.Read(buffer, 0, buffer.Length)) > 0)
+                        hash.AppendData(buffer, 0, read);
+                }
+            }
+
+            // blender version and scripts
+            AppendString(GetBlenderVersion());
+            AppendFile(Path.Combine(FolderNames.BlenderScriptFolder, pythonScript));
+            foreach (var module in Directory.GetFiles(FolderNames.BlenderScriptFolder, "forge_*.py").OrderBy(x => x, StringComparer.Ordinal))
+                AppendFile(module);
+
+            // inputs
+            foreach (var inputFile in inputFiles)
+                AppendFile(inputFile);
+            foreach (var arg in args)
+                AppendString(arg);
+
+            return BitConverter.ToString(hash.GetHashAndReset()).Replace("-", "").ToLowerInvariant();
+        }
+    }
+
+    public static bool TryRestore(string key, string outFile)
+    {
+        if (!Enabled || key == null) return false;
+
+        var cachedFile = GetCachedFilePath(key, outFile);
+        if (!File.Exists(cachedFile)) return false;
+
+        try
+        {
+            // mark as recently used
+            File.SetLastWriteTimeUtc(cachedFile, DateTime.UtcNow);
+            File.Copy(cachedFile, outFile, true);
+            return true;
+        }
+        catch (IOException)
+        {
+            // evicted by another thread
+            return false;
+        }
+    }
+
+    public static void Store(string key, string outFile)
+    {
+        if (!Enabled || key == null || !File.Exists(outFile)) return;
+
+        var cachedFile = GetCachedFilePath(key, outFile);
+        var tempFile = cachedFile + "." + Guid.NewGuid().ToString("N") + ".tmp";
+
+        try
+        {
+            File.Copy(outFile, tempFile, true);
+            if (File.Exists(cachedFile)) File.Delete(cachedFile);
+            File.Move(tempFile, cachedFile);
+        }
+        catch (IOException)
+        {
+            // another thread stored the same key
+            if (File.Exists(tempFile)) File.Delete(tempFile);
+        }
+
+        Evict();
+    }
+
+    public static void Clear()
+    {
+        var path = Path.Combine(FolderNames.GetTempFolder(), CacheFolderName);
+        if (Directory.Exists(path)) Directory.Delete(path, true);
+    }
+
+    static void Evict()
+    {
+        lock (evictLock)
+        {
+            // remove least recently used entries until under the size limit
+            // including the per object entries scripts keep in their own subfolders
+            var files = new DirectoryInfo(GetCacheFolder()).GetFiles("*", SearchOption.AllDirectories).OrderBy(x => x.LastWriteTimeUtc).ToList();
+            var totalSize = files.Sum(x => x.Length);
+
+            foreach (var file in files)
+            {
+                if (totalSize <= MaxCacheSizeBytes) break;
+
+                try
+                {
+                    totalSize -= file.Length;
+                    file.Delete();
+                }
+                catch (IOException) { }
+            }
+        }
+    }
+
+    static string GetCachedFilePath(string key, string outFile)
+    {
+        return Path.Combine(GetCacheFolder(), key + Path.GetExtension(outFile));
+    }
+
+    static string GetBlenderVersion()
+    {
+        if (blenderVersion == null)
+        {
+            var blenderPath = BlenderHelper.GetBlenderPath();
+            blenderVersion = File.Exists(blenderPath) ? $"{FileVersionInfo.GetVersionInfo(blenderPath).FileVersion} {File.GetLastWriteTimeUtc(blenderPath).Ticks}" : "";
+        }
+
+        return blenderVersion;
+    }
+}
@@ -1,33 +1,123 @@
 using System;
 using System.Collections;
 using System.Collections.Generic;
+using System.Globalization;
 using System.IO;
 using System.Linq;
 using System.Text;
+using System.Threading;
+using System.Threading.Tasks;
+using Newtonsoft.Json.Linq;
 using UnityEditor;
 using UnityEngine;
 
 public static class BlenderHelper
 {
+    public static bool UseWorkers = true;
+    public static int WorkerCount = 0;
+    public static int CollisionShardCount = 0;
+    public static long CollisionShardMinInputBytes = 16L * 1024 * 1024;
+    public static TimeSpan JobTimeout = TimeSpan.FromMinutes(30);
+    public static readonly TimeSpan WorkerIdleTimeout = TimeSpan.FromMinutes(5);
+
+    static BlenderWorkerPool pool = null;
+    static readonly object poolLock = new object();
+
     public static string GetBlenderPath()
     {
         return Win32Helper.AssocQueryString(Win32Helper.AssocStr.Executable, ".blend");
     }
 
-    public static bool RunBlender(string pythonScript, string args, string blendFile = null)
+    [InitializeOnLoadMethod]
+    static void RegisterWorkerShutdown()
     {
-        var sbError = new StringBuilder();
-        var sbOut = new StringBuilder();
+        AssemblyReloadEvents.beforeAssemblyReload += ShutdownWorkers;
+        EditorApplication.quitting += ShutdownWorkers;
+
+        // settings can't be loaded until the asset database is ready
+        EditorApplication.delayCall += () =>
+        {
+            var settings = ForgeSettings.Load();
+            if (settings) ApplySettings(settings);
+        };
+    }
+
+    public static void ApplySettings(ForgeSettings settings)
+    {
+        WorkerCount = settings.BlenderWorkerCount;
+        CollisionShardCount = settings.CollisionShardCount;
+        if (settings.BlenderJobTimeoutMinutes > 0) JobTimeout = TimeSpan.FromMinutes(settings.BlenderJobTimeoutMinutes);
+    }
 
+    // defaults to one worker per physical core
+    // blender is mostly single threaded and hyperthreads don't help it much
+    public static int GetWorkerCount()
+    {
+        if (WorkerCount > 0) return WorkerCount;
+        return Math.Max(1, Environment.ProcessorCount / 2);
+    }
+
+    public static void ShutdownWorkers()
+    {
+        lock (poolLock)
+        {
+            pool?.Dispose();
+            pool = null;
+        }
+    }
+
+    static BlenderWorkerPool GetPool(string blenderPath)
+    {
+        lock (poolLock)
+        {
+            // let the old pool finish its queue when the worker count changes
+            var workerCount = GetWorkerCount();
+            if (pool != null && pool.WorkerCount != workerCount)
+            {
+                pool.Close();
+                pool = null;
+            }
+
+            if (pool == null)
+                pool = new BlenderWorkerPool(blenderPath, workerCount, UseWorkers, WorkerIdleTimeout);
+
+            return pool;
+        }
+    }
+
+    public static bool RunBlender(string pythonScript, string[] args, string blendFile = null)
+    {
+        try
+        {
+            return RunBlenderAsync(pythonScript, args, blendFile).GetAwaiter().GetResult();
+        }
+        catch (OperationCanceledException)
+        {
+            return false;
+        }
+    }
+
+    // queues the script on the worker pool
+    // completes with the script's result, or is cancelled if the token fires or the pool shuts down
+    public static Task<bool> RunBlenderAsync(string pythonScript, string[] args, string blendFile = null, TimeSpan? timeout = null, CancellationToken cancellationToken = default)
+    {
         // we need blender
         var blenderPath = GetBlenderPath();
-        var pyScriptPath = Path.GetFullPath(Path.Combine(FolderNames.BlenderScriptFolder, pythonScript)).Replace("\\", "/");
         if (!File.Exists(blenderPath))
         {
             throw new System.Exception("Blender not found! Please install Blender.");
         }
 
-        var processArgs = $"--background --python \"{pyScriptPath}\" -- {args}";
+        return GetPool(blenderPath).Enqueue(pythonScript, args, blendFile, timeout ?? JobTimeout, cancellationToken);
+    }
+
+    public static bool RunBlenderProcess(string blenderPath, string pythonScript, string[] args, string blendFile, TimeSpan timeout, CancellationToken cancellationToken, out string output)
+    {
+        var sbError = new StringBuilder();
+        var sbOut = new StringBuilder();
+
+        var pyScriptPath = Path.GetFullPath(Path.Combine(FolderNames.BlenderScriptFolder, pythonScript)).Replace("\\", "/");
+        var processArgs = $"--background --python \"{pyScriptPath}\" -- {String.Join(" ", args.Select(x => "\"" + x + "\""))}";
         if (!String.IsNullOrEmpty(blendFile)) processArgs = $"\"{blendFile}\" " + processArgs;
         var startInfo = new System.Diagnostics.ProcessStartInfo(Path.GetFullPath(blenderPath), processArgs)
         {
@@ -38,151 +128,386 @@ public static class BlenderHelper
             UseShellExecute = false,
         };
 
-        var p = new System.Diagnostics.Process() { StartInfo = startInfo };
-        p.OutputDataReceived += (s, e) => { sbOut.AppendLine(e.Data); };
-        p.ErrorDataReceived += (s, e) => { sbError.AppendLine(e.Data); };
-        p.Start();
-        p.BeginOutputReadLine();
-        p.BeginErrorReadLine();
+        using (var p = new System.Diagnostics.Process() { StartInfo = startInfo })
+        {
+            p.OutputDataReceived += (s, e) => { if (!BlenderTimings.TryRecordLine(pythonScript, e.Data)) sbOut.AppendLine(e.Data); };
+            p.ErrorDataReceived += (s, e) => { sbError.AppendLine(e.Data); };
+            p.Start();
+            p.BeginOutputReadLine();
+            p.BeginErrorReadLine();
+
+            if (!WaitForProcess(p, timeout, cancellationToken))
+            {
+                output = $"Timed out after {timeout}: out:{sbOut} error:{sbError}";
+                return false;
+            }
+
+            output = $"{p.ExitCode}: out:{sbOut} error:{sbError}";
+            return p.ExitCode == 1;
+        }
+    }
+
+    // polls so cancellation is noticed while the process runs
+    // kills it and returns false on timeout, kills it and throws on cancellation
+    static bool WaitForProcess(System.Diagnostics.Process p, TimeSpan timeout, CancellationToken cancellationToken)
+    {
+        var stopwatch = System.Diagnostics.Stopwatch.StartNew();
+        while (!p.WaitForExit(100))
+        {
+            if (cancellationToken.IsCancellationRequested || (timeout != Timeout.InfiniteTimeSpan && stopwatch.Elapsed > timeout))
+            {
+                try { p.Kill(); } catch (Exception) { }
+                cancellationToken.ThrowIfCancellationRequested();
+                return false;
+            }
+        }
+
+        // flushes the redirected output
         p.WaitForExit();
+        return true;
+    }
 
-        if (p.ExitCode != 1) Debug.LogError($"{p.ExitCode}: out:{sbOut} error:{sbError}");
-        return p.ExitCode == 1;
+    public static bool PackCollision(string inBlendFile, string outDaeFile, string outReportFile, params string[] additionalMeshes)
+    {
+        try
+        {
+            return PackCollisionAsync(inBlendFile, outDaeFile, outReportFile, additionalMeshes).GetAwaiter().GetResult();
+        }
+        catch (OperationCanceledException)
+        {
+            return false;
+        }
     }
 
-    public static bool PackCollision(string inBlendFile, string outDaeFile, params string[] additionalMeshes)
+    public static async Task<bool> PackCollisionAsync(string inBlendFile, string outDaeFile, string outReportFile, string[] additionalMeshes, CancellationToken cancellationToken = default)
     {
         inBlendFile = Path.GetFullPath(inBlendFile).Replace("\\", "/");
         outDaeFile = Path.GetFullPath(outDaeFile).Replace("\\", "/");
+        additionalMeshes = additionalMeshes.Select(x => Path.GetFullPath(x).Replace("\\", "/")).ToArray();
+
+        // objects are appended from the blend so only they and what they use are loaded
+        var inputArgs = new List<string>() { outDaeFile, "--blend", inBlendFile };
+        inputArgs.AddRange(additionalMeshes);
+
+        // validation results, written even when validation fails
+        var reportArgs = new List<string>();
+        if (!String.IsNullOrEmpty(outReportFile)) reportArgs.AddRange(new[] { "--report", Path.GetFullPath(outReportFile).Replace("\\", "/") });
+
+        // unchanged objects are reused from the previous bake
+        var cacheArgs = new List<string>();
+        var cacheFolder = BlenderCache.GetScriptCacheFolder("export-collision.py", inBlendFile);
+        if (cacheFolder != null) cacheArgs.AddRange(new[] { "--cache", cacheFolder });
+
+        var shardCount = GetCollisionShardCount(new[] { inBlendFile }.Concat(additionalMeshes));
+        if (shardCount <= 1)
+            return await RunBlenderAsync("export-collision.py", inputArgs.Concat(reportArgs).Concat(cacheArgs).ToArray(), cancellationToken: cancellationToken).ConfigureAwait(false);
 
-        var additionalMeshesArgs = String.Join(" ", additionalMeshes.Select(x => "\"" + Path.GetFullPath(x).Replace("\\", "/") + "\""));
+        // each shard subdivides and triangulates the objects in its tiles of the level
+        // then a single pass merges them into the same collision a single process would export
+        var shardFolder = Path.Combine(FolderNames.GetTempFolder(), "collision-shards", Guid.NewGuid().ToString("N"));
+        Directory.CreateDirectory(shardFolder);
 
-        return RunBlender("export-collision.py", "\"" + outDaeFile + "\" " + additionalMeshesArgs, blendFile: inBlendFile);
+        try
+        {
+            var shardFiles = Enumerable.Range(0, shardCount).Select(x => Path.Combine(shardFolder, $"shard-{x}.npz").Replace("\\", "/")).ToArray();
+            var shardResults = await Task.WhenAll(shardFiles.Select((shardFile, i) =>
+                RunBlenderAsync("export-collision.py", inputArgs.Concat(cacheArgs).Concat(new[] { "--shard", $"{i}/{shardCount}", "--shard-out", shardFile }).ToArray(), cancellationToken: cancellationToken))).ConfigureAwait(false);
+            if (!shardResults.All(x => x)) return false;
+
+            var mergeArgs = new List<string>() { outDaeFile, "--merge-shards", String.Join(";", shardFiles) };
+            return await RunBlenderAsync("export-collision.py", mergeArgs.Concat(reportArgs).Concat(cacheArgs).ToArray(), cancellationToken: cancellationToken).ConfigureAwait(false);
+        }
+        finally
+        {
+            try { Directory.Delete(shardFolder, true); }
+            catch (IOException) { }
+        }
+    }
+
+    // small levels bake faster in one process than paying for several blender startups and loads
+    static int GetCollisionShardCount(IEnumerable<string> inputFiles)
+    {
+        if (CollisionShardCount > 0) return CollisionShardCount;
+
+        var inputBytes = inputFiles.Where(File.Exists).Sum(x => new FileInfo(x).Length);
+        return inputBytes < CollisionShardMinInputBytes ? 1 : GetWorkerCount();
     }
 
     public static bool PrepareFileForShrubConvert(string inFile, string outGlbFile, string objectsToSelect)
+    {
+        return PrepareFileForShrubConvert(inFile, new[] { (outGlbFile, objectsToSelect) });
+    }
+
+    // prepares the model once and exports each group of objects to its own glb
+    public static bool PrepareFileForShrubConvert(string inFile, IEnumerable<(string OutGlbFile, string ObjectsToSelect)> exportGroups)
     {
         inFile = Path.GetFullPath(inFile).Replace("\\", "/");
-        outGlbFile = Path.GetFullPath(outGlbFile).Replace("\\", "/");
 
-        return RunBlender("prepare-model-for-shrub-convert.py", "\"" + inFile + "\"" + " \"" + outGlbFile + "\"" + " \"" + objectsToSelect + "\"");
+        var args = new List<string>() { inFile };
+        foreach (var exportGroup in exportGroups)
+        {
+            args.Add(Path.GetFullPath(exportGroup.OutGlbFile).Replace("\\", "/"));
+            args.Add(exportGroup.ObjectsToSelect ?? "");
+        }
+
+        return RunBlender("prepare-model-for-shrub-convert.py", args.ToArray());
+    }
+
+    public static bool PrepareMeshFileForCollider(string inFile, string outFile, string defaultMatId)
+    {
+        try
+        {
+            return PrepareMeshFileForColliderAsync(inFile, outFile, defaultMatId).GetAwaiter().GetResult();
+        }
+        catch (OperationCanceledException)
+        {
+            return false;
+        }
     }
 
-    public static bool PrepareMeshFileForCollider(string inFile, string outFbxFile, string defaultMatId)
+    public static async Task<bool> PrepareMeshFileForColliderAsync(string inFile, string outFile, string defaultMatId, CancellationToken cancellationToken = default)
     {
         inFile = Path.GetFullPath(inFile).Replace("\\", "/");
-        outFbxFile = Path.GetFullPath(outFbxFile).Replace("\\", "/");
+        outFile = Path.GetFullPath(outFile).Replace("\\", "/");
 
-        return RunBlender("prepare-model-for-collider.py", "\"" + inFile + "\"" + " \"" + outFbxFile + "\"" + " \"" + defaultMatId + "\"");
+        var cacheKey = BlenderCache.GetKey("prepare-model-for-collider.py", new[] { inFile }, outFile, defaultMatId);
+        if (BlenderCache.TryRestore(cacheKey, outFile)) return true;
+
+        var result = await RunBlenderAsync("prepare-model-for-collider.py", new[] { inFile, outFile, defaultMatId }, cancellationToken: cancellationToken).ConfigureAwait(false);
+        if (result) BlenderCache.Store(cacheKey, outFile);
+        return result;
     }
 
     public static bool ImportMesh(string meshFile, string outDir, string name, bool overwrite, out string outMeshFile, bool fixNormals = false)
     {
-        var extension = Path.GetExtension(meshFile);
+        return ImportMesh(meshFile, outDir, name, ".fbx", overwrite, out outMeshFile, fixNormals);
+    }
 
-        // import mesh
-        meshFile = Path.GetFullPath(meshFile).Replace("\\", "/");
-        outMeshFile = Path.GetFullPath(Path.Combine(outDir, $"{name}.fbx")).Replace("\\", "/");
+    public static bool ImportMeshAsBlend(string meshFile, string outDir, string name, bool overwrite, out string outMeshFile, bool fixNormals = false)
+    {
+        return ImportMesh(meshFile, outDir, name, ".blend", overwrite, out outMeshFile, fixNormals);
+    }
 
-        // check the file we want to import exists
-        // and that the out file doesn't exist, or overwrite existing
-        if (File.Exists(meshFile) && (overwrite || !File.Exists(outMeshFile)))
+    public static bool ImportMeshAsGlb(string meshFile, string outDir, string name, bool overwrite, out string outMeshFile, bool fixNormals = false)
+    {
+        return ImportMesh(meshFile, outDir, name, ".glb", overwrite, out outMeshFile, fixNormals);
+    }
+
+    static bool ImportMesh(string meshFile, string outDir, string name, string outExtension, bool overwrite, out string outMeshFile, bool fixNormals)
+    {
+        outMeshFile = Path.GetFullPath(Path.Combine(outDir, $"{name}{outExtension}")).Replace("\\", "/");
+        if (!TryCreateMeshConversion(meshFile, outDir, name, outExtension, overwrite, fixNormals, out var conversion))
+            return false;
+
+        // reuse cached output when the input hasn't changed
+        conversion.CacheKey = GetConversionCacheKey(conversion);
+        conversion.Success = BlenderCache.TryRestore(conversion.CacheKey, conversion.OutMeshFile);
+        if (!conversion.Success)
         {
-            switch (extension)
-            {
-                case ".dae":
-                    File.WriteAllText(meshFile, File.ReadAllText(meshFile).Replace("mat_", ""));
-                    RunBlender("convert-mesh.py", $"\"{meshFile}\" \"{outMeshFile}\" {(fixNormals ? "1" : "0")}");
-                    break;
-                default:
-                    RunBlender("convert-mesh.py", $"\"{meshFile}\" \"{outMeshFile}\" {(fixNormals ? "1" : "0")}");
-                    break;
-            }
+            var args = new List<string>() { conversion.MeshFile, conversion.OutMeshFile, fixNormals ? "1" : "0" };
+            if (conversion.MaterialPrefix != null) args.AddRange(new[] { "--strip-material-prefix", conversion.MaterialPrefix });
 
-            if (File.Exists(outMeshFile))
-            {
-                //AssetDatabase.ImportAsset(outMeshFile, ImportAssetOptions.Default);
-                return true;
-            }
-            else
-            {
-                Debug.Log($"Failed to import mesh {meshFile}");
-            }
+            // an existing output from an earlier import doesn't mean this conversion worked
+            conversion.Success = RunBlender("convert-mesh.py", args.ToArray()) && File.Exists(conversion.OutMeshFile);
+            if (conversion.Success)
+                BlenderCache.Store(conversion.CacheKey, conversion.OutMeshFile);
+        }
+
+        if (conversion.Success)
+        {
+            return true;
+        }
+        else
+        {
+            Debug.Log($"Failed to import mesh {meshFile}");
         }
 
         return false;
     }
 
-    public static bool ImportMeshAsBlend(string meshFile, string outDir, string name, bool overwrite, out string outMeshFile, bool fixNormals = false)
+    public class MeshConversion
+    {
+        public string MeshFile;
+        public string OutMeshFile;
+        public bool FixNormals;
+        public bool Success;
+        public string Error;
+        public string CacheKey;
+
+        // only these objects are converted from a .blend input
+        public string[] ObjectNames;
+
+        // hash of just the converted objects, used instead of hashing the whole input file
+        public string ContentHash;
+
+        // stripped from material names after import
+        public string MaterialPrefix;
+    }
+
+    // wrench prefixes collada material names with this, unity materials are matched without it
+    static string GetMaterialPrefix(string meshFile)
+    {
+        return Path.GetExtension(meshFile) == ".dae" ? "mat_" : null;
+    }
+
+    static string GetConversionCacheKey(MeshConversion conversion)
     {
-        var extension = Path.GetExtension(meshFile);
+        if (conversion.ContentHash != null)
+            return BlenderCache.GetKey("convert-mesh.py", new string[0], conversion.OutMeshFile, conversion.FixNormals ? "1" : "0", conversion.ContentHash);
+
+        return BlenderCache.GetKey("convert-mesh.py", new[] { conversion.MeshFile }, conversion.OutMeshFile, conversion.FixNormals ? "1" : "0", conversion.MaterialPrefix ?? "");
+    }
 
-        // import mesh
+    public static List<MeshConversion> ImportMeshTiles(string meshFile, string outDir, string name, string outExtension, float tileSize, bool fixNormals = false)
+    {
+        try
+        {
+            return ImportMeshTilesAsync(meshFile, outDir, name, outExtension, tileSize, fixNormals).GetAwaiter().GetResult();
+        }
+        catch (OperationCanceledException)
+        {
+            return null;
+        }
+    }
+
+    // splits a mesh into tiles of tileSize by object and converts each tile to {name}_{x}_{y} in parallel
+    // the mesh is imported once and saved to a blend each tile appends its objects from
+    public static async Task<List<MeshConversion>> ImportMeshTilesAsync(string meshFile, string outDir, string name, string outExtension, float tileSize, bool fixNormals = false, CancellationToken cancellationToken = default)
+    {
         meshFile = Path.GetFullPath(meshFile).Replace("\\", "/");
-        outMeshFile = Path.GetFullPath(Path.Combine(outDir, $"{name}.blend")).Replace("\\", "/");
+        if (!File.Exists(meshFile)) return null;
 
-        // check the file we want to import exists
-        // and that the out file doesn't exist, or overwrite existing
-        if (File.Exists(meshFile) && (overwrite || !File.Exists(outMeshFile)))
+        var tilesFolder = Path.Combine(FolderNames.GetTempFolder(), "mesh-tiles", Guid.NewGuid().ToString("N"));
+        var tilesFile = Path.Combine(tilesFolder, "tiles.json").Replace("\\", "/");
+        Directory.CreateDirectory(tilesFolder);
+
+        try
         {
-            switch (extension)
-            {
-                case ".dae":
-                    File.WriteAllText(meshFile, File.ReadAllText(meshFile).Replace("mat_", ""));
-                    RunBlender("convert-mesh.py", $"\"{meshFile}\" \"{outMeshFile}\" {(fixNormals ? "1" : "0")}");
-                    break;
-                default:
-                    RunBlender("convert-mesh.py", $"\"{meshFile}\" \"{outMeshFile}\" {(fixNormals ? "1" : "0")}");
-                    break;
-            }
+            // materials are renamed before the blend is saved so tiles don't need to
+            var args = new List<string>() { "--tiles", meshFile, tilesFile, tileSize.ToString(CultureInfo.InvariantCulture) };
+            var materialPrefix = GetMaterialPrefix(meshFile);
+            if (materialPrefix != null) args.AddRange(new[] { "--strip-material-prefix", materialPrefix });
 
-            if (File.Exists(outMeshFile))
+            await RunBlenderAsync("convert-mesh.py", args.ToArray(), cancellationToken: cancellationToken).ConfigureAwait(false);
+            if (!File.Exists(tilesFile))
             {
-                return true;
+                Debug.Log($"Failed to split mesh {meshFile} into tiles");
+                return null;
             }
-            else
+
+            var tiles = JObject.Parse(File.ReadAllText(tilesFile));
+            var blendFile = tiles.Value<string>("blend");
+            var conversions = tiles["tiles"].Select(tile => new MeshConversion()
             {
-                Debug.Log($"Failed to import mesh {meshFile}");
-            }
-        }
+                MeshFile = blendFile,
+                OutMeshFile = Path.GetFullPath(Path.Combine(outDir, $"{name}_{tile.Value<int>("x")}_{tile.Value<int>("y")}{outExtension}")).Replace("\\", "/"),
+                FixNormals = fixNormals,
+                ObjectNames = tile["objects"].Values<string>().ToArray(),
+                ContentHash = tile.Value<string>("hash"),
+            }).ToList();
 
-        return false;
+            await ConvertMeshesAsync(conversions, cancellationToken).ConfigureAwait(false);
+            return conversions;
+        }
+        finally
+        {
+            try { Directory.Delete(tilesFolder, true); }
+            catch (IOException) { }
+        }
     }
 
-    public static bool ImportMeshAsGlb(string meshFile, string outDir, string name, bool overwrite, out string outMeshFile, bool fixNormals = false)
+    public static bool TryCreateMeshConversion(string meshFile, string outDir, string name, string outExtension, bool overwrite, bool fixNormals, out MeshConversion conversion)
     {
-        var extension = Path.GetExtension(meshFile);
+        conversion = null;
 
-        // import mesh
         meshFile = Path.GetFullPath(meshFile).Replace("\\", "/");
-        outMeshFile = Path.GetFullPath(Path.Combine(outDir, $"{name}.glb")).Replace("\\", "/");
+        var outMeshFile = Path.GetFullPath(Path.Combine(outDir, $"{name}{outExtension}")).Replace("\\", "/");
 
         // check the file we want to import exists
         // and that the out file doesn't exist, or overwrite existing
-        if (File.Exists(meshFile) && (overwrite || !File.Exists(outMeshFile)))
+        if (!File.Exists(meshFile) || (!overwrite && File.Exists(outMeshFile)))
+            return false;
+
+        // the source file is left as is, material names are fixed up after blender imports it
+        conversion = new MeshConversion() { MeshFile = meshFile, OutMeshFile = outMeshFile, FixNormals = fixNormals, MaterialPrefix = GetMaterialPrefix(meshFile) };
+        return true;
+    }
+
+    public static void ConvertMeshes(IList<MeshConversion> conversions)
+    {
+        try
         {
-            switch (extension)
-            {
-                case ".dae":
-                    File.WriteAllText(meshFile, File.ReadAllText(meshFile).Replace("mat_", ""));
-                    RunBlender("convert-mesh.py", $"\"{meshFile}\" \"{outMeshFile}\" {(fixNormals ? "1" : "0")}");
-                    break;
-                default:
-                    RunBlender("convert-mesh.py", $"\"{meshFile}\" \"{outMeshFile}\" {(fixNormals ? "1" : "0")}");
-                    break;
-            }
+            ConvertMeshesAsync(conversions).GetAwaiter().GetResult();
+        }
+        catch (OperationCanceledException)
+        {
+        }
+    }
+
+    public static async Task ConvertMeshesAsync(IList<MeshConversion> conversions, CancellationToken cancellationToken = default)
+    {
+        if (conversions == null || conversions.Count == 0) return;
+
+        // restore unchanged meshes from the cache
+        foreach (var conversion in conversions)
+        {
+            conversion.CacheKey = GetConversionCacheKey(conversion);
+            conversion.Success = BlenderCache.TryRestore(conversion.CacheKey, conversion.OutMeshFile);
+        }
+
+        conversions = conversions.Where(x => !x.Success).ToList();
+        if (conversions.Count == 0) return;
+
+        // split into one batch per worker, each batch is converted in a single blender job
+        var batchCount = Math.Min(conversions.Count, GetWorkerCount());
+        var batches = conversions
+            .Select((x, i) => (x, i))
+            .GroupBy(x => x.i % batchCount, x => x.x)
+            .Select(x => x.ToList())
+            .ToList();
+
+        await Task.WhenAll(batches.Select(x => ConvertMeshBatchAsync(x, cancellationToken))).ConfigureAwait(false);
+    }
+
+    static async Task ConvertMeshBatchAsync(List<MeshConversion> batch, CancellationToken cancellationToken)
+    {
+        var batchId = Guid.NewGuid().ToString("N");
+        var manifestFile = Path.Combine(FolderNames.GetTempFolder(), $"convert-mesh-{batchId}.json").Replace("\\", "/");
+        var resultsFile = Path.Combine(FolderNames.GetTempFolder(), $"convert-mesh-{batchId}-results.json").Replace("\\", "/");
 
-            if (File.Exists(outMeshFile))
+        try
+        {
+            var manifest = new JArray(batch.Select(x => new JObject()
             {
-                return true;
-            }
-            else
+                ["in"] = x.MeshFile,
+                ["out"] = x.OutMeshFile,
+                ["fix_normals"] = x.FixNormals,
+                ["objects"] = x.ObjectNames != null ? new JArray(x.ObjectNames) : null,
+                ["material_prefix"] = x.MaterialPrefix,
+            }));
+
+            File.WriteAllText(manifestFile, manifest.ToString());
+            await RunBlenderAsync("convert-mesh.py", new[] { "--manifest", manifestFile, resultsFile }, cancellationToken: cancellationToken).ConfigureAwait(false);
+
+            // results are written in manifest order
+            // anything missing didn't finish
+            var results = File.Exists(resultsFile) ? JArray.Parse(File.ReadAllText(resultsFile)) : new JArray();
+            for (int i = 0; i < batch.Count; ++i)
             {
-                Debug.Log($"Failed to import mesh {meshFile}");
+                var result = i < results.Count ? results[i] : null;
+                batch[i].Success = result != null && result.Value<bool>("ok") && File.Exists(batch[i].OutMeshFile);
+                batch[i].Error = result?.Value<string>("error");
+
+                if (batch[i].Success)
+                    BlenderCache.Store(batch[i].CacheKey, batch[i].OutMeshFile);
+                else
+                    Debug.Log($"Failed to import mesh {batch[i].MeshFile} {batch[i].Error}");
             }
         }
-
-        return false;
+        finally
+        {
+            if (File.Exists(manifestFile)) File.Delete(manifestFile);
+            if (File.Exists(resultsFile)) File.Delete(resultsFile);
+        }
     }
-
 }
@@ -0,0 +1,164 @@
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Text;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+using UnityEngine;
+
+// collects the per stage timings blender scripts emit while an import runs
+// and writes them out as a json report when the import finishes
+public static class BlenderTimings
+{
+    public static bool Enabled = true;
+    public static int StagesToLog = 10;
+
+    static readonly string ReportFolderName = "blender-timings";
+    static readonly object timingsLock = new object();
+    static List<JObject> stages = null;
+    static string reportName = null;
+    static DateTime started;
+    static int depth = 0;
+
+    public static string GetReportFolder()
+    {
+        var path = Path.Combine(FolderNames.GetTempFolder(), ReportFolderName);
+        if (!Directory.Exists(path)) Directory.CreateDirectory(path);
+        return path;
+    }
+
+    // starts collecting stages, nested calls share the outermost report
+    public static void Begin(string name)
+    {
+        lock (timingsLock)
+        {
+            if (depth++ > 0) return;
+
+            stages = new List<JObject>();
+            reportName = name;
+            started = DateTime.Now;
+        }
+    }
+
+    // writes the report once the outermost Begin is ended
+    // returns the report path or null if nothing was written
+    public static string End()
+    {
+        List<JObject> finishedStages;
+        string name;
+        DateTime finishedStarted;
+        lock (timingsLock)
+        {
+            if (depth == 0 || --depth > 0) return null;
+
+            finishedStages = stages;
+            name = reportName;
+            finishedStarted = started;
+            stages = null;
+            reportName = null;
+        }
+
+        if (!Enabled || finishedStages == null || !finishedStages.Any()) return null;
+
+        try
+        {
+            return WriteReport(name, finishedStarted, finishedStages);
+        }
+        catch (IOException ex)
+        {
+            Debug.LogWarning($"Failed to write blender timings: {ex.Message}");
+            return null;
+        }
+    }
+
+    public static void Record(string pythonScript, JObject message)
+    {
+        if (!Enabled) return;
+
+        lock (timingsLock)
+        {
+            if (stages == null) return;
+
+            message["script"] = pythonScript;
+            stages.Add(message);
+        }
+    }
+
+    // records the line if it is a stage message, returns false for anything else
+    public static bool TryRecordLine(string pythonScript, string line)
+    {
+        if (line == null || !line.StartsWith(BlenderWorker.MessagePrefix)) return false;
+
+        try
+        {
+            var message = JObject.Parse(line.Substring(BlenderWorker.MessagePrefix.Length));
+            if (message.Value<string>("event") != "stage") return false;
+
+            Record(pythonScript, message);
+            return true;
+        }
+        catch (JsonReaderException)
+        {
+            return false;
+        }
+    }
+
+    static string WriteReport(string name, DateTime reportStarted, List<JObject> reportStages)
+    {
+        // totals per script stage, and per file so the heaviest assets stand out
+        // rss is the working set when a stage ended and rss_delta how much it grew during the stage
+        var byStage = reportStages
+            .GroupBy(x => (Script: x.Value<string>("script"), Stage: x.Value<string>("stage")))
+            .Select(g => new JObject()
+            {
+                ["script"] = g.Key.Script,
+                ["stage"] = g.Key.Stage,
+                ["count"] = g.Count(),
+                ["elapsed"] = g.Sum(x => x.Value<double?>("elapsed") ?? 0),
+                ["max_elapsed"] = g.Max(x => x.Value<double?>("elapsed") ?? 0),
+                ["rss"] = g.Max(x => x.Value<long?>("rss") ?? 0),
+                ["rss_delta"] = g.Max(x => x.Value<long?>("rss_delta") ?? 0),
+            })
+            .OrderByDescending(x => x.Value<double>("elapsed"))
+            .ToList();
+
+        var byFile = reportStages
+            .GroupBy(x => x.Value<string>("file") ?? "")
+            .Select(g => new JObject()
+            {
+                ["file"] = g.Key,
+                ["elapsed"] = g.Sum(x => x.Value<double?>("elapsed") ?? 0),
+                ["rss_delta"] = g.Sum(x => x.Value<long?>("rss_delta") ?? 0),
+                ["vertices"] = g.Max(x => x.Value<long?>("vertices") ?? 0),
+                ["faces"] = g.Max(x => x.Value<long?>("faces") ?? 0),
+            })
+            .OrderByDescending(x => x.Value<double>("elapsed"))
+            .ToList();
+
+        var report = new JObject()
+        {
+            ["name"] = name,
+            ["started"] = reportStarted.ToString("o"),
+            ["elapsed"] = (DateTime.Now - reportStarted).TotalSeconds,
+            ["by_stage"] = new JArray(byStage),
+            ["by_file"] = new JArray(byFile),
+            ["stages"] = new JArray(reportStages),
+        };
+
+        var safeName = string.Concat((name ?? "import").Select(x => Path.GetInvalidFileNameChars().Contains(x) || x == ' ' ? '-' : x));
+        var reportPath = Path.Combine(GetReportFolder(), $"{safeName}-{reportStarted:yyyyMMdd-HHmmss}.json");
+        File.WriteAllText(reportPath, report.ToString(Formatting.Indented));
+
+        // summary of where the time went
+        var sb = new StringBuilder();
+        sb.AppendLine($"Blender timings for {name} ({report.Value<double>("elapsed"):0.0}s): {reportPath}");
+        foreach (var stage in byStage.Take(StagesToLog))
+            sb.AppendLine($"  {stage.Value<string>("script")} {stage.Value<string>("stage")}: {stage.Value<double>("elapsed"):0.00}s over {stage.Value<int>("count")} runs, rss {stage.Value<long>("rss") / (1024 * 1024)} MB (+{stage.Value<long>("rss_delta") / (1024 * 1024)} MB)");
+        foreach (var file in byFile.Where(x => !String.IsNullOrEmpty(x.Value<string>("file"))).Take(StagesToLog))
+            sb.AppendLine($"  {file.Value<string>("file")}: {file.Value<double>("elapsed"):0.00}s, {file.Value<long>("faces")} faces, {file.Value<long>("rss_delta") / (1024 * 1024):+0;-0} MB");
+        Debug.Log(sb.ToString());
+
+        return reportPath;
+    }
+}
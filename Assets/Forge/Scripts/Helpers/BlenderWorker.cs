@@ -0,0 +1,214 @@
+using System;
+using System.Collections.Concurrent;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.IO;
+using System.Text;
+using System.Threading;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+
+// long running blender process that executes scripts as jobs
+// avoids paying blender's startup cost for every conversion
+public class BlenderWorker : IDisposable
+{
+    public static readonly string WorkerScript = "blender-worker.py";
+    public static readonly string MessagePrefix = "@forge ";
+
+    private readonly Process process;
+    private readonly BlockingCollection<JObject> messages = new BlockingCollection<JObject>();
+    private readonly StringBuilder sbOut = new StringBuilder();
+    private readonly object outLock = new object();
+    private int nextJobId = 0;
+    private string runningScript = null;
+
+    public bool IsAlive => !process.HasExited && !messages.IsAddingCompleted;
+    public DateTime LastUsed { get; private set; } = DateTime.Now;
+
+    private BlenderWorker(Process process)
+    {
+        this.process = process;
+    }
+
+    public static BlenderWorker Start(string blenderPath)
+    {
+        var pyScriptPath = Path.GetFullPath(Path.Combine(FolderNames.BlenderScriptFolder, WorkerScript)).Replace("\\", "/");
+        var startInfo = new ProcessStartInfo(Path.GetFullPath(blenderPath), $"--background --python \"{pyScriptPath}\"")
+        {
+            CreateNoWindow = true,
+            RedirectStandardOutput = true,
+            RedirectStandardError = true,
+            RedirectStandardInput = true,
+            UseShellExecute = false,
+        };
+
+        var worker = new BlenderWorker(new Process() { StartInfo = startInfo });
+        worker.process.OutputDataReceived += (s, e) => worker.OnOutput(e.Data);
+        worker.process.ErrorDataReceived += (s, e) => worker.AppendOutput(e.Data);
+        worker.process.Start();
+        worker.process.BeginOutputReadLine();
+        worker.process.BeginErrorReadLine();
+
+        // wait for worker to finish loading
+        if (!worker.WaitForMessage("ready", null, Timeout.InfiniteTimeSpan, CancellationToken.None, out _))
+        {
+            UnityEngine.Debug.LogError($"Failed to start blender worker: {worker.TakeOutput()}");
+            worker.Dispose();
+            return null;
+        }
+
+        worker.TakeOutput();
+        return worker;
+    }
+
+    public bool Run(string pythonScript, string[] args, string blendFile, TimeSpan timeout, CancellationToken cancellationToken, out string output)
+    {
+        var id = ++nextJobId;
+        var job = new JObject()
+        {
+            ["id"] = id,
+            ["script"] = pythonScript,
+            ["args"] = new JArray(args),
+            ["blend_file"] = blendFile,
+        };
+
+        LastUsed = DateTime.Now;
+        runningScript = pythonScript;
+        try
+        {
+            // escape non ascii so paths survive the process' stdin encoding
+            process.StandardInput.WriteLine(JsonConvert.SerializeObject(job, new JsonSerializerSettings() { StringEscapeHandling = StringEscapeHandling.EscapeNonAscii }));
+            process.StandardInput.Flush();
+        }
+        catch (IOException)
+        {
+            output = TakeOutput();
+            return false;
+        }
+
+        bool result;
+        JObject message;
+        try
+        {
+            result = WaitForMessage("job", id, timeout, cancellationToken, out message) && message.Value<bool>("ok");
+        }
+        catch (OperationCanceledException)
+        {
+            // the script can't be interrupted so the worker goes with it
+            Kill();
+            throw;
+        }
+
+        output = TakeOutput();
+        if (message == null && !process.HasExited)
+        {
+            Kill();
+            output += $"Timed out after {timeout}";
+        }
+        else if (!result && message != null)
+        {
+            output += message.Value<string>("error");
+        }
+
+        LastUsed = DateTime.Now;
+        return result;
+    }
+
+    public void Dispose()
+    {
+        try
+        {
+            if (!process.HasExited)
+            {
+                process.StandardInput.WriteLine("{\"command\":\"quit\"}");
+                process.StandardInput.Flush();
+                if (!process.WaitForExit(2000))
+                    process.Kill();
+            }
+        }
+        catch (Exception)
+        {
+            // process already gone
+        }
+
+        process.Dispose();
+    }
+
+    private void Kill()
+    {
+        try
+        {
+            if (!process.HasExited)
+                process.Kill();
+        }
+        catch (Exception)
+        {
+            // process already gone
+        }
+    }
+
+    private bool WaitForMessage(string e, int? id, TimeSpan timeout, CancellationToken cancellationToken, out JObject message)
+    {
+        // blocks until the matching message arrives, the process exits or we run out of time
+        var stopwatch = Stopwatch.StartNew();
+        while (messages.TryTake(out message, GetRemainingMilliseconds(timeout, stopwatch), cancellationToken))
+        {
+            if (message.Value<string>("event") == e && (!id.HasValue || message.Value<int?>("id") == id))
+                return true;
+        }
+
+        message = null;
+        return false;
+    }
+
+    private static int GetRemainingMilliseconds(TimeSpan timeout, Stopwatch stopwatch)
+    {
+        if (timeout == Timeout.InfiniteTimeSpan) return Timeout.Infinite;
+        return (int)Math.Max(0, (timeout - stopwatch.Elapsed).TotalMilliseconds);
+    }
+
+    private void OnOutput(string data)
+    {
+        if (data == null)
+        {
+            // stdout closed, process has exited
+            messages.CompleteAdding();
+            return;
+        }
+
+        if (data.StartsWith(MessagePrefix))
+        {
+            try
+            {
+                // stage timings go straight to the current report
+                var message = JObject.Parse(data.Substring(MessagePrefix.Length));
+                if (message.Value<string>("event") == "stage")
+                    BlenderTimings.Record(runningScript, message);
+                else
+                    messages.Add(message);
+                return;
+            }
+            catch (JsonReaderException)
+            {
+                // not one of ours, treat as log output
+            }
+        }
+
+        AppendOutput(data);
+    }
+
+    private void AppendOutput(string data)
+    {
+        lock (outLock) { sbOut.AppendLine(data); }
+    }
+
+    private string TakeOutput()
+    {
+        lock (outLock)
+        {
+            var output = sbOut.ToString();
+            sbOut.Clear();
+            return output;
+        }
+    }
+}
@@ -0,0 +1,162 @@
+using System;
+using System.Collections.Concurrent;
+using System.Threading;
+using System.Threading.Tasks;
+using UnityEngine;
+
+// fixed number of blender workers fed from a shared job queue
+// bounds how many blender processes run at once no matter how many callers submit jobs
+public class BlenderWorkerPool : IDisposable
+{
+    class Job
+    {
+        public string PythonScript;
+        public string[] Args;
+        public string BlendFile;
+        public TimeSpan Timeout;
+        public CancellationToken CancellationToken;
+        public TaskCompletionSource<bool> Completion;
+    }
+
+    private readonly string blenderPath;
+    private readonly bool useWorkers;
+    private readonly TimeSpan idleTimeout;
+    private readonly BlockingCollection<Job> jobs = new BlockingCollection<Job>();
+    private readonly CancellationTokenSource shutdown = new CancellationTokenSource();
+    private readonly Thread[] threads;
+
+    public int WorkerCount => threads.Length;
+    public int PendingJobs => jobs.Count;
+
+    public BlenderWorkerPool(string blenderPath, int workerCount, bool useWorkers, TimeSpan idleTimeout)
+    {
+        this.blenderPath = blenderPath;
+        this.useWorkers = useWorkers;
+        this.idleTimeout = idleTimeout;
+
+        threads = new Thread[Math.Max(1, workerCount)];
+        for (int i = 0; i < threads.Length; ++i)
+        {
+            threads[i] = new Thread(WorkerLoop) { IsBackground = true, Name = $"Blender Worker {i}" };
+            threads[i].Start();
+        }
+    }
+
+    public Task<bool> Enqueue(string pythonScript, string[] args, string blendFile, TimeSpan timeout, CancellationToken cancellationToken)
+    {
+        var job = new Job()
+        {
+            PythonScript = pythonScript,
+            Args = args,
+            BlendFile = blendFile,
+            Timeout = timeout,
+            CancellationToken = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken, shutdown.Token).Token,
+            Completion = new TaskCompletionSource<bool>(TaskCreationOptions.RunContinuationsAsynchronously),
+        };
+
+        // jobs cancelled while queued complete straight away and are skipped when dequeued
+        var registration = job.CancellationToken.Register(() => job.Completion.TrySetCanceled(job.CancellationToken));
+        job.Completion.Task.ContinueWith(_ => registration.Dispose(), TaskContinuationOptions.ExecuteSynchronously);
+
+        try
+        {
+            jobs.Add(job);
+        }
+        catch (InvalidOperationException)
+        {
+            // pool is closing
+            job.Completion.TrySetCanceled();
+        }
+
+        return job.Completion.Task;
+    }
+
+    // stops accepting jobs, queued jobs still run
+    public void Close()
+    {
+        jobs.CompleteAdding();
+    }
+
+    // stops accepting jobs and cancels everything queued or running
+    public void Dispose()
+    {
+        jobs.CompleteAdding();
+        shutdown.Cancel();
+    }
+
+    private void WorkerLoop()
+    {
+        BlenderWorker worker = null;
+        var canStartWorker = useWorkers;
+
+        try
+        {
+            while (!jobs.IsCompleted)
+            {
+                Job job;
+                try
+                {
+                    if (!jobs.TryTake(out job, worker != null ? (int)idleTimeout.TotalMilliseconds : Timeout.Infinite, shutdown.Token))
+                    {
+                        // nothing to do, free blender's memory until the next job
+                        worker?.Dispose();
+                        worker = null;
+                        continue;
+                    }
+                }
+                catch (OperationCanceledException)
+                {
+                    break;
+                }
+
+                if (job.CancellationToken.IsCancellationRequested)
+                {
+                    job.Completion.TrySetCanceled(job.CancellationToken);
+                    continue;
+                }
+
+                try
+                {
+                    // restart workers that crashed or were killed by a timeout
+                    if (worker != null && !worker.IsAlive)
+                    {
+                        worker.Dispose();
+                        worker = null;
+                    }
+
+                    if (worker == null && canStartWorker)
+                    {
+                        worker = BlenderWorker.Start(blenderPath);
+                        canStartWorker = worker != null;
+                    }
+
+                    bool result;
+                    string output;
+                    if (worker != null)
+                        result = worker.Run(job.PythonScript, job.Args, job.BlendFile, job.Timeout, job.CancellationToken, out output);
+                    else
+                        result = BlenderHelper.RunBlenderProcess(blenderPath, job.PythonScript, job.Args, job.BlendFile, job.Timeout, job.CancellationToken, out output);
+
+                    if (!result) Debug.LogError($"{job.PythonScript}: {output}");
+                    job.Completion.TrySetResult(result);
+                }
+                catch (OperationCanceledException)
+                {
+                    job.Completion.TrySetCanceled(job.CancellationToken);
+                }
+                catch (Exception ex)
+                {
+                    job.Completion.TrySetException(ex);
+                }
+            }
+        }
+        finally
+        {
+            worker?.Dispose();
+
+            // anything left behind after a shutdown
+            while (jobs.TryTake(out var job))
+                job.Completion.TrySetCanceled();
+        }
+    }
+}
@@ -225,7 +225,8 @@ public static class WrenchHelper
         for (int i = 0; i < lines.Length; i++)
         {
             var line = lines[i];
-            var regexSamplerBegin = new Regex(@$"<newparam sid=""(\d)_sampler"">");
+            // sampler ids keep wrench's mat_ prefix since the file is no longer rewritten before import
+            var regexSamplerBegin = new Regex(@$"<newparam sid=""(?:mat_)?(\d)_sampler"">");
             var regexSamplerEnd = new Regex(@"</sampler2D>");
             var regexWrapS = new Regex(@"<wrap_s>(.*)</wrap_s>");
             var regexWrapT = new Regex(@"<wrap_t>(.*)</wrap_t>");
@@ -21,6 +21,13 @@ public class ForgeSettings : ScriptableObject
 
     public Color SelectionColor = new Color(0, 0, 1, 0.2f);
 
+    // 0 uses one blender worker per physical core
+    public int BlenderWorkerCount = 0;
+    public int BlenderJobTimeoutMinutes = 30;
+
+    // 0 splits large collision bakes across every blender worker, 1 bakes in a single process
+    public int CollisionShardCount = 0;
+
     public static ForgeSettings Load()
     {
         return AssetDatabase.LoadAssetAtPath<ForgeSettings>(ForgeSettings.FORGE_SETTINGS_PATH);